@@ -1,12 +1,21 @@
 import os
+import signal
+import threading
 from flask import Flask
 from flask_cors import CORS
 from flask_socketio import SocketIO
+from werkzeug.middleware.proxy_fix import ProxyFix
+from werkzeug.serving import is_running_from_reloader
 from .config import Config
 
 # Import blueprints
 from .routes.livekit import livekit_bp
-from .routes.transcription import transcription_bp, socketio
+from .routes.transcription import transcription_bp, socketio, poll_checkpointed_sessions
+from .routes.admin import admin_bp
+from .services.search_index import get_transcript_index
+from .services.health import get_health_prober
+from .services.drain import drain_controller
+from .services.reaper import get_reaper
 # (You will add other blueprints here, e.g., auth_bp, tutor_bp)
 
 def create_app():
@@ -28,20 +37,58 @@ def create_app():
     # Load config
     app.config.from_object(Config)
 
+    # Only trust X-Forwarded-For from the configured number of proxies, so clients cannot spoof their IP
+    if Config.TRUSTED_PROXY_HOPS:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=Config.TRUSTED_PROXY_HOPS)
+
     # Initialize SocketIO with CORS allowed for frontend
     socketio.init_app(app, cors_allowed_origins=["http://localhost:3000"])
 
     # Register blueprints
     app.register_blueprint(livekit_bp)
     app.register_blueprint(transcription_bp)
+    app.register_blueprint(admin_bp)
+
+    # Start loading the transcript search index in the background
+    get_transcript_index()
+    # Upstream health is probed in the background; health endpoints only read its state
+    prober = get_health_prober()
+    prober.add_readiness_check('draining', lambda: not drain_controller.draining)
+
+    # SIGTERM starts a graceful drain instead of dropping sessions and sockets
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGTERM, lambda signum, frame: drain_controller.start(reason='SIGTERM'))
+
+    # Reconcile rooms and transcription sessions with LiveKit in the background
+    if Config.REAPER_ENABLED:
+        get_reaper().start()
+
+    # Keep taking over transcription sessions that draining nodes hand off
+    def serving() -> bool:
+        # The debug reloader's watcher process builds the app too but never serves; it must not claim any
+        return not app.debug or is_running_from_reloader()
+    threading.Thread(target=poll_checkpointed_sessions, args=(serving,), name='resume-sessions', daemon=True).start()
     # app.register_blueprint(auth_bp)
     # app.register_blueprint(tutor_bp)
 
-    # Health check endpoint
+    # Liveness: the process is up and the background prober is making progress
     @app.route('/health')
     def health():
+        if not prober.is_live():
+            return {'status': 'error', 'error': 'health prober stalled'}, 503
         return {'status': 'ok'}, 200
 
+    # Readiness: upstream dependencies answered their latest probes
+    @app.route('/health/ready')
+    def ready():
+        state = prober.state()
+        body = {
+            'status': 'ready' if state['ready'] else 'not_ready',
+            'reasons': state.get('not_ready_reasons', []),
+            'updated_at': state['updated_at']
+        }
+        return body, 200 if state['ready'] else 503
+
     return app
 
 # Export socketio instance
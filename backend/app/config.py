@@ -10,9 +10,57 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL',
                                          f'sqlite:///{os.path.join(basedir, "app.db")}')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Embedded store: max writes per group commit and how long the writer waits to fill a batch
+    STORE_BATCH_SIZE = int(os.getenv('STORE_BATCH_SIZE', '256'))
+    STORE_FLUSH_INTERVAL = float(os.getenv('STORE_FLUSH_INTERVAL', '0.05'))
+    STORE_READ_POOL_SIZE = int(os.getenv('STORE_READ_POOL_SIZE', '8'))  # max open read connections
     # LiveKit config passthrough (optional, loaded in server_sdk)
     LIVEKIT_HOST = os.getenv('LIVEKIT_HOST')
     LIVEKIT_API_KEY = os.getenv('LIVEKIT_API_KEY')
     LIVEKIT_API_SECRET = os.getenv('LIVEKIT_API_SECRET')
+    # Comma-separated 'host=weight' list; enables sharded room placement when it has several hosts
+    LIVEKIT_HOSTS = os.getenv('LIVEKIT_HOSTS')
+    LIVEKIT_PLACEMENT = os.getenv('LIVEKIT_PLACEMENT', 'hash')  # 'hash' or 'least_loaded'
+    # Bearer token for admin-only endpoints (disabled when unset)
+    ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')
+    # Span tracing around LiveKit RPCs, token minting and transcript emits (toggle at runtime via /api/admin/tracing)
+    TRACING_ENABLED = os.getenv('TRACING_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+    # Background health prober
+    HEALTH_PROBE_INTERVAL = float(os.getenv('HEALTH_PROBE_INTERVAL', '5'))
+    HEALTH_PROBE_TIMEOUT = float(os.getenv('HEALTH_PROBE_TIMEOUT', '2'))
+    HEALTH_WINDOW = int(os.getenv('HEALTH_WINDOW', '60'))  # probes kept per target
+    HEALTH_MAX_ERROR_RATE = float(os.getenv('HEALTH_MAX_ERROR_RATE', '0.5'))
+    STT_PROBE_URL = os.getenv('STT_PROBE_URL', 'https://api.assemblyai.com')
+    # Graceful drain: max seconds before exit, window over which clients are told to reconnect,
+    # how old a checkpointed transcription session may be for a live node to resume it,
+    # and how often live nodes look for such sessions
+    DRAIN_TIMEOUT = float(os.getenv('DRAIN_TIMEOUT', '60'))
+    DRAIN_RECONNECT_WINDOW = float(os.getenv('DRAIN_RECONNECT_WINDOW', '20'))
+    DRAIN_RESUME_MAX_AGE = float(os.getenv('DRAIN_RESUME_MAX_AGE', '300'))
+    DRAIN_RESUME_INTERVAL = float(os.getenv('DRAIN_RESUME_INTERVAL', '2'))
     # Other service configs (e.g., Redis URL)
-    REDIS_URL = os.getenv('REDIS_URL', 'redis://')
\ No newline at end of file
+    REDIS_URL = os.getenv('REDIS_URL', 'redis://')
+    # Admission control for the LiveKit endpoints
+    RATE_LIMIT_CLIENT_RATE = float(os.getenv('RATE_LIMIT_CLIENT_RATE', '1'))  # tokens/second per client
+    RATE_LIMIT_CLIENT_BURST = float(os.getenv('RATE_LIMIT_CLIENT_BURST', '5'))
+    RATE_LIMIT_IP_RATE = float(os.getenv('RATE_LIMIT_IP_RATE', '5'))  # tokens/second per IP
+    RATE_LIMIT_IP_BURST = float(os.getenv('RATE_LIMIT_IP_BURST', '20'))
+    RATE_LIMIT_MAX_KEYS = int(os.getenv('RATE_LIMIT_MAX_KEYS', '10000'))
+    # Reverse proxies in front of the app whose X-Forwarded-For entries are trusted (0 = none)
+    TRUSTED_PROXY_HOPS = int(os.getenv('TRUSTED_PROXY_HOPS', '0'))
+    LIVEKIT_MAX_CONCURRENCY = int(os.getenv('LIVEKIT_MAX_CONCURRENCY', '8'))
+    LIVEKIT_MAX_QUEUE = int(os.getenv('LIVEKIT_MAX_QUEUE', '32'))
+    LIVEKIT_QUEUE_TIMEOUT = float(os.getenv('LIVEKIT_QUEUE_TIMEOUT', '2'))
+    # Room name allocation: generated name length, names prefetched per random draw,
+    # and how long a name handed out by /generate-room-name stays reserved
+    ROOM_NAME_LENGTH = int(os.getenv('ROOM_NAME_LENGTH', '8'))
+    ROOM_NAME_BATCH = int(os.getenv('ROOM_NAME_BATCH', '1024'))
+    ROOM_NAME_RESERVATION_TTL = float(os.getenv('ROOM_NAME_RESERVATION_TTL', '120'))
+    # Background reaper: reconciles local state with one LiveKit room listing per interval,
+    # deleting rooms empty for REAPER_IDLE_TIMEOUT seconds (or older than REAPER_MAX_ROOM_AGE, 0 = no limit)
+    REAPER_ENABLED = os.getenv('REAPER_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    REAPER_INTERVAL = float(os.getenv('REAPER_INTERVAL', '60'))
+    REAPER_IDLE_TIMEOUT = float(os.getenv('REAPER_IDLE_TIMEOUT', '300'))
+    REAPER_MAX_ROOM_AGE = float(os.getenv('REAPER_MAX_ROOM_AGE', '0'))
+    REAPER_CONCURRENCY = int(os.getenv('REAPER_CONCURRENCY', '4'))  # parallel room deletions
+    REAPER_LIST_TIMEOUT = float(os.getenv('REAPER_LIST_TIMEOUT', '10'))
@@ -1,14 +1,15 @@
 """
 LiveKit server SDK integration with optimized lazy initialization and dummy fallback.
 """
+import asyncio
 import os
 import logging
-import random
-import string
 from functools import lru_cache
 from livekit import api
 from dotenv import load_dotenv
 import json
+from ..services.tracing import traced
+from ..services.room_names import room_names
 
 # Configure logger
 logger = logging.getLogger(__name__)
@@ -19,20 +20,34 @@ load_dotenv()
 
 # Environment variable keys
 _ENV_KEYS = ('LIVEKIT_HOST', 'LIVEKIT_API_KEY', 'LIVEKIT_API_SECRET')
+# Optional multi-host setup: 'wss://a:7880=2,wss://b:7880' (host=weight)
+_HOSTS_ENV_KEY = 'LIVEKIT_HOSTS'
 
-def generate_random_room_name(length=8):
-    """Generate a random room name using letters and numbers."""
-    characters = string.ascii_letters + string.digits
-    return ''.join(random.choice(characters) for _ in range(length))
+# Identity prefix of the transcription bot; it is kept out of rosters and participant counts
+TRANSCRIBER_IDENTITY_PREFIX = 'transcriber-'
+
+def is_transcriber_identity(identity: str) -> bool:
+    return identity.startswith(TRANSCRIBER_IDENTITY_PREFIX)
+
+def generate_random_room_name():
+    """Reserve a room name (letters and numbers) that no live room is using."""
+    return room_names.allocate()
 
 # Load and validate config
 def _load_config():
     config = {key: os.getenv(key) for key in _ENV_KEYS}
+    if not config['LIVEKIT_HOST'] and os.getenv(_HOSTS_ENV_KEY):
+        # A host list stands in for the single host; the first entry is the default
+        config['LIVEKIT_HOST'] = os.getenv(_HOSTS_ENV_KEY).split(',')[0].split('=')[0].strip()
     if not all(config.values()):
         missing = [k for k, v in config.items() if not v]
         logger.warning(f"Missing LiveKit env vars: {missing}. Using dummy service.")
     return config
 
+def load_livekit_config() -> dict:
+    """LIVEKIT_HOST/API_KEY/API_SECRET, with the first LIVEKIT_HOSTS entry standing in for the host."""
+    return _load_config()
+
 class DummyRoomService:
     """A no-op RoomService used when LiveKit config is absent."""
     def list_rooms(self):
@@ -47,6 +62,14 @@ class DummyRoomService:
         logger.debug(f"DummyRoomService.create_room_async called for room: {name}")
         return {"name": name, "status": "dummy_created"}
 
+    async def list_participants_async(self, room_name):
+        logger.debug(f"DummyRoomService.list_participants_async called for room: {room_name}")
+        return []
+
+    async def list_room_details_async(self):
+        logger.debug("DummyRoomService.list_room_details_async called")
+        return []
+
 class SimpleLiveKitService:
     """Simple LiveKit service that avoids async initialization issues."""
     
@@ -90,6 +113,7 @@ class SimpleLiveKitService:
             "message": "Use create_room_async() for full functionality"
         }
     
+    @traced('livekit.create_room')
     async def create_room_async(self, name, max_participants=None, empty_timeout=None, metadata=None):
         """
         Create a room with full async functionality using LiveKit's official API.
@@ -142,6 +166,7 @@ class SimpleLiveKitService:
                     logger.debug(f"Error during cleanup: {cleanup_error}")
                     pass
     
+    @traced('livekit.list_rooms')
     async def list_rooms_async(self):
         """Async version that can use the full LiveKit API with proper cleanup."""
         api_client = None
@@ -175,6 +200,76 @@ class SimpleLiveKitService:
                     logger.debug(f"Error during cleanup: {cleanup_error}")
                     pass
 
+    @traced('livekit.list_rooms')
+    async def list_room_details_async(self):
+        """
+        List all rooms with their participant counts. Errors propagate so callers
+        can tell an unreachable host from an empty one.
+        """
+        api_client = None
+        try:
+            api_client = await self._get_api_client()
+            
+            from livekit.api import ListRoomsRequest
+            
+            response = await api_client.room.list_rooms(ListRoomsRequest())
+            
+            return [
+                {
+                    "name": room.name,
+                    "num_participants": room.num_participants,
+                    "max_participants": room.max_participants,
+                    "creation_time": room.creation_time,
+                    "metadata": room.metadata
+                }
+                for room in response.rooms
+            ]
+        finally:
+            if api_client:
+                try:
+                    if hasattr(api_client, '_session') and api_client._session:
+                        await api_client._session.close()
+                    elif hasattr(api_client, 'aclose'):
+                        await api_client.aclose()
+                except Exception as cleanup_error:
+                    logger.debug(f"Error during cleanup: {cleanup_error}")
+                    pass
+
+    @traced('livekit.list_participants')
+    async def list_participants_async(self, room_name):
+        """
+        List the people currently in a room as plain dicts (the transcription bot is
+        left out). Errors propagate so callers can tell a failed listing from an empty room.
+        """
+        api_client = None
+        try:
+            api_client = await self._get_api_client()
+            
+            from livekit.api import ListParticipantsRequest
+            
+            response = await api_client.room.list_participants(ListParticipantsRequest(room=room_name))
+            
+            return [
+                {
+                    "identity": p.identity,
+                    "name": p.name or p.identity,
+                    "joined_at": p.joined_at
+                }
+                for p in response.participants
+                if not is_transcriber_identity(p.identity)
+            ]
+        finally:
+            if api_client:
+                try:
+                    if hasattr(api_client, '_session') and api_client._session:
+                        await api_client._session.close()
+                    elif hasattr(api_client, 'aclose'):
+                        await api_client.aclose()
+                except Exception as cleanup_error:
+                    logger.debug(f"Error during cleanup: {cleanup_error}")
+                    pass
+
+    @traced('livekit.delete_room')
     async def delete_room_async(self, name):
         """
         Delete a room using LiveKit's official API.
@@ -234,17 +329,42 @@ class SimpleLiveKitService:
 
 @lru_cache(maxsize=1)
 def get_room_service():
-    """Return a real LiveKit service or dummy fallback."""
+    """Return a real LiveKit service (sharded when LIVEKIT_HOSTS lists several hosts) or dummy fallback."""
     cfg = _load_config()
     if not all(cfg.values()):
         return DummyRoomService()
 
     host, key, secret = cfg['LIVEKIT_HOST'], cfg['LIVEKIT_API_KEY'], cfg['LIVEKIT_API_SECRET']
+
+    from .sharding import ShardedRoomService, parse_hosts
+    hosts = parse_hosts(os.getenv(_HOSTS_ENV_KEY))
+    if len(hosts) > 1:
+        return ShardedRoomService(
+            hosts, key, secret,
+            strategy=os.getenv('LIVEKIT_PLACEMENT', 'hash'),
+            load_ttl=float(os.getenv('LIVEKIT_LOAD_TTL', '5')),
+            pending_ttl=float(os.getenv('LIVEKIT_PENDING_TTL', '300'))
+        )
     return SimpleLiveKitService(host, key, secret)
 
+async def get_room_host_async(room_name: str) -> str:
+    """
+    LiveKit URL to connect to for a room. When sharded, an existing room keeps the host
+    it lives on (looked up across hosts if this process has not seen it); a new one is
+    pinned to the host it will be placed on.
+    """
+    service = get_room_service()
+    if hasattr(service, 'assign_async'):
+        return await service.assign_async(room_name)
+    return getattr(service, 'host', None) or _load_config()['LIVEKIT_HOST']
+
+def get_room_host(room_name: str) -> str:
+    return asyncio.run(get_room_host_async(room_name))
+
 # Expose singleton room_service
 room_service = get_room_service()
 
+@traced('token.mint')
 def generate_token(identity: str, room: str, name: str = None) -> str:
     """
     Generate a JWT token for a participant to join a specific LiveKit room.
@@ -269,6 +389,46 @@ def generate_token(identity: str, room: str, name: str = None) -> str:
         logger.error(f"Failed to generate token: {e}")
         return "dummy_token_fallback"
 
+@traced('token.mint_transcriber')
+def generate_transcriber_token(room: str) -> str:
+    """
+    Token for the transcription bot: a hidden, subscribe-only agent. LiveKit does not
+    count agents against max_participants, and other participants never see it.
+    """
+    cfg = _load_config()
+    grants = api.VideoGrants(
+        room_join=True,
+        room=room,
+        hidden=True,
+        agent=True,
+        can_publish=False,
+        can_publish_data=False,
+        can_subscribe=True
+    )
+    return (
+        api.AccessToken(api_key=cfg['LIVEKIT_API_KEY'], api_secret=cfg['LIVEKIT_API_SECRET'])
+        .with_identity(f'{TRANSCRIBER_IDENTITY_PREFIX}{room}')
+        .with_name('Transcriber')
+        .with_kind('agent')
+        .with_grants(grants)
+        .to_jwt()
+    )
+
+def receive_webhook(body: str, auth_header: str):
+    """
+    Verify and decode a LiveKit webhook request.
+    Raises ValueError when LiveKit is not configured or the signature is invalid.
+    """
+    cfg = _load_config()
+    if not all(cfg.values()):
+        raise ValueError("Cannot verify webhooks without LiveKit config")
+
+    receiver = api.WebhookReceiver(api.TokenVerifier(cfg['LIVEKIT_API_KEY'], cfg['LIVEKIT_API_SECRET']))
+    try:
+        return receiver.receive(body, auth_header)
+    except Exception as e:
+        raise ValueError(f"Invalid webhook: {e}") from e
+
 def create_room(name: str, max_participants: int = None, empty_timeout: int = None, metadata: str = None):
     """
     Create a room synchronously (convenience function).
@@ -306,85 +466,58 @@ async def create_room_async(name: str, max_participants: int = None, empty_timeo
         effective_max_participants = max_participants if max_participants is not None else 2
         logger.info(f"Attempting to create room '{name}' with max_participants: {effective_max_participants}")
         
-        api_client = None
-        try:
-            api_client = await self._get_api_client()
-            
-            # Import CreateRoomRequest
-            from livekit.api import CreateRoomRequest
-            
-            # Create room request with parameters
-            request = CreateRoomRequest(
-                name=name,
-                empty_timeout=empty_timeout or 300,  # Default 5 minutes
-                max_participants=effective_max_participants,  # Use the effective_max_participants
-                metadata=metadata
-            )
-            
-            # Create the room using the official method
-            response = await api_client.room.create_room(request)
-            
-            # Return room details
-            return {
-                "name": response.name,
-                "status": "created",
-                "details": {
-                    "max_participants": response.max_participants,
-                    "empty_timeout": response.empty_timeout,
-                    "metadata": response.metadata
-                }
-            }
-            
-        except Exception as e:
-            logger.error(f"Failed to create room '{name}': {e}")
-            return {
-                "name": name,
-                "status": "error",
-                "error": str(e)
-            }
-        finally:
-            # Proper cleanup
-            if api_client:
-                try:
-                    if hasattr(api_client, '_session') and api_client._session:
-                        await api_client._session.close()
-                    elif hasattr(api_client, 'aclose'):
-                        await api_client.aclose()
-                except Exception as cleanup_error:
-                    logger.debug(f"Error during cleanup: {cleanup_error}")
-                    pass
+        # The service routes creation to the owning host when sharded
+        return await service.create_room_async(
+            name,
+            max_participants=effective_max_participants,
+            empty_timeout=empty_timeout,
+            metadata=metadata
+        )
     else:
         # Fallback for dummy service
         return service.create_room(name, max_participants=max_participants,
                                  empty_timeout=empty_timeout, metadata=metadata)
 
-def start_session(identity: str, display_name: str = None, max_participants: int = 2) -> dict:
+@traced('livekit.start_session')
+async def start_session(identity: str, room_name: str = None, display_name: str = None, max_participants: int = 2) -> dict:
     """
-    Start a new session by creating a room and generating a token.
+    Start a session: create the room if this caller wins the claim on its name,
+    otherwise join the room that already exists.
     
     Args:
         identity: The unique identifier for the participant
+        room_name: Room to start; a fresh unique name is allocated when omitted
         display_name: Optional display name for the participant
         max_participants: Maximum number of participants allowed (default: 2)
     
     Returns:
-        dict: Contains room_name and token for joining
+        dict: Contains room_name, token and whether the room was created by this call
     """
-    # Generate a random room name
-    room_name = generate_random_room_name()
+    if not room_name:
+        room_name = room_names.allocate()
+
+    if not room_names.claim(room_name):
+        logger.info(f"Room '{room_name}' is already live; joining instead of creating")
+        return {**join_session(room_name, identity, display_name), "created": False,
+                "livekit_url": await get_room_host_async(room_name)}
     
     logger.info(f"Starting session for identity: {identity}, room: {room_name}, requesting max_participants: {max_participants}")
 
     # Create the room with max participants limit
-    room_result = create_room(
-        room_name,
-        max_participants=max_participants,
-        empty_timeout=300  # 5 minutes timeout
-    )
+    try:
+        room_result = await create_room_async(
+            room_name,
+            max_participants=max_participants,
+            empty_timeout=300  # 5 minutes timeout
+        )
+    except Exception:
+        room_names.release(room_name)
+        raise
     
     if room_result.get("status") == "error":
         logger.error(f"Failed to create room: {room_result.get('error')}")
-        return {"error": "Failed to create room"}
+        room_names.release(room_name)
+        return {"error": "Failed to create room", "status": "error"}
     
     # Generate token for the creator with participant limit
     grants = api.VideoGrants(
@@ -407,9 +540,12 @@ def start_session(identity: str, display_name: str = None, max_participants: int
         "room_name": room_name,
         "token": token,
         "status": "success",
-        "max_participants": max_participants
+        "created": True,
+        "max_participants": max_participants,
+        "livekit_url": room_result.get("host") or await get_room_host_async(room_name)
     }
 
+@traced('livekit.check_capacity')
 async def check_room_capacity(room_name: str) -> dict:
     """
     Check if a room has reached its maximum capacity.
@@ -418,6 +554,9 @@ async def check_room_capacity(room_name: str) -> dict:
     if isinstance(service, DummyRoomService):
         logger.info("Using DummyRoomService for capacity check. Always allows join.")
         return {"can_join": True, "current_participants": 0, "max_participants": 2}
+    if hasattr(service, 'service_for_async'):
+        # Ask only the host that owns the room
+        service = await service.service_for_async(room_name)
 
     try:
         api_client = await service._get_api_client()
@@ -444,6 +583,12 @@ async def check_room_capacity(room_name: str) -> dict:
 
         # Access current participants and max participants directly from the Room object
         current_participants = room.num_participants if hasattr(room, 'num_participants') else 0
+        if current_participants:
+            # Count people only; a transcription bot in the room does not take a seat
+            try:
+                current_participants = len(await service.list_participants_async(room_name))
+            except Exception as count_e:
+                logger.warning(f"Could not list participants for room '{room_name}', using room count: {count_e}")
         
         # Initialize max_participants_from_room with the value from LiveKit's direct attribute, defaulting to 2 (our app's default)
         max_participants_from_room = room.max_participants if hasattr(room, 'max_participants') else 2
@@ -484,6 +629,7 @@ async def check_room_capacity(room_name: str) -> dict:
             "max_participants": 0
         }
 
+@traced('token.join_session')
 def join_session(room_name: str, identity: str, display_name: str = None) -> dict:
     """
     Join an existing session by generating a token for the room.
@@ -0,0 +1,372 @@
+"""
+Room placement across several LiveKit hosts.
+
+ShardedRoomService exposes the same interface as SimpleLiveKitService but owns one
+SimpleLiveKitService per host. New rooms are placed either on a weighted consistent-hash
+ring (stable placement, minimal movement when hosts change) or on the host with the
+fewest participants per unit of weight. Every per-room call is routed to the host
+that owns the room.
+
+Placements are only recorded for rooms that exist on a host or that were handed to a
+client or created moments ago; a pending placement that never shows up in a host
+listing is forgotten after pending_ttl seconds.
+"""
+import asyncio
+import bisect
+import hashlib
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+from .server_sdk import SimpleLiveKitService
+
+logger = logging.getLogger(__name__)
+
+PLACEMENT_HASH = 'hash'
+PLACEMENT_LEAST_LOADED = 'least_loaded'
+
+
+def parse_hosts(value: str) -> Dict[str, int]:
+    """Parse 'wss://a:7880=3,wss://b:7880' into {host: weight}; weight defaults to 1."""
+    hosts = {}
+    for item in (value or '').split(','):
+        item = item.strip()
+        if not item:
+            continue
+        host, _, weight = item.rpartition('=') if '=' in item else (item, '', '1')
+        hosts[host.strip()] = max(1, int(weight))
+    return hosts
+
+
+class HostListingError(RuntimeError):
+    """One or more hosts could not be listed, so a room listing would be incomplete."""
+
+    def __init__(self, hosts: List[str]):
+        super().__init__(f"Could not list rooms on {', '.join(hosts)}")
+        self.hosts = hosts
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.md5(key.encode('utf-8')).digest()[:8], 'big')
+
+
+class HashRing:
+    """Consistent-hash ring with ``replicas * weight`` virtual nodes per host."""
+
+    def __init__(self, weights: Dict[str, int], replicas: int = 64):
+        self.replicas = replicas
+        self._keys: List[int] = []
+        self._hosts: List[str] = []
+        self.rebuild(weights)
+
+    def rebuild(self, weights: Dict[str, int]):
+        points = sorted(
+            (_hash(f"{host}#{i}"), host)
+            for host, weight in weights.items()
+            for i in range(self.replicas * weight)
+        )
+        self._keys = [p[0] for p in points]
+        self._hosts = [p[1] for p in points]
+
+    def get(self, key: str) -> Optional[str]:
+        if not self._keys:
+            return None
+        i = bisect.bisect(self._keys, _hash(key)) % len(self._keys)
+        return self._hosts[i]
+
+
+class ShardedRoomService:
+    """Routes room operations to the owning host among several LiveKit servers."""
+
+    def __init__(self, hosts: Dict[str, int], api_key: str, api_secret: str,
+                 strategy: str = PLACEMENT_HASH, load_ttl: float = 5.0, pending_ttl: float = 300.0):
+        if not hosts:
+            raise ValueError("ShardedRoomService needs at least one host")
+        if strategy not in (PLACEMENT_HASH, PLACEMENT_LEAST_LOADED):
+            raise ValueError(f"Unknown placement strategy: {strategy}")
+
+        self.weights = dict(hosts)
+        self.strategy = strategy
+        self.load_ttl = load_ttl
+        self.pending_ttl = pending_ttl
+        self.services = {host: SimpleLiveKitService(host, api_key, api_secret) for host in hosts}
+
+        self._lock = threading.Lock()
+        self._draining = set()
+        self._ring = HashRing(self.weights)
+        self._placements: Dict[str, str] = {}
+        self._room_participants: Dict[str, int] = {}  # rooms seen in a host listing
+        self._pending: Dict[str, float] = {}  # placed but not listed yet -> monotonic time placed
+        self._loaded_at = 0.0
+        logger.info(f"Initialized ShardedRoomService over {len(hosts)} hosts ({strategy} placement)")
+
+    # Placement
+
+    def _active_weights(self) -> Dict[str, int]:
+        return {h: w for h, w in self.weights.items() if h not in self._draining}
+
+    def _host_loads(self) -> Dict[str, int]:
+        loads = dict.fromkeys(self.weights, 0)
+        for room, count in self._room_participants.items():
+            host = self._placements.get(room)
+            if host in loads:
+                loads[host] += count
+        return loads
+
+    def _place(self, room_name: str) -> str:
+        if self.strategy == PLACEMENT_LEAST_LOADED:
+            active = self._active_weights() or self.weights
+            loads = self._host_loads()
+            return min(active, key=lambda h: (loads[h] / active[h], h))
+        return self._ring.get(room_name) or next(iter(self.weights))
+
+    def host_for(self, room_name: str) -> str:
+        """Owning host of a room, or the host it would be placed on. Records nothing."""
+        with self._lock:
+            return self._placements.get(room_name) or self._place(room_name)
+
+    def assign(self, room_name: str) -> str:
+        """
+        Owning host of a room, placing it if it has not been seen before. Use this when a
+        client is about to join or the room is about to be created, so later calls agree
+        on the host until the room shows up in a listing.
+        """
+        with self._lock:
+            host = self._placements.get(room_name)
+            if host is None:
+                host = self._placements[room_name] = self._place(room_name)
+                self._pending[room_name] = time.monotonic()
+            return host
+
+    def service_for(self, room_name: str) -> SimpleLiveKitService:
+        return self.services[self.host_for(room_name)]
+
+    async def locate_async(self, room_name: str) -> Optional[str]:
+        """
+        Host a room currently lives on, or None if no host lists it. Placements are per
+        process, so a room this process has not seen in a listing (created by another
+        worker, or before a restart) triggers a fresh listing of every host first.
+        """
+        with self._lock:
+            if room_name in self._room_participants:
+                return self._placements[room_name]
+        failed = await self.refresh_load_async(force=True)
+        with self._lock:
+            if room_name in self._room_participants:
+                return self._placements[room_name]
+        if failed:
+            raise HostListingError(failed)
+        return None
+
+    async def _locate_or_guess(self, room_name: str) -> Optional[str]:
+        try:
+            return await self.locate_async(room_name)
+        except HostListingError as e:
+            # The room may live on an unreachable host; fall back to the local placement
+            logger.warning(f"Placing room '{room_name}' without a full listing: {e}")
+            return None
+
+    async def assign_async(self, room_name: str) -> str:
+        """assign(), but a room that already lives on some host keeps that host."""
+        return await self._locate_or_guess(room_name) or self.assign(room_name)
+
+    async def service_for_async(self, room_name: str) -> SimpleLiveKitService:
+        return self.services[await self._locate_or_guess(room_name) or self.host_for(room_name)]
+
+    # Load tracking
+
+    async def refresh_load_async(self, force: bool = False) -> List[str]:
+        """
+        Refresh placements and participant counts from every host (cached for load_ttl).
+        Hosts that could not be listed keep their previous state and are returned.
+        """
+        if not force and time.monotonic() - self._loaded_at < self.load_ttl:
+            return []
+        hosts = list(self.services)
+        failed = []
+        results = await asyncio.gather(
+            *(self.services[h].list_room_details_async() for h in hosts), return_exceptions=True
+        )
+        with self._lock:
+            for host, rooms in zip(hosts, results):
+                if isinstance(rooms, Exception):
+                    logger.error(f"Failed to refresh rooms on {host}: {rooms}")
+                    failed.append(host)
+                    continue
+                listed = {room['name']: room['num_participants'] for room in rooms}
+                # Forget rooms that were live on this host and have since closed
+                for room in [r for r, h in self._placements.items()
+                             if h == host and r in self._room_participants and r not in listed]:
+                    del self._placements[room]
+                    del self._room_participants[room]
+                for room, count in listed.items():
+                    self._placements[room] = host
+                    self._room_participants[room] = count
+                    self._pending.pop(room, None)
+            # Forget placements handed out for rooms that never came into existence
+            expired = time.monotonic() - self.pending_ttl
+            for room in [r for r, placed in self._pending.items() if placed < expired]:
+                del self._pending[room]
+                if room not in self._room_participants:
+                    self._placements.pop(room, None)
+            self._loaded_at = time.monotonic()
+        return failed
+
+    def stats(self) -> dict:
+        with self._lock:
+            loads = self._host_loads()
+            return {
+                host: {
+                    'weight': weight,
+                    'draining': host in self._draining,
+                    'rooms': sum(1 for r, h in self._placements.items() if h == host and r in self._room_participants),
+                    'pending': sum(1 for r in self._pending if self._placements.get(r) == host),
+                    'participants': loads[host],
+                }
+                for host, weight in self.weights.items()
+            }
+
+    # Draining
+
+    def drain(self, host: str) -> List[str]:
+        """Stop placing new rooms on ``host`` and move its empty rooms elsewhere."""
+        if host not in self.weights:
+            raise KeyError(host)
+        with self._lock:
+            self._draining.add(host)
+            self._ring.rebuild(self._active_weights())
+        return asyncio.run(self.rebalance_async())
+
+    def undrain(self, host: str):
+        if host not in self.weights:
+            raise KeyError(host)
+        with self._lock:
+            self._draining.discard(host)
+            self._ring.rebuild(self._active_weights())
+
+    async def _move_room(self, room: dict, source: str) -> bool:
+        name = room['name']
+        with self._lock:
+            target = self._place(name)
+        if target == source:
+            return False
+        deleted = await self.services[source].delete_room_async(name)
+        if deleted.get('status') == 'error':
+            logger.error(f"Could not move room '{name}' off {source}: {deleted.get('error')}")
+            return False
+        created = await self.services[target].create_room_async(
+            name, max_participants=room.get('max_participants') or None, metadata=room.get('metadata') or None
+        )
+        with self._lock:
+            if created.get('status') == 'error':
+                # The room is gone from the source; let the next client recreate it wherever it is placed
+                logger.error(f"Deleted room '{name}' on {source} but could not recreate it on {target}: "
+                             f"{created.get('error')}")
+                self._placements.pop(name, None)
+                self._room_participants.pop(name, None)
+                return False
+            self._placements[name] = target
+            self._room_participants[name] = 0
+            self._pending.pop(name, None)
+        return True
+
+    async def rebalance_async(self) -> List[str]:
+        """
+        Move the empty rooms of draining hosts to other hosts by deleting each one and
+        creating it again where it is now placed. Rooms with people in them stay put
+        until they empty out. Returns the rooms that were moved.
+        """
+        with self._lock:
+            draining = [h for h in self.weights if h in self._draining]
+        moved = []
+        for host in draining:
+            try:
+                rooms = await self.services[host].list_room_details_async()
+            except Exception as e:
+                logger.error(f"Failed to list rooms on draining host {host}: {e}")
+                continue
+            empty = [room for room in rooms if not room['num_participants']]
+            results = await asyncio.gather(*(self._move_room(room, host) for room in empty))
+            moved.extend(room['name'] for room, ok in zip(empty, results) if ok)
+        if moved:
+            logger.info(f"Rebalanced {len(moved)} rooms off draining hosts")
+        return moved
+
+    # SimpleLiveKitService interface
+
+    def list_rooms(self):
+        try:
+            return asyncio.run(self.list_rooms_async())
+        except Exception as e:
+            logger.error(f"Failed to list rooms: {e}")
+            return []
+
+    async def list_rooms_async(self):
+        failed = await self.refresh_load_async(force=True)
+        if failed:
+            raise HostListingError(failed)
+        with self._lock:
+            return list(self._room_participants)
+
+    async def list_room_details_async(self):
+        """
+        Rooms on every host with their participant counts. Raises HostListingError if any
+        host could not be listed, rather than returning stale counts for its rooms.
+        """
+        failed = await self.refresh_load_async(force=True)
+        if failed:
+            raise HostListingError(failed)
+        with self._lock:
+            return [
+                {'name': room, 'num_participants': n, 'host': self._placements.get(room)}
+                for room, n in self._room_participants.items()
+            ]
+
+    def create_room(self, name, **kwargs):
+        return self.service_for(name).create_room(name, **kwargs)
+
+    async def create_room_async(self, name, max_participants=None, empty_timeout=None, metadata=None):
+        if self.strategy == PLACEMENT_LEAST_LOADED:
+            await self.refresh_load_async()
+        host = await self.assign_async(name)
+        result = await self.services[host].create_room_async(
+            name, max_participants=max_participants, empty_timeout=empty_timeout, metadata=metadata
+        )
+        with self._lock:
+            if result.get('status') == 'error':
+                if name not in self._room_participants:
+                    self._placements.pop(name, None)
+            else:
+                self._room_participants.setdefault(name, 0)
+            self._pending.pop(name, None)
+        result['host'] = host
+        return result
+
+    async def list_participants_async(self, room_name):
+        return await (await self.service_for_async(room_name)).list_participants_async(room_name)
+
+    async def delete_room_async(self, name):
+        try:
+            host = await self.locate_async(name)
+        except HostListingError as e:
+            return {"name": name, "status": "error", "error": str(e)}
+        if host is None:
+            # Deleting on a guessed host would report not_found there as success
+            with self._lock:
+                self._placements.pop(name, None)
+                self._pending.pop(name, None)
+            return {"name": name, "status": "error", "error": "not_found: no host lists this room"}
+        result = await self.services[host].delete_room_async(name)
+        with self._lock:
+            self._placements.pop(name, None)
+            self._room_participants.pop(name, None)
+            self._pending.pop(name, None)
+        return result
+
+    def delete_room(self, name):
+        try:
+            return asyncio.run(self.delete_room_async(name))
+        except Exception as e:
+            logger.error(f"Failed to delete room: {e}")
+            return {"name": name, "status": "error", "error": str(e)}
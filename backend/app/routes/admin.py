@@ -0,0 +1,107 @@
+from flask import Blueprint, Response, jsonify, request
+from .auth import require_admin
+from ..services.profiler import profiler, ProfilerBusy
+from ..services.tracing import tracer
+from ..services.drain import drain_controller
+from ..services.reaper import get_reaper
+
+admin_bp = Blueprint('admin', __name__, url_prefix='/api/admin')
+
+# Upper bound on a single profiling run so a request worker is not tied up indefinitely
+MAX_PROFILE_SECONDS = 60
+
+@admin_bp.route('/profile', methods=['POST'])
+@require_admin
+def run_profile():
+    """
+    Sample all threads for N seconds and return collapsed stacks for flame graphs.
+    Query params: seconds (default 5), interval_ms (default 10), idle (include waiting threads),
+    format=json to get sample counts alongside the stacks.
+    """
+    seconds = min(request.args.get('seconds', 5, type=float), MAX_PROFILE_SECONDS)
+    interval = max(request.args.get('interval_ms', 10, type=float), 1) / 1000
+    include_idle = request.args.get('idle', 'false').lower() in ('1', 'true', 'yes')
+
+    try:
+        result = profiler.profile(seconds, interval, include_idle)
+    except ProfilerBusy as e:
+        return jsonify({'error': str(e), 'status': 'error'}), 409
+
+    if request.args.get('format') == 'json':
+        return jsonify({**result, 'status': 'success'}), 200
+    return Response(result['collapsed'] + '\n', content_type='text/plain; charset=utf-8')
+
+@admin_bp.route('/tracing', methods=['GET'])
+@require_admin
+def get_tracing():
+    """
+    Span aggregates (count, avg/max latency, errors) and the most recent spans.
+    """
+    return jsonify({**tracer.snapshot(), 'status': 'success'}), 200
+
+@admin_bp.route('/tracing', methods=['POST'])
+@require_admin
+def set_tracing():
+    """
+    Enable or disable span tracing at runtime.
+    Expects JSON: { 'enabled': bool, 'reset': bool (optional) }
+    """
+    data = request.get_json() or {}
+    if 'enabled' in data:
+        tracer.enabled = bool(data['enabled'])
+    if data.get('reset'):
+        tracer.reset()
+    return jsonify({'enabled': tracer.enabled, 'status': 'success'}), 200
+
+@admin_bp.route('/drain', methods=['GET'])
+@require_admin
+def get_drain_status():
+    """
+    Drain state and stats (clients notified, reconnect burst, sessions handed off and checkpointed, drain time).
+    """
+    return jsonify({
+        'draining': drain_controller.draining,
+        'stats': drain_controller.stats,
+        'status': 'success'
+    }), 200
+
+@admin_bp.route('/drain', methods=['POST'])
+@require_admin
+def start_drain():
+    """
+    Put this node into drain mode; it exits once idle or when the timeout passes.
+    Expects JSON: { 'timeout': float seconds (optional) }
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        started = drain_controller.start(timeout=data.get('timeout'), reason='admin')
+    except ValueError as e:
+        return jsonify({'error': str(e), 'status': 'error'}), 400
+    if not started:
+        return jsonify({'error': 'Already draining', 'status': 'error'}), 409
+    return jsonify({
+        'message': 'Drain started',
+        'deadline': drain_controller.deadline,
+        'status': 'success'
+    }), 202
+
+@admin_bp.route('/reaper', methods=['GET'])
+@require_admin
+def get_reaper_stats():
+    """
+    Reaper metrics: rooms deleted, sessions torn down and stored rows closed (totals and
+    last pass), plus the cost of the last pass (listing latency, wall and CPU time).
+    """
+    return jsonify({**get_reaper().stats(), 'status': 'success'}), 200
+
+@admin_bp.route('/reaper', methods=['POST'])
+@require_admin
+def run_reaper():
+    """
+    Run one reconciliation pass now and return its summary.
+    """
+    try:
+        result = get_reaper().run_once()
+    except Exception as e:
+        return jsonify({'error': str(e), 'status': 'error'}), 500
+    return jsonify({'pass': result, 'status': 'success'}), 200
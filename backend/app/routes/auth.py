@@ -0,0 +1,20 @@
+from flask import current_app, jsonify, request
+from functools import wraps
+import hmac
+
+def require_admin(f):
+    """
+    Restrict a view to callers presenting 'Authorization: Bearer <ADMIN_TOKEN>'.
+    Admin endpoints are disabled entirely while ADMIN_TOKEN is unset.
+    """
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        expected = current_app.config.get('ADMIN_TOKEN')
+        if not expected:
+            return jsonify({'error': 'Admin endpoints are disabled', 'status': 'error'}), 403
+
+        provided = request.headers.get('Authorization', '')
+        if not provided.startswith('Bearer ') or not hmac.compare_digest(provided[7:], expected):
+            return jsonify({'error': 'Unauthorized', 'status': 'error'}), 401
+        return f(*args, **kwargs)
+    return wrapper
@@ -1,10 +1,72 @@
 from flask import Blueprint, jsonify, request
+from flask_socketio import emit, join_room, leave_room
 import asyncio
-from ..livekit.server_sdk import room_service, generate_token, create_room, create_room_async, generate_random_room_name, check_room_capacity, start_session
+from functools import wraps
+import math
+import time
+from ..livekit.server_sdk import room_service, generate_token, create_room, create_room_async, generate_random_room_name, check_room_capacity, start_session, receive_webhook, get_room_host, is_transcriber_identity
+from ..services.rate_limiter import client_limiter, ip_limiter, upstream_limiter, UpstreamOverloaded
+from ..services.roster import roster
+from ..services.room_names import room_names
+from ..services.store import get_store
+from ..services.health import get_health_prober
+from ..services.drain import drain_controller
+from .transcription import socketio
+from .auth import require_admin
 
 livekit_bp = Blueprint('livekit', __name__, url_prefix='/api/livekit')
 
+def _retry_response(message, status_code, retry_after):
+    response = jsonify({'error': message, 'status': 'error', 'retry_after': retry_after})
+    response.headers['Retry-After'] = str(retry_after)
+    return response, status_code
+
+def rate_limited(f):
+    """
+    Apply the per-IP and per-client token buckets before running the view.
+    Clients are keyed by identity (falling back to IP) and room. The IP is the peer
+    address; X-Forwarded-For is only honoured through ProxyFix (TRUSTED_PROXY_HOPS).
+    """
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        data = request.get_json(silent=True) or {}
+        ip = request.remote_addr or 'unknown'
+        client = data.get('identity') or ip
+        room = data.get('room') or kwargs.get('room_id')
+
+        for limiter, key in ((ip_limiter, ip), (client_limiter, (request.endpoint, client, room))):
+            allowed, wait = limiter.acquire(key)
+            if not allowed:
+                return _retry_response('Too many requests', 429, max(1, math.ceil(wait)))
+        return f(*args, **kwargs)
+    return wrapper
+
+def reject_when_draining(f):
+    """
+    Refuse to create new rooms while this node is draining.
+    """
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        if drain_controller.draining:
+            return _retry_response('Server is draining, retry on another node', 503, drain_controller.retry_after())
+        return f(*args, **kwargs)
+    return wrapper
+
+def upstream_call(f):
+    """
+    Run the view while holding a global upstream LiveKit slot, shedding load with 503 when saturated.
+    """
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        try:
+            with upstream_limiter.slot():
+                return f(*args, **kwargs)
+        except UpstreamOverloaded as e:
+            return _retry_response('LiveKit is busy, please retry', 503, e.retry_after)
+    return wrapper
+
 @livekit_bp.route('/rooms', methods=['GET'])
+@upstream_call
 def list_rooms():
     """
     List all live rooms via LiveKit service.
@@ -16,6 +78,9 @@ def list_rooms():
         return jsonify({'error': str(e), 'status': 'error'}), 500
 
 @livekit_bp.route('/rooms', methods=['POST'])
+@reject_when_draining
+@rate_limited
+@upstream_call
 def create_room_endpoint():
     """
     Create a new LiveKit room.
@@ -50,6 +115,9 @@ def create_room_endpoint():
                 'status': 'error'
             }), 500
         
+        room_names.mark_live(room_name)
+        get_store().room_created(room_name, max_participants, empty_timeout, metadata)
+        
         return jsonify({
             'message': f'Room {room_name} created successfully',
             'room': result,
@@ -60,6 +128,8 @@ def create_room_endpoint():
         return jsonify({'error': str(e), 'status': 'error'}), 500
 
 @livekit_bp.route('/rooms/<room_id>', methods=['DELETE'])
+@rate_limited
+@upstream_call
 def delete_room_endpoint(room_id):
     """
     Delete a LiveKit room.
@@ -72,6 +142,8 @@ def delete_room_endpoint(room_id):
         if result.get('status') == 'error':
             error_str = str(result.get('error', '')).lower()
             if 'not_found' in error_str or 'room does not exist' in error_str:
+                room_names.mark_gone(room_id)
+                get_store().room_deleted(room_id)
                 return jsonify({
                     'message': f'Room {room_id} was already deleted or does not exist',
                     'status': 'success'
@@ -81,6 +153,9 @@ def delete_room_endpoint(room_id):
                 'status': 'error'
             }), 500
         
+        room_names.mark_gone(room_id)
+        get_store().room_deleted(room_id)
+        
         return jsonify({
             'message': f'Room {room_id} deleted successfully',
             'status': 'success'
@@ -97,6 +172,7 @@ def delete_room_endpoint(room_id):
         return jsonify({'error': str(e), 'status': 'error'}), 500
 
 @livekit_bp.route('/token', methods=['POST'])
+@rate_limited
 def get_token():
     """
     Generate an access token for joining a LiveKit room.
@@ -127,11 +203,13 @@ def get_token():
                 }), 500
 
             print(f"Token generated successfully for room: {room}")
+            get_store().token_issued(identity, room)
             return jsonify({
                 'token': token, 
                 'identity': identity,
                 'room': room,
                 'name': name,
+                'livekit_url': get_room_host(room),
                 'status': 'success'
             }), 200
         except Exception as e:
@@ -150,32 +228,30 @@ def get_token():
 @livekit_bp.route('/health', methods=['GET'])
 def health_check():
     """
-    Health check endpoint to verify LiveKit service status.
+    LiveKit health from the background prober's last results; never calls LiveKit itself.
     """
-    try:
-        # Test basic functionality
-        rooms = room_service.list_rooms()
-        
-        # Check if we're using dummy or real service
-        service_type = "dummy" if hasattr(room_service, '__class__') and "Dummy" in room_service.__class__.__name__ else "live"
-        
-        return jsonify({
-            'status': 'healthy',
-            'service_type': service_type,
-            'rooms_count': len(rooms) if rooms else 0,
-            'timestamp': int(__import__('time').time())
-        }), 200
-    except Exception as e:
-        return jsonify({
-            'status': 'unhealthy',
-            'error': str(e),
-            'timestamp': int(__import__('time').time())
-        }), 500
+    state = get_health_prober().state()
+    livekit = state['livekit']
+    healthy = bool(livekit) and all(h['ok'] for h in livekit.values())
+
+    # Check if we're using dummy or real service
+    service_type = "dummy" if "Dummy" in room_service.__class__.__name__ else "live"
+
+    return jsonify({
+        'status': 'healthy' if healthy else 'unhealthy',
+        'service_type': service_type,
+        'rooms_count': state.get('rooms_count', 0),
+        'hosts': livekit,
+        'stt': state['stt'],
+        'checked_at': state['updated_at'],
+        'timestamp': int(time.time())
+    }), 200 if healthy else 503
 
 @livekit_bp.route('/generate-room-name', methods=['GET'])
+@rate_limited
 def get_generated_room_name():
     """
-    Generate a random room name.
+    Generate a random room name, reserved so no concurrent caller receives it too.
     """
     try:
         room_name = generate_random_room_name()
@@ -184,6 +260,8 @@ def get_generated_room_name():
         return jsonify({'error': str(e), 'status': 'error'}), 500
 
 @livekit_bp.route('/rooms/<room_id>/capacity', methods=['GET'])
+@rate_limited
+@upstream_call
 def get_room_capacity_endpoint(room_id):
     """
     Check if a room has reached its maximum capacity.
@@ -199,24 +277,27 @@ def get_room_capacity_endpoint(room_id):
         return jsonify({'error': str(e), 'status': 'error'}), 500
 
 @livekit_bp.route('/start-session', methods=['POST'])
+@reject_when_draining
+@rate_limited
+@upstream_call
 def start_session_endpoint():
     """
     Start a new session by creating a room and generating a token.
-    Expects JSON: { 'identity': str, 'room': str, 'display_name': str (optional) }
+    If the room is already live (e.g. a concurrent call created it first), a join token is returned instead.
+    Expects JSON: { 'identity': str, 'room': str (optional), 'display_name': str (optional) }
     """
     data = request.get_json() or {}
     identity = data.get('identity')
     room_name = data.get('room')
     display_name = data.get('display_name')
 
-    if not identity or not room_name:
-        return jsonify({'error': 'identity and room are required', 'status': 'error'}), 400
+    if not identity:
+        return jsonify({'error': 'identity is required', 'status': 'error'}), 400
 
     try:
-        # Assuming start_session internally handles room creation or joins if exists
         result = asyncio.run(start_session(
             identity=identity,
-            room=room_name,
+            room_name=room_name,
             display_name=display_name
         ))
 
@@ -226,6 +307,10 @@ def start_session_endpoint():
                 'status': 'error'
             }), 500
         
+        room_name = result['room_name']
+        if result.get('created'):
+            get_store().room_created(room_name, result.get('max_participants'))
+        
         return jsonify({
             'message': f'Session started/joined for room {room_name}',
             'session_info': result,
@@ -233,4 +318,138 @@ def start_session_endpoint():
         }), 200
 
     except Exception as e:
-        return jsonify({'error': str(e), 'status': 'error'}), 500
\ No newline at end of file
+        return jsonify({'error': str(e), 'status': 'error'}), 500
+
+@livekit_bp.route('/rooms/<room_id>/participants', methods=['GET'])
+@rate_limited
+def get_room_participants(room_id):
+    """
+    Return the cached participant roster for a room.
+    With ?since=<version>, only the join/leave deltas after that version are returned
+    (falls back to a full snapshot when the change log no longer covers it).
+    """
+    try:
+        since = request.args.get('since', type=int)
+        if since is not None:
+            changes = roster.changes_since(room_id, since)
+            if changes is not None:
+                return jsonify({
+                    'room': room_id,
+                    'version': changes[-1]['version'] if changes else since,
+                    'changes': changes,
+                    'status': 'success'
+                }), 200
+
+        if not roster.is_known(room_id):
+            # Seed the cache once from LiveKit (even when empty); webhooks keep it current afterwards
+            with upstream_limiter.slot():
+                participants = asyncio.run(room_service.list_participants_async(room_id))
+            roster.replace(room_id, participants)
+
+        return jsonify({**roster.snapshot(room_id), 'status': 'success'}), 200
+    except UpstreamOverloaded as e:
+        return _retry_response('LiveKit is busy, please retry', 503, e.retry_after)
+    except Exception as e:
+        error_str = str(e).lower()
+        if 'not_found' in error_str or 'room does not exist' in error_str:
+            return jsonify({'error': f'Room {room_id} does not exist', 'status': 'error'}), 404
+        return jsonify({'error': str(e), 'status': 'error'}), 500
+
+@livekit_bp.route('/webhook', methods=['POST'])
+def livekit_webhook():
+    """
+    Receive LiveKit webhook events and apply participant/room changes to the roster
+    and the live room name index.
+    """
+    try:
+        event = receive_webhook(request.get_data(as_text=True), request.headers.get('Authorization', ''))
+    except ValueError as e:
+        return jsonify({'error': str(e), 'status': 'error'}), 401
+
+    room_name = event.room.name
+    # The transcription bot is not part of the roster
+    is_bot = is_transcriber_identity(event.participant.identity)
+    if event.event == 'room_started':
+        room_names.mark_live(room_name)
+    elif event.event == 'participant_joined' and not is_bot:
+        roster.participant_joined(room_name, event.participant.identity,
+                                  event.participant.name, event.participant.joined_at)
+    elif event.event == 'participant_left' and not is_bot:
+        roster.participant_left(room_name, event.participant.identity)
+    elif event.event == 'room_finished':
+        room_names.mark_gone(room_name)
+        roster.room_finished(room_name)
+
+    return jsonify({'status': 'success'}), 200
+
+def _push_roster_delta(room_name, delta):
+    socketio.emit('roster_delta', {'room': room_name, **delta}, room=f'roster:{room_name}')
+
+roster.add_listener(_push_roster_delta)
+
+@socketio.on('subscribe_roster')
+def handle_subscribe_roster(data):
+    """
+    Subscribe to a room's roster feed. Clients pass the last version they saw as
+    'since' to receive only the missed deltas; otherwise they get a full snapshot.
+    """
+    room_name = data.get('room_name')
+    if not room_name:
+        return
+    join_room(f'roster:{room_name}')
+
+    since = data.get('since')
+    changes = roster.changes_since(room_name, since) if since is not None else None
+    if changes is None:
+        emit('roster_snapshot', roster.snapshot(room_name))
+    else:
+        for delta in changes:
+            emit('roster_delta', {'room': room_name, **delta})
+
+@socketio.on('unsubscribe_roster')
+def handle_unsubscribe_roster(data):
+    room_name = data.get('room_name')
+    if room_name:
+        leave_room(f'roster:{room_name}')
+
+@livekit_bp.route('/hosts', methods=['GET'])
+@require_admin
+def list_hosts():
+    """
+    Show room placement per LiveKit host (sharded deployments only).
+    """
+    if not hasattr(room_service, 'stats'):
+        return jsonify({'error': 'Room service is not sharded', 'status': 'error'}), 400
+    return jsonify({
+        'strategy': room_service.strategy,
+        'hosts': room_service.stats(),
+        'status': 'success'
+    }), 200
+
+@livekit_bp.route('/hosts/drain', methods=['POST'])
+@require_admin
+def drain_host():
+    """
+    Stop placing new rooms on a host and move its empty rooms elsewhere.
+    Expects JSON: { 'host': str, 'undrain': bool (optional) }
+    """
+    if not hasattr(room_service, 'drain'):
+        return jsonify({'error': 'Room service is not sharded', 'status': 'error'}), 400
+
+    data = request.get_json() or {}
+    host = data.get('host')
+    if not host:
+        return jsonify({'error': 'host is required', 'status': 'error'}), 400
+
+    try:
+        if data.get('undrain'):
+            room_service.undrain(host)
+            return jsonify({'message': f'Host {host} accepts new rooms again', 'status': 'success'}), 200
+        moved = room_service.drain(host)
+        return jsonify({
+            'message': f'Host {host} is draining',
+            'moved_rooms': moved,
+            'status': 'success'
+        }), 200
+    except KeyError:
+        return jsonify({'error': f'Unknown host {host}', 'status': 'error'}), 404
@@ -1,14 +1,126 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, jsonify, request
 from flask_socketio import SocketIO, emit, join_room
 from ..services.transcription_service import TranscriptionService
-from typing import Dict
+from ..services.transcript_codec import TranscriptEncoder, FRAME_VERSION
+from ..services.session_registry import session_registry
+from ..services.store import get_store
+from ..services.search_index import get_transcript_index
+from ..services.tracing import traced
+from ..services.drain import drain_controller, reconnect_delays
+from ..services.reaper import get_reaper
+from ..config import Config
+from ..services.transcript_export import FORMATS, render, gzip_stream, byte_range, stream_length, parse_range
+from collections import Counter
+from typing import Callable, Dict, Set
+import threading
+import time
 import traceback
 
 transcription_bp = Blueprint('transcription', __name__, url_prefix='/api/transcription')
 socketio = SocketIO()
 
-# Store active transcription sessions
-active_sessions: Dict[str, TranscriptionService] = {}
+# Connected Socket.IO clients, so a draining node can tell each one when to reconnect
+connected_clients: Set[str] = set()
+# Sockets on this node following each room's transcript; a draining node hands a
+# room's session off once none are left
+room_clients: Dict[str, Set[str]] = {}
+_room_clients_lock = threading.Lock()
+
+# Binary transcript mode: per-room frame encoders and the sockets that negotiated it.
+# An encoder lives as long as its room has binary clients, across transcription restarts,
+# so their sequence numbers, base timestamp and speaker table stay valid.
+room_encoders: Dict[str, TranscriptEncoder] = {}
+binary_clients: Dict[str, Set[str]] = {}
+_binary_lock = threading.Lock()
+
+def _binary_room(room_name: str) -> str:
+    return f'{room_name}:bin'
+
+def _format_message(encoder: TranscriptEncoder) -> dict:
+    return {
+        'encoding': 'binary',
+        'version': FRAME_VERSION,
+        'base_ts': encoder.base_ts,
+        'speakers': encoder.speakers
+    }
+
+def _get_encoder(room_name: str) -> TranscriptEncoder:
+    with _binary_lock:
+        encoder = room_encoders.get(room_name)
+        if encoder is not None:
+            return encoder
+        encoder = room_encoders[room_name] = TranscriptEncoder()
+        listening = bool(binary_clients.get(room_name))
+    if listening:
+        # Clients already in the room must reset their decoder state for the new stream
+        socketio.emit('transcription_format', _format_message(encoder), room=_binary_room(room_name))
+    return encoder
+
+def _remove_binary_client(sid: str):
+    """Forget a socket's binary subscriptions, dropping encoders nobody decodes anymore."""
+    with _binary_lock:
+        for room_name in [r for r, sids in binary_clients.items() if sid in sids]:
+            sids = binary_clients[room_name]
+            sids.discard(sid)
+            if not sids:
+                del binary_clients[room_name]
+                room_encoders.pop(room_name, None)
+
+@traced('transcript.emit')
+def emit_transcript(room_name: str, segment: dict):
+    """Send a transcript segment to JSON clients and, if any negotiated it, as binary frames."""
+    socketio.emit('transcription', {
+        'text': segment['text'],
+        'speaker': segment.get('speaker'),
+        'final': segment.get('final', True)
+    }, room=room_name)
+    if binary_clients.get(room_name):
+        encoder = _get_encoder(room_name)
+        for frame in encoder.encode(segment['text'], speaker=segment.get('speaker'),
+                                    final=segment.get('final', True), ts=segment.get('ts')):
+            socketio.emit('transcription_bin', frame, room=_binary_room(room_name))
+
+def persist_segment(room_name: str, segment: dict):
+    """Queue a final segment for storage; it is indexed for search once committed."""
+    text = segment['text']
+    index = get_transcript_index()
+    get_store().segment_added(
+        room_name, segment.get('speaker'), text, segment.get('ts') or time.time(),
+        on_stored=lambda segment_id: index.enqueue(segment_id, room_name, text)
+    )
+
+def start_room_transcription(room_name: str):
+    """
+    Start (or return the already running) transcription session for a room.
+    Returns (entry, created); entry is None when the service failed to start.
+    """
+    def on_transcript(segment: dict):
+        # Emit speaker-attributed transcription to connected clients
+        emit_transcript(room_name, segment)
+        if segment.get('final', True):
+            persist_segment(room_name, segment)
+
+    def create_service():
+        service = TranscriptionService()
+        if not service.start_transcription(room_name, on_transcript):
+            print('Failed to start transcription (service returned False)')
+            return None
+        return service
+
+    # Idempotent: a concurrent or repeated start returns the running session
+    entry, created = session_registry.start(room_name, create_service)
+    if created:
+        get_store().session_started(room_name, entry.worker, entry.started_at)
+    return entry, created
+
+def stop_room_transcription(room_name: str) -> bool:
+    """Stop a room's transcription session; returns False if it had none."""
+    # Remove and stop the session under the room's lock
+    entry = session_registry.stop(room_name, lambda e: e.service.stop_transcription())
+    if not entry:
+        return False
+    get_store().session_stopped(room_name)
+    return True
 
 @transcription_bp.route('/start', methods=['POST'])
 def start_transcription():
@@ -19,24 +131,20 @@ def start_transcription():
         if not room_name:
             return jsonify({'error': 'room_name is required'}), 400
 
-        # Create new transcription service
-        service = TranscriptionService()
-        
-        def on_transcript(text: str):
-            # Emit transcription to connected clients
-            socketio.emit('transcription', {'text': text}, room=room_name)
-        
-        # Start transcription
-        success = service.start_transcription(room_name, on_transcript)
-        
-        if not success:
-            print('Failed to start transcription (service returned False)')
+        if drain_controller.draining and room_name not in session_registry:
+            response = jsonify({'error': 'Server is draining, retry on another node'})
+            response.headers['Retry-After'] = str(drain_controller.retry_after())
+            return response, 503
+
+        entry, created = start_room_transcription(room_name)
+        if entry is None:
             return jsonify({'error': 'Failed to start transcription'}), 500
         
-        # Store the service
-        active_sessions[room_name] = service
-        
-        return jsonify({'status': 'success', 'message': 'Transcription started'})
+        return jsonify({
+            'status': 'success',
+            'message': 'Transcription started' if created else 'Transcription already running',
+            'session': entry.to_dict()
+        })
         
     except Exception as e:
         print('Exception in /start transcription:', e)
@@ -52,17 +160,9 @@ def stop_transcription():
         if not room_name:
             return jsonify({'error': 'room_name is required'}), 400
 
-        # Get the service
-        service = active_sessions.get(room_name)
-        if not service:
+        if not stop_room_transcription(room_name):
             return jsonify({'error': 'No active transcription session'}), 404
         
-        # Stop transcription
-        service.stop_transcription()
-        
-        # Remove from active sessions
-        del active_sessions[room_name]
-        
         return jsonify({'status': 'success', 'message': 'Transcription stopped'})
         
     except Exception as e:
@@ -70,17 +170,248 @@ def stop_transcription():
         traceback.print_exc()
         return jsonify({'error': str(e)}), 500
 
+@transcription_bp.route('/sessions', methods=['GET'])
+def list_transcription_sessions():
+    """
+    List active transcription sessions ordered by start time.
+    Optional query params: since / until (unix seconds), worker.
+    """
+    try:
+        worker = request.args.get('worker')
+        if worker:
+            entries = sorted(session_registry.by_worker(worker), key=lambda e: e.started_at)
+        else:
+            entries = session_registry.started_between(
+                request.args.get('since', type=float),
+                request.args.get('until', type=float)
+            )
+        return jsonify({
+            'status': 'success',
+            'count': len(entries),
+            'workers': session_registry.workers(),
+            'sessions': [e.to_dict() for e in entries]
+        })
+    except Exception as e:
+        print('Exception in /sessions:', e)
+        traceback.print_exc()
+        return jsonify({'error': str(e)}), 500
+
+@transcription_bp.route('/sessions/history', methods=['GET'])
+def transcription_session_history():
+    """
+    Past and present transcription sessions from the persistent store, newest first.
+    Optional query params: room, since (unix seconds), limit.
+    """
+    try:
+        sessions = get_store().session_history(
+            room_name=request.args.get('room'),
+            since=request.args.get('since', type=float),
+            limit=min(request.args.get('limit', 100, type=int), 1000)
+        )
+        return jsonify({'status': 'success', 'count': len(sessions), 'sessions': sessions})
+    except Exception as e:
+        print('Exception in /sessions/history:', e)
+        traceback.print_exc()
+        return jsonify({'error': str(e)}), 500
+
+@transcription_bp.route('/search', methods=['GET'])
+def search_transcripts():
+    """
+    Search final transcript segments across past and live sessions.
+    Query params: q (terms, "exact phrases", prefix*), room (optional scope), limit.
+    """
+    try:
+        query = (request.args.get('q') or '').strip()
+        if not query:
+            return jsonify({'error': 'q is required'}), 400
+
+        index = get_transcript_index()
+        started = time.perf_counter()
+        results = index.search(
+            query,
+            room_name=request.args.get('room'),
+            limit=min(request.args.get('limit', 20, type=int), 200)
+        )
+        return jsonify({
+            'status': 'success',
+            'query': query,
+            'complete': index.ready,
+            'took_ms': round((time.perf_counter() - started) * 1000, 3),
+            'count': len(results),
+            'results': results
+        })
+    except Exception as e:
+        print('Exception in /search:', e)
+        traceback.print_exc()
+        return jsonify({'error': str(e)}), 500
+
+@transcription_bp.route('/<room_name>/export', methods=['GET'])
+def export_transcript(room_name):
+    """
+    Stream a room's stored transcript as ?format=vtt|srt|ndjson (default vtt).
+    Supports Range/If-Range for resuming and gzip when the client accepts it.
+    """
+    try:
+        fmt = (request.args.get('format') or 'vtt').lower()
+        if fmt not in FORMATS:
+            return jsonify({'error': f"format must be one of {', '.join(FORMATS)}"}), 400
+
+        store = get_store()
+        stats = store.segment_stats(room_name)
+        if not stats['count']:
+            return jsonify({'error': 'No transcript stored for this room'}), 404
+
+        # Pin the export to the segments present now so resumed ranges stay consistent
+        last_id, origin = stats['last_id'], stats['first_ts']
+
+        def chunks():
+            return render(store.iter_segments(room_name, up_to_id=last_id), fmt, origin)
+
+        etag = f'"{room_name}-{last_id}-{fmt}"'
+        headers = {
+            'ETag': etag,
+            'Accept-Ranges': 'bytes',
+            'Content-Disposition': f'attachment; filename="{room_name}.{fmt}"',
+            'Vary': 'Accept-Encoding, Range',
+        }
+
+        range_header = request.headers.get('Range')
+        if_range = request.headers.get('If-Range')
+        if range_header and (not if_range or if_range == etag):
+            # Ranges refer to the uncompressed body; measuring it costs one extra pass
+            length = stream_length(chunks())
+            try:
+                byte_span = parse_range(range_header, length)
+            except ValueError:
+                return Response(status=416, headers={'Content-Range': f'bytes */{length}'})
+            if byte_span is not None:
+                start, end = byte_span
+                headers['Content-Range'] = f'bytes {start}-{end}/{length}'
+                headers['Content-Length'] = str(end - start + 1)
+                return Response(byte_range(chunks(), start, end), status=206,
+                                content_type=FORMATS[fmt], headers=headers)
+
+        body = chunks()
+        if 'gzip' in request.headers.get('Accept-Encoding', ''):
+            body = gzip_stream(body)
+            headers['Content-Encoding'] = 'gzip'
+            headers['ETag'] = f'"{room_name}-{last_id}-{fmt}-gz"'
+        return Response(body, content_type=FORMATS[fmt], headers=headers)
+    except Exception as e:
+        print('Exception in /export:', e)
+        traceback.print_exc()
+        return jsonify({'error': str(e)}), 500
+
 @socketio.on('connect')
 def handle_connect():
+    if drain_controller.draining:
+        # Refuse new sockets so clients land on a node that is staying up
+        return False
+    connected_clients.add(request.sid)
     print('Client connected')
 
 @socketio.on('disconnect')
 def handle_disconnect():
+    connected_clients.discard(request.sid)
+    _remove_binary_client(request.sid)
+    with _room_clients_lock:
+        for room_name in [r for r, sids in room_clients.items() if request.sid in sids]:
+            room_clients[room_name].discard(request.sid)
+            if not room_clients[room_name]:
+                del room_clients[room_name]
     print('Client disconnected')
 
 @socketio.on('join_room')
 def handle_join_room(data):
+    """
+    Join a room's transcript stream. Clients may pass 'encoding': 'binary' to receive
+    compact 'transcription_bin' frames instead of JSON 'transcription' events.
+    """
     room_name = data.get('room_name')
-    if room_name:
+    if not room_name:
+        return
+
+    with _room_clients_lock:
+        room_clients.setdefault(room_name, set()).add(request.sid)
+
+    if data.get('encoding') == 'binary':
+        encoder = _get_encoder(room_name)
+        with _binary_lock:
+            binary_clients.setdefault(room_name, set()).add(request.sid)
+        join_room(_binary_room(room_name))
+        emit('transcription_format', _format_message(encoder))
+    else:
         join_room(room_name)
-        print(f'Client joined room: {room_name}') 
\ No newline at end of file
+        emit('transcription_format', {'encoding': 'json'})
+    print(f'Client joined room: {room_name}') 
+
+def _checkpoint_session(room_name: str) -> bool:
+    if not session_registry.stop(room_name, lambda e: e.service.stop_transcription()):
+        return False
+    get_store().session_checkpointed(room_name)
+    return True
+
+def hand_off_sessions() -> int:
+    """Drain poll: checkpoint sessions whose clients have all moved to another node."""
+    with _room_clients_lock:
+        followed = set(room_clients)
+    count = sum(1 for room_name in session_registry.rooms()
+                if room_name not in followed and _checkpoint_session(room_name))
+    if count:
+        # Live nodes can only claim what has been committed
+        get_store().flush()
+    return count
+
+def checkpoint_sessions() -> int:
+    """Final drain step: checkpoint the sessions still running when the deadline passed."""
+    count = sum(1 for room_name in session_registry.rooms() if _checkpoint_session(room_name))
+    get_store().flush()
+    return count
+
+def notify_clients_draining() -> int:
+    """Drain step: give each connected client its own jittered reconnect delay."""
+    sids = list(connected_clients)
+    delays = reconnect_delays(len(sids), Config.DRAIN_RECONNECT_WINDOW)
+    for sid, delay in zip(sids, delays):
+        socketio.emit('server_draining', {'reconnect_after_ms': delay}, to=sid)
+    per_second = Counter(delay // 1000 for delay in delays)
+    drain_controller.stats['reconnect_peak_per_second'] = max(per_second.values(), default=0)
+    return len(sids)
+
+def resume_checkpointed_sessions() -> int:
+    """Pick up sessions a draining node handed off recently."""
+    count = 0
+    for room_name in get_store().claim_checkpointed_sessions(Config.DRAIN_RESUME_MAX_AGE):
+        try:
+            entry, _ = start_room_transcription(room_name)
+            if entry is not None:
+                count += 1
+        except Exception as e:
+            print(f'Failed to resume transcription for room {room_name}: {e}')
+    if count:
+        print(f'Resumed {count} checkpointed transcription sessions')
+    return count
+
+def poll_checkpointed_sessions(enabled: Callable[[], bool] = lambda: True):
+    """
+    Keep resuming handed-off sessions every DRAIN_RESUME_INTERVAL seconds, for as long
+    as this node is not draining itself. Stops for good once ``enabled()`` is False.
+    """
+    while True:
+        time.sleep(Config.DRAIN_RESUME_INTERVAL)
+        if not enabled():
+            return
+        if drain_controller.draining:
+            continue
+        try:
+            resume_checkpointed_sessions()
+        except Exception as e:
+            print(f'Failed to poll checkpointed sessions: {e}')
+
+drain_controller.add_step('clients_notified', notify_clients_draining)
+drain_controller.add_poll('sessions_handed_off', hand_off_sessions)
+drain_controller.add_final_step('sessions_checkpointed', checkpoint_sessions)
+drain_controller.add_idle_check(lambda: len(session_registry) == 0 and not connected_clients)
+
+# Sessions whose room LiveKit no longer lists are torn down by the reaper
+get_reaper().track_sessions(session_registry.rooms, stop_room_transcription)
@@ -0,0 +1,147 @@
+"""
+Graceful drain for zero-downtime restarts.
+
+Once draining starts (on SIGTERM or via the admin endpoint), the node stops
+accepting new rooms and transcription sessions. It runs the registered drain steps
+once (telling Socket.IO clients to reconnect elsewhere, each after its own jittered
+delay), then runs the poll steps every half second (handing off each transcription
+session once its clients have moved) until every idle check passes or the deadline
+expires. Final steps (checkpointing whatever is left) run just before the process
+exits.
+"""
+import math
+import logging
+import os
+import random
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+from ..config import Config
+
+logger = logging.getLogger(__name__)
+
+
+def reconnect_delays(count: int, window: float) -> List[int]:
+    """
+    Spread ``count`` reconnects over ``window`` seconds: each client gets its own slot
+    plus random jitter inside it, so at most ~count/window clients reconnect per second.
+    Returns delays in milliseconds.
+    """
+    if count <= 0:
+        return []
+    slot = window / count
+    return [int((i * slot + random.uniform(0, slot)) * 1000) for i in range(count)]
+
+
+def parse_timeout(value) -> float:
+    """Drain timeout in seconds from a number or numeric string; raises ValueError unless finite and > 0."""
+    if isinstance(value, bool):
+        raise ValueError("timeout must be a number of seconds")
+    try:
+        timeout = float(value)
+    except (TypeError, ValueError):
+        raise ValueError("timeout must be a number of seconds") from None
+    if not math.isfinite(timeout) or timeout <= 0:
+        raise ValueError("timeout must be greater than 0")
+    return timeout
+
+
+class DrainController:
+    def __init__(self, on_exit: Callable[[], None] = None):
+        self.draining = False
+        self.started_at: Optional[float] = None
+        self.deadline: Optional[float] = None
+        self.stats: dict = {}
+        self._steps: List[Tuple[str, Callable[[], int]]] = []
+        self._polls: List[Tuple[str, Callable[[], int]]] = []
+        self._final_steps: List[Tuple[str, Callable[[], int]]] = []
+        self._idle_checks: List[Callable[[], bool]] = []
+        self._on_exit = on_exit or self._exit_process
+        self._lock = threading.Lock()
+
+    def add_step(self, name: str, step: Callable[[], int]):
+        """Register ``step()`` to run once when draining starts; it returns a count for stats."""
+        self._steps.append((name, step))
+
+    def add_poll(self, name: str, poll: Callable[[], int]):
+        """Register ``poll()`` to run repeatedly while draining; its counts are summed in stats."""
+        self._polls.append((name, poll))
+
+    def add_final_step(self, name: str, step: Callable[[], int]):
+        """Register ``step()`` to run once after waiting ends, just before the process exits."""
+        self._final_steps.append((name, step))
+
+    def add_idle_check(self, check: Callable[[], bool]):
+        """Register a condition that must hold before the node may exit early."""
+        self._idle_checks.append(check)
+
+    def retry_after(self) -> int:
+        """Seconds until this node is expected to be gone, as a Retry-After hint."""
+        if not self.deadline:
+            return 1
+        return max(1, int(self.deadline - time.time()))
+
+    def start(self, timeout: float = None, reason: str = 'requested') -> bool:
+        """
+        Begin draining in the background. Returns False if already draining; raises
+        ValueError (before changing any state) if ``timeout`` is not a positive number.
+        """
+        timeout = parse_timeout(timeout) if timeout is not None else Config.DRAIN_TIMEOUT
+        with self._lock:
+            if self.draining:
+                return False
+            self.draining = True
+            self.started_at = time.time()
+            self.deadline = self.started_at + timeout
+            self.stats = {'reason': reason, 'started_at': self.started_at, 'deadline': self.deadline}
+        logger.warning(f"Draining node ({reason}); exiting by {time.ctime(self.deadline)}")
+        threading.Thread(target=self._run, name='drain', daemon=True).start()
+        return True
+
+    def _is_idle(self) -> bool:
+        for check in self._idle_checks:
+            try:
+                if not check():
+                    return False
+            except Exception as e:
+                logger.error(f"Drain idle check failed: {e}")
+                return False
+        return True
+
+    def _run_step(self, name: str, step: Callable[[], int], accumulate: bool = False):
+        try:
+            count = step()
+            self.stats[name] = self.stats.get(name, 0) + count if accumulate else count
+        except Exception as e:
+            logger.error(f"Drain step '{name}' failed: {e}")
+            self.stats[name] = f'error: {e}'
+
+    def _run(self):
+        for name, step in self._steps:
+            self._run_step(name, step)
+
+        while time.time() < self.deadline:
+            for name, poll in self._polls:
+                self._run_step(name, poll, accumulate=True)
+            if self._is_idle():
+                break
+            time.sleep(0.5)
+
+        for name, step in self._final_steps:
+            self._run_step(name, step)
+        self.stats['idle'] = self._is_idle()
+        self.stats['drain_seconds'] = round(time.time() - self.started_at, 3)
+        logger.warning(f"Drain finished: {self.stats}")
+        self._on_exit()
+
+    @staticmethod
+    def _exit_process():
+        from .store import get_store
+        get_store().close()
+        logging.shutdown()
+        # The serving loop may be blocked in the main thread, so exit from here
+        os._exit(0)
+
+
+drain_controller = DrainController()
@@ -0,0 +1,193 @@
+"""
+Background health prober.
+
+A daemon thread periodically checks LiveKit (every host when sharded) and STT
+reachability with timeouts, and keeps rolling latency/error windows per target.
+Health endpoints read the precomputed summary instead of calling upstream.
+
+- Liveness: the process is up and the prober is still making progress.
+- Readiness: LiveKit answered its latest probe and the recent error rate is acceptable.
+"""
+import asyncio
+import logging
+import os
+import socket
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+from typing import Callable, Dict, Optional
+from urllib.parse import urlparse
+
+from ..config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class ProbeWindow:
+    """Rolling window of probe outcomes for one target."""
+
+    def __init__(self, size: int):
+        self._samples: deque = deque(maxlen=size)  # (ok, latency_s)
+        self.last_checked: Optional[float] = None
+        self.last_ok: Optional[bool] = None
+        self.last_error: Optional[str] = None
+
+    def record(self, ok: bool, latency: float, error: str = None):
+        self._samples.append((ok, latency))
+        self.last_checked = time.time()
+        self.last_ok = ok
+        self.last_error = error
+
+    def summary(self) -> dict:
+        samples = list(self._samples)
+        latencies = sorted(lat for ok, lat in samples if ok)
+
+        def pct(p):
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 2)
+
+        failures = sum(1 for ok, _ in samples if not ok)
+        return {
+            'ok': self.last_ok,
+            'last_checked': self.last_checked,
+            'last_error': self.last_error,
+            'samples': len(samples),
+            'error_rate': round(failures / len(samples), 3) if samples else None,
+            'latency_p50_ms': pct(0.5),
+            'latency_p95_ms': pct(0.95),
+        }
+
+
+class HealthProber:
+    def __init__(self, room_service, interval: float = 5.0, timeout: float = 2.0,
+                 window: int = 60, max_error_rate: float = 0.5):
+        self.room_service = room_service
+        self.interval = interval
+        self.timeout = timeout
+        self.window = window
+        self.max_error_rate = max_error_rate
+        self._windows: Dict[str, ProbeWindow] = {}
+        self._state: dict = {'livekit': {}, 'stt': {}, 'ready': False, 'updated_at': None}
+        self._rooms_count = 0
+        self._heartbeat = time.monotonic()
+        self._readiness_checks = []
+        self._thread = threading.Thread(target=self._run, name='health-prober', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def add_readiness_check(self, name: str, check: Callable[[], bool]):
+        """Extra condition that must hold for readiness (e.g. not draining)."""
+        self._readiness_checks.append((name, check))
+
+    def _window(self, name: str) -> ProbeWindow:
+        if name not in self._windows:
+            self._windows[name] = ProbeWindow(self.window)
+        return self._windows[name]
+
+    # Probes
+
+    def _livekit_targets(self) -> Dict[str, object]:
+        services = getattr(self.room_service, 'services', None)
+        if services:
+            return dict(services)
+        if hasattr(self.room_service, 'list_room_details_async'):
+            return {getattr(self.room_service, 'host', 'livekit') or 'livekit': self.room_service}
+        return {}
+
+    def _probe_livekit(self, loop):
+        rooms = 0
+        for host, service in self._livekit_targets().items():
+            t0 = time.perf_counter()
+            try:
+                listed = loop.run_until_complete(
+                    asyncio.wait_for(service.list_room_details_async(), self.timeout)
+                )
+                rooms += len(listed)
+                self._window(f'livekit:{host}').record(True, time.perf_counter() - t0)
+            except Exception as e:
+                error = 'timeout' if isinstance(e, asyncio.TimeoutError) else str(e)
+                self._window(f'livekit:{host}').record(False, time.perf_counter() - t0, error)
+        self._rooms_count = rooms
+
+    def _probe_stt(self):
+        if not os.getenv('ASSEMBLYAI_API_KEY'):
+            return
+        url = urlparse(Config.STT_PROBE_URL)
+        t0 = time.perf_counter()
+        try:
+            with socket.create_connection((url.hostname, url.port or 443), timeout=self.timeout):
+                pass
+            self._window('stt').record(True, time.perf_counter() - t0)
+        except OSError as e:
+            self._window('stt').record(False, time.perf_counter() - t0, str(e))
+
+    def probe_once(self, loop):
+        self._probe_livekit(loop)
+        self._probe_stt()
+        self._publish()
+
+    def _publish(self):
+        livekit = {name.split(':', 1)[1]: w.summary() for name, w in self._windows.items() if name.startswith('livekit:')}
+        stt = self._windows['stt'].summary() if 'stt' in self._windows else {'ok': None, 'configured': False}
+
+        reasons = []
+        if not livekit and self._livekit_targets():
+            reasons.append('livekit not probed yet')
+        for host, summary in livekit.items():
+            if not summary['ok']:
+                reasons.append(f'livekit {host} unreachable')
+            elif summary['error_rate'] is not None and summary['error_rate'] > self.max_error_rate:
+                reasons.append(f'livekit {host} error rate {summary["error_rate"]}')
+        for name, check in self._readiness_checks:
+            try:
+                if not check():
+                    reasons.append(name)
+            except Exception as e:
+                reasons.append(f'{name}: {e}')
+
+        # Replace the whole dict so readers never see a half-updated state
+        self._state = {
+            'livekit': livekit,
+            'stt': stt,
+            'rooms_count': self._rooms_count,
+            'ready': not reasons,
+            'not_ready_reasons': reasons,
+            'updated_at': time.time(),
+        }
+
+    def _run(self):
+        loop = asyncio.new_event_loop()
+        while True:
+            try:
+                self.probe_once(loop)
+            except Exception as e:
+                logger.error(f"Health probe failed: {e}")
+            self._heartbeat = time.monotonic()
+            time.sleep(self.interval)
+
+    # Reads (no I/O)
+
+    def is_live(self) -> bool:
+        """The prober thread is running and has completed a cycle recently."""
+        stale_after = self.interval * 3 + self.timeout * (len(self._livekit_targets()) + 1)
+        return self._thread.is_alive() and time.monotonic() - self._heartbeat < stale_after
+
+    def state(self) -> dict:
+        return self._state
+
+
+@lru_cache(maxsize=1)
+def get_health_prober() -> HealthProber:
+    """Return the process-wide prober, starting it on first use."""
+    from ..livekit.server_sdk import get_room_service
+    return HealthProber(
+        get_room_service(),
+        interval=Config.HEALTH_PROBE_INTERVAL,
+        timeout=Config.HEALTH_PROBE_TIMEOUT,
+        window=Config.HEALTH_WINDOW,
+        max_error_rate=Config.HEALTH_MAX_ERROR_RATE,
+    ).start()
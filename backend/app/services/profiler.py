@@ -0,0 +1,84 @@
+"""
+On-demand sampling profiler.
+
+profile() runs in the calling thread (the admin request), which blocks for the
+whole run while it snapshots every other thread's stack via sys._current_frames()
+at a fixed interval and counts identical stacks. No extra thread is started.
+Output is in the collapsed format ('frame;frame;frame count' per line) that
+flamegraph.pl and speedscope read. Nothing runs unless a profile has been requested.
+"""
+import sys
+import threading
+import time
+from collections import Counter
+
+# A thread whose innermost frame is in one of these modules is blocked waiting
+# (locks, events, queues, selectors, sockets) rather than running
+_IDLE_MODULES = frozenset({'threading', 'queue', 'selectors', 'socket'})
+
+
+class ProfilerBusy(Exception):
+    """Raised when a profile is requested while another one is running."""
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})"
+
+
+def _is_idle(frame) -> bool:
+    return frame.f_globals.get('__name__') in _IDLE_MODULES
+
+
+class SamplingProfiler:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._running = False
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def profile(self, seconds: float, interval: float = 0.01, include_idle: bool = False) -> dict:
+        """
+        Sample all threads for ``seconds``, blocking the caller. Returns the collapsed
+        stacks plus sample counts. Idle threads (blocked in waits) are skipped unless
+        ``include_idle`` is set.
+        """
+        with self._lock:
+            if self._running:
+                raise ProfilerBusy("A profile is already running")
+            self._running = True
+
+        try:
+            stacks: Counter = Counter()
+            samples = 0
+            me = threading.get_ident()
+            names = {}
+            deadline = time.monotonic() + seconds
+            while time.monotonic() < deadline:
+                names.update((t.ident, t.name) for t in threading.enumerate())
+                for ident, frame in sys._current_frames().items():
+                    if ident == me:
+                        continue
+                    if not include_idle and _is_idle(frame):
+                        continue
+                    labels = []
+                    while frame is not None:
+                        labels.append(_frame_label(frame))
+                        frame = frame.f_back
+                    labels.append(names.get(ident, str(ident)))
+                    stacks[';'.join(reversed(labels))] += 1
+                samples += 1
+                time.sleep(interval)
+
+            return {
+                'samples': samples,
+                'interval_ms': interval * 1000,
+                'collapsed': '\n'.join(f"{stack} {count}" for stack, count in stacks.most_common()),
+            }
+        finally:
+            self._running = False
+
+
+profiler = SamplingProfiler()
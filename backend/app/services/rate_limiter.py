@@ -0,0 +1,153 @@
+"""
+In-memory admission control for the LiveKit endpoints.
+
+TokenBucketLimiter throttles individual clients (keyed by identity, IP and room),
+ConcurrencyLimiter caps how many upstream LiveKit calls run at once and sheds
+load once its wait queue is full.
+"""
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Hashable, Tuple
+
+from ..config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class UpstreamOverloaded(Exception):
+    """Raised when no upstream slot could be obtained; carries a Retry-After hint in seconds."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Upstream LiveKit capacity exhausted, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class TokenBucketLimiter:
+    """
+    Token buckets keyed by an arbitrary hashable key.
+
+    Each key only stores ``[tokens, last_refill]``; the least recently seen keys are
+    evicted once ``max_keys`` is exceeded, so memory stays bounded no matter how many
+    distinct clients show up.
+    """
+
+    def __init__(self, rate: float, burst: float, max_keys: int = 10000):
+        if rate <= 0 or burst <= 0:
+            raise ValueError("rate and burst must be positive")
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[Hashable, list]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, key: Hashable, cost: float = 1.0) -> Tuple[bool, float]:
+        """Take ``cost`` tokens for ``key``. Returns (allowed, seconds until allowed)."""
+        now = time.monotonic()
+        with self._lock:
+            state = self._buckets.get(key)
+            if state is None:
+                state = [self.burst, now]
+                self._buckets[key] = state
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                state[0] = min(self.burst, state[0] + (now - state[1]) * self.rate)
+                state[1] = now
+
+            if state[0] >= cost:
+                state[0] -= cost
+                return True, 0.0
+            return False, (cost - state[0]) / self.rate
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class ConcurrencyLimiter:
+    """
+    Global cap on concurrent upstream calls with a bounded wait queue.
+
+    Callers beyond ``max_concurrent`` wait up to ``queue_timeout`` seconds for a slot;
+    once ``max_queue`` callers are already waiting, new ones are rejected immediately.
+    """
+
+    def __init__(self, max_concurrent: int, max_queue: int, queue_timeout: float):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._cond = threading.Condition()
+        self._active = 0
+        self._waiting = 0
+
+    @property
+    def retry_after(self) -> int:
+        return max(1, math.ceil(self.queue_timeout))
+
+    def acquire(self) -> bool:
+        with self._cond:
+            if self._active < self.max_concurrent:
+                self._active += 1
+                return True
+            if self._waiting >= self.max_queue:
+                return False
+
+            self._waiting += 1
+            try:
+                deadline = time.monotonic() + self.queue_timeout
+                while self._active >= self.max_concurrent:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    self._cond.wait(remaining)
+                self._active += 1
+                return True
+            finally:
+                self._waiting -= 1
+
+    def release(self):
+        with self._cond:
+            self._active -= 1
+            self._cond.notify()
+
+    @contextmanager
+    def slot(self):
+        """Hold an upstream slot for the duration of the block or raise UpstreamOverloaded."""
+        if not self.acquire():
+            logger.warning(f"Shedding upstream call: {self._active} active, {self._waiting} queued")
+            raise UpstreamOverloaded(self.retry_after)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "active": self._active,
+                "waiting": self._waiting,
+                "max_concurrent": self.max_concurrent,
+                "max_queue": self.max_queue,
+            }
+
+
+# Shared limiters used by the route decorators
+client_limiter = TokenBucketLimiter(
+    rate=Config.RATE_LIMIT_CLIENT_RATE,
+    burst=Config.RATE_LIMIT_CLIENT_BURST,
+    max_keys=Config.RATE_LIMIT_MAX_KEYS,
+)
+ip_limiter = TokenBucketLimiter(
+    rate=Config.RATE_LIMIT_IP_RATE,
+    burst=Config.RATE_LIMIT_IP_BURST,
+    max_keys=Config.RATE_LIMIT_MAX_KEYS,
+)
+upstream_limiter = ConcurrencyLimiter(
+    max_concurrent=Config.LIVEKIT_MAX_CONCURRENCY,
+    max_queue=Config.LIVEKIT_MAX_QUEUE,
+    queue_timeout=Config.LIVEKIT_QUEUE_TIMEOUT,
+)
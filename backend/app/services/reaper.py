@@ -0,0 +1,227 @@
+"""
+Background reaper for idle rooms and orphaned transcription sessions.
+
+Each pass takes one bulk room listing from LiveKit (one call per host when
+sharded) and diffs it against local state:
+
+- rooms that have had no participants for idle_timeout seconds, or that are
+  older than max_room_age, are deleted with bounded parallelism;
+- transcription sessions whose room is gone are torn down;
+- the stored room/session rows and the live room name index are brought in line
+  with the listing.
+
+A failed listing reaps nothing, and a session must be missing from two
+consecutive listings before it is treated as orphaned.
+"""
+import asyncio
+import logging
+import threading
+import time
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Optional
+
+from ..config import Config
+from .drain import drain_controller
+from .room_names import room_names
+from .store import get_store
+
+logger = logging.getLogger(__name__)
+
+# Consecutive listings a room must be missing from before its session is torn down
+ORPHAN_CONFIRMATIONS = 2
+
+
+def _is_not_found(error: str) -> bool:
+    error = error.lower()
+    return 'not_found' in error or 'room does not exist' in error
+
+
+class Reaper:
+    def __init__(self, room_service, interval: float = 60.0, idle_timeout: float = 300.0,
+                 max_room_age: float = 0.0, concurrency: int = 4, list_timeout: float = 10.0):
+        self.room_service = room_service
+        self.interval = interval
+        self.idle_timeout = idle_timeout
+        self.max_room_age = max_room_age
+        self.concurrency = concurrency
+        self.list_timeout = list_timeout
+        self._active_sessions: Callable[[], Iterable[str]] = lambda: ()
+        self._stop_session: Callable[[str], bool] = lambda room_name: False
+        self._empty_since: Dict[str, float] = {}
+        self._missing: Dict[str, int] = {}  # session room -> consecutive listings it was absent from
+        self._loop = asyncio.new_event_loop()
+        self._run_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.totals = {'runs': 0, 'failures': 0, 'skipped': 0, 'rooms_deleted': 0, 'delete_errors': 0,
+                       'sessions_stopped': 0, 'store_rooms_closed': 0, 'store_sessions_closed': 0,
+                       'names_dropped': 0, 'cpu_ms': 0.0}
+        self.last: dict = {}
+
+    def track_sessions(self, active: Callable[[], Iterable[str]], stop: Callable[[str], bool]):
+        """Give the reaper the rooms with a local transcription session and a way to stop one."""
+        self._active_sessions = active
+        self._stop_session = stop
+
+    def start(self):
+        if not hasattr(self.room_service, 'delete_room_async'):
+            logger.info("Reaper disabled: no LiveKit service to reconcile against")
+            return self
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='reaper', daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Reaper pass failed: {e}")
+
+    # One pass
+
+    async def _delete_rooms(self, names: List[str]) -> Dict[str, bool]:
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def delete(name):
+            async with semaphore:
+                try:
+                    result = await self.room_service.delete_room_async(name)
+                except Exception as e:
+                    result = {'status': 'error', 'error': str(e)}
+                if result.get('status') == 'error' and not _is_not_found(str(result.get('error', ''))):
+                    logger.error(f"Reaper failed to delete room '{name}': {result.get('error')}")
+                    return name, False
+                return name, True
+
+        return dict(await asyncio.gather(*(delete(name) for name in names)))
+
+    def _due_for_deletion(self, room: dict, created: Dict[str, float], now: float) -> bool:
+        name = room['name']
+        created_at = room.get('creation_time') or created.get(name)
+        if self.max_room_age and created_at and time.time() - created_at >= self.max_room_age:
+            return True
+        # The transcriber joins as a hidden agent, which LiveKit ignores when deciding a room
+        # is empty; a room left to the bot alone closes and its session is reaped as orphaned
+        if room.get('num_participants', 0) > 0:
+            self._empty_since.pop(name, None)
+            return False
+        return now - self._empty_since.setdefault(name, now) >= self.idle_timeout
+
+    def run_once(self) -> dict:
+        """Run one reconciliation pass and return its summary."""
+        with self._run_lock:
+            if drain_controller.draining:
+                # Sessions are being handed off; leave them and the rooms alone
+                self.totals['skipped'] += 1
+                return self.last
+
+            cpu0, t0 = time.thread_time(), time.perf_counter()
+            listed_at, listed_wall = time.monotonic(), time.time()
+            try:
+                rooms = self._loop.run_until_complete(
+                    asyncio.wait_for(self.room_service.list_room_details_async(), self.list_timeout)
+                )
+            except Exception as e:
+                error = 'timeout' if isinstance(e, asyncio.TimeoutError) else str(e)
+                logger.error(f"Reaper could not list rooms: {error}")
+                self.totals['failures'] += 1
+                self.last = {'at': listed_wall, 'error': error}
+                return self.last
+            listing_ms = (time.perf_counter() - t0) * 1000
+
+            store = get_store()
+            listed = {room['name'] for room in rooms}
+            sessions = set(self._active_sessions())
+            stored_rooms = {r['name']: r['created_at'] for r in store.list_rooms()}
+
+            # Rooms: delete the idle and expired ones
+            now = time.monotonic()
+            for name in [n for n in self._empty_since if n not in listed]:
+                del self._empty_since[name]
+            doomed = [room['name'] for room in rooms if self._due_for_deletion(room, stored_rooms, now)]
+            deleted = self._loop.run_until_complete(self._delete_rooms(doomed)) if doomed else {}
+            gone = {name for name, ok in deleted.items() if ok}
+            for name in gone:
+                self._empty_since.pop(name, None)
+                room_names.mark_gone(name)
+                store.room_deleted(name)
+            live = listed - gone
+
+            # Sessions: tear down the ones whose room is gone
+            for name in [n for n in self._missing if n not in sessions or n in live]:
+                del self._missing[name]
+            orphans = []
+            for name in sessions - live:
+                self._missing[name] = self._missing.get(name, 0) + (ORPHAN_CONFIRMATIONS if name in gone else 1)
+                if self._missing[name] >= ORPHAN_CONFIRMATIONS:
+                    orphans.append(name)
+            stopped = 0
+            for name in orphans:
+                try:
+                    if self._stop_session(name):
+                        stopped += 1
+                    self._missing.pop(name, None)
+                except Exception as e:
+                    logger.error(f"Reaper failed to stop transcription for room '{name}': {e}")
+
+            # Stored state: close rooms and sessions LiveKit no longer has
+            closed_rooms = [name for name, created_at in stored_rooms.items()
+                            if name not in live and name not in gone and created_at < listed_wall]
+            for name in closed_rooms:
+                store.room_deleted(name)
+            closed_sessions = {s['room_name'] for s in store.active_sessions()
+                               if s['room_name'] not in live and s['room_name'] not in sessions
+                               and s['started_at'] < listed_wall}
+            for name in closed_sessions:
+                store.session_stopped(name)
+            names_dropped = room_names.sync(live, listed_at)
+
+            cpu_ms = (time.thread_time() - cpu0) * 1000
+            self.last = {
+                'at': listed_wall,
+                'rooms_listed': len(rooms),
+                'rooms_deleted': len(gone),
+                'delete_errors': len(deleted) - len(gone),
+                'sessions_stopped': stopped,
+                'store_rooms_closed': len(closed_rooms),
+                'store_sessions_closed': len(closed_sessions),
+                'names_dropped': names_dropped,
+                'listing_ms': round(listing_ms, 2),
+                'duration_ms': round((time.perf_counter() - t0) * 1000, 2),
+                'cpu_ms': round(cpu_ms, 2),
+            }
+            self.totals['runs'] += 1
+            for key in ('rooms_deleted', 'delete_errors', 'sessions_stopped', 'store_rooms_closed',
+                        'store_sessions_closed', 'names_dropped'):
+                self.totals[key] += self.last[key]
+            self.totals['cpu_ms'] = round(self.totals['cpu_ms'] + cpu_ms, 2)
+            if gone or stopped or closed_rooms or closed_sessions:
+                logger.info(f"Reaper pass: {self.last}")
+            return self.last
+
+    def stats(self) -> dict:
+        return {
+            'running': self._thread is not None and self._thread.is_alive(),
+            'interval': self.interval,
+            'idle_timeout': self.idle_timeout,
+            'max_room_age': self.max_room_age,
+            'tracking_empty': len(self._empty_since),
+            'totals': dict(self.totals),
+            'last': self.last,
+        }
+
+
+@lru_cache(maxsize=1)
+def get_reaper() -> Reaper:
+    """Return the process-wide reaper (started by the app factory)."""
+    from ..livekit.server_sdk import get_room_service
+    return Reaper(
+        get_room_service(),
+        interval=Config.REAPER_INTERVAL,
+        idle_timeout=Config.REAPER_IDLE_TIMEOUT,
+        max_room_age=Config.REAPER_MAX_ROOM_AGE,
+        concurrency=Config.REAPER_CONCURRENCY,
+        list_timeout=Config.REAPER_LIST_TIMEOUT,
+    )
@@ -0,0 +1,165 @@
+"""
+Collision-free room name allocation.
+
+Names are cut from blocks of OS randomness (one secrets.token_bytes() call per
+batch) and checked against an in-memory index of live rooms, which room
+create/delete, LiveKit webhooks and bulk listings keep in sync. A name handed
+out by /generate-room-name stays reserved for a while, so two concurrent callers
+never receive the same one, and claim() decides atomically which caller gets to
+create a room.
+"""
+import logging
+import secrets
+import string
+import threading
+import time
+from collections import deque
+from typing import Dict, Iterable
+
+from ..config import Config
+
+logger = logging.getLogger(__name__)
+
+ALPHABET = string.ascii_letters + string.digits
+
+# Give up after this many consecutive candidates that are already taken
+MAX_ATTEMPTS = 64
+
+
+class RoomNameAllocator:
+    """
+    Thread-safe allocator of unique room names.
+
+    The index holds exact names (not a Bloom filter) so rooms can be removed again
+    when they close; at 62**8 possible names a collision is rare enough that
+    checking a candidate is a single set lookup in practice.
+    """
+
+    def __init__(self, length: int = 8, batch_size: int = 1024, reservation_ttl: float = 120.0,
+                 alphabet: str = ALPHABET):
+        self.length = length
+        self.batch_size = batch_size
+        self.reservation_ttl = reservation_ttl
+        self.alphabet = alphabet
+        # Bytes past the largest multiple of len(alphabet) are dropped so every character is equally likely
+        usable = 256 - 256 % len(alphabet)
+        self._table = bytes(ord(alphabet[b % len(alphabet)]) if b < usable else 0 for b in range(256))
+        self._rejected = bytes(range(usable, 256))
+        self._pool: deque = deque()
+        self._live: Dict[str, float] = {}  # name -> monotonic time it was marked live
+        self._reserved: Dict[str, float] = {}  # name -> reservation expiry
+        self._expiries: deque = deque()  # (expiry, name) in expiry order
+        self._lock = threading.Lock()
+        self._stats = {'allocated': 0, 'collisions': 0, 'refills': 0, 'claims': 0, 'claims_lost': 0}
+
+    # Generation
+
+    def _refill(self):
+        count = self.batch_size * self.length
+        chars = b''
+        while len(chars) < count:
+            # Over-draw a little to cover rejected bytes
+            chars += secrets.token_bytes(count + count // 16).translate(self._table, self._rejected)
+        text = chars[:count].decode('ascii')
+        self._pool.extend(text[i:i + self.length] for i in range(0, count, self.length))
+        self._stats['refills'] += 1
+
+    def _expire_reservations(self, now: float):
+        while self._expiries and self._expiries[0][0] <= now:
+            expiry, name = self._expiries.popleft()
+            # A newer reservation of the same name has its own entry further back
+            if self._reserved.get(name) == expiry:
+                del self._reserved[name]
+
+    def _is_taken(self, name: str) -> bool:
+        return name in self._live or name in self._reserved
+
+    def allocate(self) -> str:
+        """Return a name that is neither live nor reserved, and reserve it for reservation_ttl seconds."""
+        with self._lock:
+            now = time.monotonic()
+            self._expire_reservations(now)
+            for _ in range(MAX_ATTEMPTS):
+                if not self._pool:
+                    self._refill()
+                name = self._pool.popleft()
+                if self._is_taken(name):
+                    self._stats['collisions'] += 1
+                    continue
+                expiry = now + self.reservation_ttl
+                self._reserved[name] = expiry
+                self._expiries.append((expiry, name))
+                self._stats['allocated'] += 1
+                return name
+        raise RuntimeError(f"Could not allocate a free room name after {MAX_ATTEMPTS} attempts")
+
+    # Claims
+
+    def claim(self, name: str) -> bool:
+        """
+        Atomically mark ``name`` live. Returns True if the caller is the one that should
+        create the room, False if it is already live (the caller should join it instead).
+        Claiming a name reserved by allocate() is how that reservation is used up.
+        """
+        with self._lock:
+            if name in self._live:
+                self._stats['claims_lost'] += 1
+                return False
+            self._reserved.pop(name, None)
+            self._live[name] = time.monotonic()
+            self._stats['claims'] += 1
+            return True
+
+    def release(self, name: str):
+        """Undo a claim or reservation, e.g. after room creation failed."""
+        with self._lock:
+            self._live.pop(name, None)
+            self._reserved.pop(name, None)
+
+    # Index maintenance
+
+    def mark_live(self, name: str):
+        with self._lock:
+            self._reserved.pop(name, None)
+            self._live.setdefault(name, time.monotonic())
+
+    def mark_gone(self, name: str):
+        with self._lock:
+            self._live.pop(name, None)
+
+    def sync(self, names: Iterable[str], listed_at: float) -> int:
+        """
+        Reconcile the index with a full room listing requested at ``listed_at``
+        (time.monotonic()). Names marked live after that point are kept, since the
+        listing cannot know about them yet. Returns how many stale names were dropped.
+        """
+        listed = set(names)
+        with self._lock:
+            stale = [name for name, marked in self._live.items() if name not in listed and marked < listed_at]
+            for name in stale:
+                del self._live[name]
+            for name in listed:
+                self._reserved.pop(name, None)
+                self._live.setdefault(name, listed_at)
+        if stale:
+            logger.info(f"Room name index dropped {len(stale)} rooms missing from LiveKit")
+        return len(stale)
+
+    def is_live(self, name: str) -> bool:
+        return name in self._live
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                **self._stats,
+                'live': len(self._live),
+                'reserved': len(self._reserved),
+                'prefetched': len(self._pool),
+            }
+
+
+room_names = RoomNameAllocator(
+    length=Config.ROOM_NAME_LENGTH,
+    batch_size=Config.ROOM_NAME_BATCH,
+    reservation_ttl=Config.ROOM_NAME_RESERVATION_TTL,
+)
@@ -0,0 +1,140 @@
+"""
+Cached participant roster per room, kept up to date from LiveKit webhook events.
+
+Every join/leave bumps the room's version and is appended to a bounded change log,
+so clients that know their last version can fetch (or be pushed) only the deltas.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+JOINED = 'joined'
+LEFT = 'left'
+
+
+class _RoomState:
+    __slots__ = ('participants', 'version', 'floor', 'changes')
+
+    def __init__(self, max_changes: int, version: int):
+        self.participants: Dict[str, dict] = {}
+        # Oldest version the change log can still bring a client forward from
+        self.version = self.floor = version
+        self.changes: deque = deque(maxlen=max_changes)
+
+
+class RosterCache:
+    """
+    Thread-safe room -> participants map with a per-room versioned change feed.
+
+    Versions come from one monotonic counter, so a room that is closed and reopened
+    under the same name never hands out a version a stale client already has.
+    """
+
+    def __init__(self, max_changes: int = 256):
+        self.max_changes = max_changes
+        self._rooms: Dict[str, _RoomState] = {}
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[str, dict], None]] = []
+
+    def add_listener(self, callback: Callable[[str, dict], None]):
+        """Register ``callback(room_name, delta)``, called after every applied change."""
+        self._listeners.append(callback)
+
+    def _notify(self, room_name: str, delta: dict):
+        for callback in self._listeners:
+            try:
+                callback(room_name, delta)
+            except Exception as e:
+                logger.error(f"Roster listener failed for room '{room_name}': {e}")
+
+    def _apply(self, room_name: str, op: str, identity: str, info: Optional[dict]) -> Optional[dict]:
+        with self._lock:
+            state = self._rooms.get(room_name)
+            if state is None:
+                if op == LEFT:
+                    return None
+                state = self._rooms[room_name] = _RoomState(self.max_changes, self._seq)
+
+            if op == JOINED:
+                if state.participants.get(identity) == info:
+                    return None
+                state.participants[identity] = info
+            elif state.participants.pop(identity, None) is None:
+                return None
+
+            self._seq += 1
+            state.version = self._seq
+            delta = {'op': op, 'identity': identity, 'version': state.version}
+            if op == JOINED:
+                delta['participant'] = info
+            if len(state.changes) == state.changes.maxlen:
+                state.floor = state.changes[0]['version']
+            state.changes.append(delta)
+        self._notify(room_name, delta)
+        return delta
+
+    def participant_joined(self, room_name: str, identity: str, name: str = None, joined_at: int = None) -> Optional[dict]:
+        info = {'identity': identity, 'name': name or identity, 'joined_at': joined_at or int(time.time())}
+        return self._apply(room_name, JOINED, identity, info)
+
+    def participant_left(self, room_name: str, identity: str) -> Optional[dict]:
+        return self._apply(room_name, LEFT, identity, None)
+
+    def room_finished(self, room_name: str):
+        """Drop a room, emitting a leave delta for anyone still listed."""
+        with self._lock:
+            state = self._rooms.get(room_name)
+            identities = list(state.participants) if state else []
+        for identity in identities:
+            self.participant_left(room_name, identity)
+        with self._lock:
+            self._rooms.pop(room_name, None)
+
+    def replace(self, room_name: str, participants: List[dict]):
+        """Reconcile the cached roster with a full listing fetched from LiveKit."""
+        current = {p['identity']: p for p in participants}
+        with self._lock:
+            state = self._rooms.get(room_name)
+            stale = [i for i in state.participants if i not in current] if state else []
+        for identity in stale:
+            self.participant_left(room_name, identity)
+        for p in participants:
+            self.participant_joined(room_name, p['identity'], p.get('name'), p.get('joined_at'))
+        with self._lock:
+            if room_name not in self._rooms:
+                self._rooms[room_name] = _RoomState(self.max_changes, self._seq)
+
+    def is_known(self, room_name: str) -> bool:
+        with self._lock:
+            return room_name in self._rooms
+
+    def snapshot(self, room_name: str) -> dict:
+        with self._lock:
+            state = self._rooms.get(room_name)
+            if state is None:
+                return {'room': room_name, 'version': 0, 'participants': []}
+            return {
+                'room': room_name,
+                'version': state.version,
+                'participants': list(state.participants.values()),
+            }
+
+    def changes_since(self, room_name: str, version: int) -> Optional[List[dict]]:
+        """
+        Deltas after ``version``, or None when the log no longer reaches back that far
+        (the caller should fall back to a full snapshot).
+        """
+        with self._lock:
+            state = self._rooms.get(room_name)
+            if state is None or version < state.floor:
+                return None
+            return [d for d in state.changes if d['version'] > version]
+
+
+# Shared roster fed by the LiveKit webhook route
+roster = RosterCache()
@@ -0,0 +1,350 @@
+"""
+Incremental inverted index over final transcript segments.
+
+Segments are indexed by a background thread after the store has committed them, so
+the live transcription path only pays for a queue put. Each term's posting list is
+an append-only ``array('I')`` of delta-encoded entries:
+
+    doc_delta, n_positions, pos_delta_1, ..., pos_delta_n
+
+where the doc is the segment id in the store. Every SKIP_INTERVAL docs a term also
+records a skip entry (doc, offset), so a query can jump close to a given doc without
+walking the list from the start. Queries support plain terms (AND), "quoted phrases"
+and trailing-* prefixes, globally or scoped to one room.
+
+A query snapshots the posting lists it needs under the lock (they are append-only,
+so a list and its current length is a stable view) and does all decoding after
+releasing it. Clauses are evaluated rarest first: the first one (or the room's doc
+list, if that is smaller) yields the candidates, and each further clause only looks
+up those candidates; positions are decoded only for phrase candidates. Results are
+newest first, so a query runs over windows of doc ids from the newest down, each
+twice as wide as the last, and stops as soon as it has ``limit`` matches.
+"""
+import bisect
+import logging
+import queue
+import re
+import threading
+from array import array
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .store import Store, get_store
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_QUERY_RE = re.compile(r'"([^"]*)"|(\S+)')
+_NO_ROOM = 0xFFFFFFFF
+# Docs between skip entries of a posting list
+SKIP_INTERVAL = 32
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+class _TermView:
+    """Read-only view of the first ``end`` entries of one term's posting list."""
+
+    __slots__ = ('plist', 'end', 'skip_docs', 'skip_offsets', 'n_skips', 'df', 'last')
+
+    def __init__(self, plist: array, skip_docs: array, skip_offsets: array, df: int, last: int):
+        self.plist = plist
+        self.end = len(plist)
+        self.skip_docs = skip_docs
+        self.skip_offsets = skip_offsets
+        self.n_skips = len(skip_docs)
+        self.df = df
+        self.last = last
+
+    def entries(self, lo: int = 0, hi: Optional[int] = None) -> Iterator[Tuple[int, int]]:
+        """(doc, offset of its position count) for docs in [lo, hi), skipping over positions."""
+        if lo > self.last:
+            return
+        plist, end = self.plist, self.end
+        doc = i = 0
+        j = bisect.bisect_right(self.skip_docs, lo, 0, self.n_skips) - 1
+        if j > 0:
+            i = self.skip_offsets[j]
+            doc = self.skip_docs[j] - plist[i]
+        while i < end:
+            doc += plist[i]
+            if hi is not None and doc >= hi:
+                break
+            if doc >= lo:
+                yield doc, i + 1
+            i += 2 + plist[i + 1]
+
+    def find(self, targets: List[int]) -> Dict[int, int]:
+        """Offsets of the position counts of those ``targets`` (ascending) that contain the term."""
+        plist, end = self.plist, self.end
+        found = {}
+        doc = i = 0  # doc of the last entry read, offset of the next one
+        for target in targets:
+            j = bisect.bisect_right(self.skip_docs, target, 0, self.n_skips) - 1
+            if j >= 0 and self.skip_offsets[j] > i:
+                i = self.skip_offsets[j]
+                doc = self.skip_docs[j] - plist[i]
+            while i < end:
+                next_doc = doc + plist[i]
+                if next_doc > target:
+                    break
+                doc = next_doc
+                offset = i + 1
+                i = offset + 1 + plist[offset]
+                if doc == target:
+                    found[target] = offset
+                    break
+        return found
+
+    def positions(self, offset: int) -> List[int]:
+        plist = self.plist
+        positions = []
+        pos = 0
+        for delta in plist[offset + 1:offset + 1 + plist[offset]]:
+            pos += delta
+            positions.append(pos)
+        return positions
+
+
+class TranscriptIndex:
+    """In-memory inverted index fed from the store; thread-safe for one writer and many readers."""
+
+    def __init__(self, store: Store):
+        self.store = store
+        self._lock = threading.Lock()
+        self._postings: Dict[str, array] = {}
+        self._last_doc: Dict[str, int] = {}
+        self._doc_freq: Dict[str, int] = {}
+        self._skip_docs: Dict[str, array] = {}
+        self._skip_offsets: Dict[str, array] = {}
+        self._terms: List[str] = []  # sorted, for prefix expansion
+        self._rooms: Dict[str, int] = {}
+        self._room_docs: Dict[int, array] = {}  # room index -> its docs, ascending
+        # Room index per doc, offset by the first doc id seen
+        self._doc_base: Optional[int] = None
+        self._doc_room = array('I')
+        self._last_indexed = 0
+        self._queue: "queue.Queue" = queue.Queue()
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='transcript-indexer', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    @property
+    def ready(self) -> bool:
+        """False while past segments are still being loaded from the store."""
+        return self._ready.is_set()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._doc_room)
+
+    # Indexing
+
+    def enqueue(self, segment_id: int, room_name: str, text: str):
+        """Queue a committed segment for indexing; safe to call from any thread."""
+        self._queue.put((segment_id, room_name, text))
+
+    def _run(self):
+        try:
+            for row in self.store.iter_segments():
+                self._add(row['id'], row['room_name'], row['text'])
+            logger.info(f"Transcript index loaded {len(self)} segments from the store")
+        except Exception as e:
+            logger.error(f"Failed to load transcript index from store: {e}")
+        finally:
+            self._ready.set()
+
+        while True:
+            segment_id, room_name, text = self._queue.get()
+            try:
+                self._add(segment_id, room_name, text)
+            except Exception as e:
+                logger.error(f"Failed to index segment {segment_id}: {e}")
+
+    def _add(self, doc: int, room_name: str, text: str):
+        positions: Dict[str, List[int]] = {}
+        for pos, token in enumerate(tokenize(text)):
+            positions.setdefault(token, []).append(pos)
+
+        with self._lock:
+            # Segments loaded at startup may also arrive through the queue
+            if doc <= self._last_indexed:
+                return
+            self._last_indexed = doc
+
+            room = self._rooms.setdefault(room_name, len(self._rooms))
+            self._room_docs.setdefault(room, array('I')).append(doc)
+            if self._doc_base is None:
+                self._doc_base = doc
+            offset = doc - self._doc_base
+            if offset >= len(self._doc_room):
+                self._doc_room.extend([_NO_ROOM] * (offset - len(self._doc_room) + 1))
+            self._doc_room[offset] = room
+
+            for term, pos_list in positions.items():
+                plist = self._postings.get(term)
+                if plist is None:
+                    plist = self._postings[term] = array('I')
+                    self._skip_docs[term] = array('I')
+                    self._skip_offsets[term] = array('I')
+                    bisect.insort(self._terms, term)
+                df = self._doc_freq.get(term, 0)
+                if df % SKIP_INTERVAL == 0:
+                    self._skip_docs[term].append(doc)
+                    self._skip_offsets[term].append(len(plist))
+                self._doc_freq[term] = df + 1
+                plist.append(doc - self._last_doc.get(term, 0))
+                plist.append(len(pos_list))
+                prev = 0
+                for p in pos_list:
+                    plist.append(p - prev)
+                    prev = p
+                self._last_doc[term] = doc
+
+    # Querying
+
+    def _expand_prefix(self, prefix: str) -> List[str]:
+        terms = self._terms
+        return terms[bisect.bisect_left(terms, prefix):bisect.bisect_left(terms, prefix + '\U0010ffff')]
+
+    def _view(self, term: str) -> Optional[_TermView]:
+        plist = self._postings.get(term)
+        if plist is None:
+            return None
+        return _TermView(plist, self._skip_docs[term], self._skip_offsets[term], self._doc_freq[term],
+                         self._last_doc[term])
+
+    def _snapshot_clause(self, phrase: str, word: str) -> Tuple[str, list]:
+        """(kind, term views) for one query clause; call with the lock held."""
+        if word.endswith('*'):
+            tokens = tokenize(word[:-1])
+            return 'prefix', [self._view(t) for t in self._expand_prefix(tokens[-1])] if tokens else []
+        tokens = tokenize(phrase or word)
+        return 'phrase', [self._view(t) for t in tokens]
+
+    @staticmethod
+    def _clause_cost(kind: str, views: list) -> int:
+        if kind == 'prefix':
+            return sum(v.df for v in views)
+        if not views or None in views:
+            return 0
+        return min(v.df for v in views)
+
+    @staticmethod
+    def _lookup(view: _TermView, candidates: Optional[set], lo: int, hi: int,
+                share: float) -> Dict[int, int]:
+        """
+        Offsets of the term's docs in [lo, hi), among ``candidates`` when given.
+        ``share`` is the fraction of all docs the window covers, to estimate how much of
+        the posting list falls inside it.
+        """
+        if view.last < lo or view.skip_docs[0] >= hi:
+            return {}
+        if candidates is None:
+            return dict(view.entries(lo, hi))
+        if view.df * share <= len(candidates):
+            # Walking a short stretch of postings beats seeking once per candidate
+            return {doc: offset for doc, offset in view.entries(lo, hi) if doc in candidates}
+        return view.find(sorted(candidates))
+
+    @classmethod
+    def _match_clause(cls, kind: str, views: list, candidates: Optional[set], lo: int, hi: int,
+                      share: float) -> set:
+        """Docs in [lo, hi) matching the clause, restricted to ``candidates`` when given."""
+        if kind == 'prefix':
+            docs = set()
+            remaining = None if candidates is None else set(candidates)
+            for view in views:
+                found = cls._lookup(view, remaining, lo, hi, share)
+                docs.update(found)
+                if remaining is not None:
+                    # A candidate already matched needs no further lookups
+                    remaining.difference_update(found)
+                    if not remaining:
+                        break
+            return docs
+
+        # A single term, or a phrase: narrow down by its rarest term first
+        offsets: List[Optional[Dict[int, int]]] = [None] * len(views)
+        for k in sorted(range(len(views)), key=lambda k: views[k].df):
+            offsets[k] = cls._lookup(views[k], candidates, lo, hi, share)
+            candidates = set(offsets[k])
+            if not candidates:
+                return set()
+        if len(views) == 1:
+            return candidates
+
+        matches = set()
+        for doc in candidates:
+            following = [set(views[k].positions(offsets[k][doc])) for k in range(1, len(views))]
+            if any(all(p + k + 1 in following[k] for k in range(len(following)))
+                   for p in views[0].positions(offsets[0][doc])):
+                matches.add(doc)
+        return matches
+
+    def search_ids(self, query: str, room_name: str = None, limit: int = 20) -> List[int]:
+        """Segment ids matching every clause of ``query``, newest first."""
+        parsed = _QUERY_RE.findall(query or '')
+        if not parsed or limit < 1:
+            return []
+
+        with self._lock:
+            if self._doc_base is None or (room_name is not None and room_name not in self._rooms):
+                return []
+            first, last = self._doc_base, self._last_indexed
+            clauses = [self._snapshot_clause(phrase, word) for phrase, word in parsed]
+            room = self._rooms.get(room_name) if room_name is not None else None
+            if room is not None:
+                room_docs = self._room_docs[room]
+                room_docs_end = len(room_docs)
+                doc_room, doc_base = self._doc_room, self._doc_base
+
+        # Decoding happens without the lock; indexing can go on meanwhile
+        costs = [self._clause_cost(kind, views) for kind, views in clauses]
+        if min(costs) == 0:
+            return []
+        order = sorted(range(len(clauses)), key=costs.__getitem__)
+        from_room = room is not None and room_docs_end < costs[order[0]]
+
+        # Size the first window to hold about twice ``limit`` matches, were clauses independent
+        total = last - first + 1
+        density = 1.0
+        for cost in costs + ([room_docs_end] if room is not None else []):
+            density *= min(1.0, cost / total)
+        span = max(SKIP_INTERVAL, int(2 * limit / density))
+        matches: List[int] = []
+        hi = last + 1
+        while hi > first and len(matches) < limit:
+            lo = max(first, hi - span)
+            share = (hi - lo) / total
+            candidates = None
+            if from_room:
+                candidates = set(room_docs[bisect.bisect_left(room_docs, lo, 0, room_docs_end):
+                                           bisect.bisect_left(room_docs, hi, 0, room_docs_end)])
+            for i in order:
+                if candidates is not None and not candidates:
+                    break
+                result = self._match_clause(*clauses[i], candidates, lo, hi, share)
+                if candidates is None and room is not None:
+                    result = {d for d in result if doc_room[d - doc_base] == room}
+                candidates = result
+            matches.extend(sorted(candidates, reverse=True))
+            hi = lo
+            span *= 2
+
+        return matches[:limit]
+
+    def search(self, query: str, room_name: str = None, limit: int = 20) -> List[dict]:
+        """Matching segments with their text, newest first."""
+        return self.store.get_segments(self.search_ids(query, room_name, limit))
+
+
+@lru_cache(maxsize=1)
+def get_transcript_index() -> TranscriptIndex:
+    """Return the process-wide index, loading past segments in the background on first use."""
+    return TranscriptIndex(get_store()).start()
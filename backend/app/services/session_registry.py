@@ -0,0 +1,144 @@
+"""
+Thread-safe registry of active transcription sessions keyed by room.
+
+Starts and stops for the same room are serialized by a per-room lock, so a
+second start returns the running session instead of replacing (and leaking) it,
+while different rooms never wait on each other. Sessions are also indexed by start
+time and by owning worker for bulk introspection.
+"""
+import bisect
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+# Identifies this process in the by-worker index
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+
+class SessionEntry:
+    __slots__ = ('room_name', 'service', 'started_at', 'worker')
+
+    def __init__(self, room_name: str, service, started_at: float, worker: str):
+        self.room_name = room_name
+        self.service = service
+        self.started_at = started_at
+        self.worker = worker
+
+    def to_dict(self) -> dict:
+        return {
+            'room_name': self.room_name,
+            'started_at': self.started_at,
+            'worker': self.worker,
+        }
+
+
+class SessionRegistry:
+    """Room -> SessionEntry map with O(1) lookup and per-room locking."""
+
+    def __init__(self, worker: str = WORKER_ID):
+        self.worker = worker
+        # room -> [lock, holders]; dropped again once nobody holds or waits on it
+        self._room_locks: Dict[str, list] = {}
+        # Guards the maps and indexes below; only held for short, non-blocking updates
+        self._lock = threading.Lock()
+        self._entries: Dict[str, SessionEntry] = {}
+        self._by_start: List[Tuple[float, str]] = []
+        self._by_worker: Dict[str, Set[str]] = {}
+
+    @contextmanager
+    def _room_lock(self, room_name: str):
+        with self._lock:
+            slot = self._room_locks.get(room_name)
+            if slot is None:
+                slot = self._room_locks[room_name] = [threading.Lock(), 0]
+            slot[1] += 1
+        try:
+            with slot[0]:
+                yield
+        finally:
+            with self._lock:
+                slot[1] -= 1
+                if slot[1] == 0:
+                    del self._room_locks[room_name]
+
+    def _insert(self, entry: SessionEntry):
+        with self._lock:
+            self._entries[entry.room_name] = entry
+            bisect.insort(self._by_start, (entry.started_at, entry.room_name))
+            self._by_worker.setdefault(entry.worker, set()).add(entry.room_name)
+
+    def _remove(self, room_name: str) -> Optional[SessionEntry]:
+        with self._lock:
+            entry = self._entries.pop(room_name, None)
+            if entry is None:
+                return None
+            i = bisect.bisect_left(self._by_start, (entry.started_at, room_name))
+            if i < len(self._by_start) and self._by_start[i] == (entry.started_at, room_name):
+                del self._by_start[i]
+            rooms = self._by_worker.get(entry.worker)
+            if rooms is not None:
+                rooms.discard(room_name)
+                if not rooms:
+                    del self._by_worker[entry.worker]
+            return entry
+
+    def start(self, room_name: str, factory: Callable[[], object]) -> Tuple[Optional[SessionEntry], bool]:
+        """
+        Return (entry, created). If the room already has a session it is returned as-is;
+        otherwise ``factory()`` builds one (returning None on failure) under the room's lock.
+        """
+        with self._room_lock(room_name):
+            entry = self.get(room_name)
+            if entry is not None:
+                return entry, False
+            service = factory()
+            if service is None:
+                return None, False
+            entry = SessionEntry(room_name, service, time.time(), self.worker)
+            self._insert(entry)
+            return entry, True
+
+    def stop(self, room_name: str, teardown: Callable[[SessionEntry], None] = None) -> Optional[SessionEntry]:
+        """Remove a room's session, running ``teardown(entry)`` under the room's lock."""
+        with self._room_lock(room_name):
+            entry = self._remove(room_name)
+            if entry is not None and teardown is not None:
+                teardown(entry)
+            return entry
+
+    def get(self, room_name: str) -> Optional[SessionEntry]:
+        with self._lock:
+            return self._entries.get(room_name)
+
+    def __contains__(self, room_name: str) -> bool:
+        return self.get(room_name) is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def rooms(self) -> List[str]:
+        with self._lock:
+            return list(self._entries)
+
+    def started_between(self, since: float = None, until: float = None) -> List[SessionEntry]:
+        """Sessions ordered by start time, optionally bounded to [since, until)."""
+        with self._lock:
+            lo = 0 if since is None else bisect.bisect_left(self._by_start, (since, ''))
+            hi = len(self._by_start) if until is None else bisect.bisect_left(self._by_start, (until, ''))
+            return [self._entries[room] for _, room in self._by_start[lo:hi]]
+
+    def by_worker(self, worker: str) -> List[SessionEntry]:
+        with self._lock:
+            return [self._entries[room] for room in self._by_worker.get(worker, ())]
+
+    def workers(self) -> Dict[str, int]:
+        with self._lock:
+            return {worker: len(rooms) for worker, rooms in self._by_worker.items()}
+
+
+# Shared registry used by the transcription routes
+session_registry = SessionRegistry()
@@ -0,0 +1,396 @@
+"""
+Embedded SQLite store (WAL mode) for room metadata, session history, token issuance
+and final transcript segments.
+
+All writes go through a single writer thread that drains a queue and commits them in
+batches, so request threads never block on fsync. Reads borrow a connection from a
+bounded pool, so the threaded server reuses a few open connections instead of opening
+one per request thread; sqlite3 keeps a per-connection cache of prepared statements
+for the fixed SQL strings below.
+"""
+import atexit
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Callable, Iterator, List, Optional
+
+from ..config import Config, basedir
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rooms (
+    name             TEXT PRIMARY KEY,
+    max_participants INTEGER,
+    empty_timeout    INTEGER,
+    metadata         TEXT,
+    created_at       REAL NOT NULL,
+    deleted_at       REAL
+);
+CREATE TABLE IF NOT EXISTS sessions (
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    room_name  TEXT NOT NULL,
+    worker     TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    ended_at   REAL,
+    -- Set when a draining node hands the session off, and when another node picks it up
+    checkpointed_at REAL,
+    resumed_at      REAL
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_room ON sessions (room_name);
+CREATE INDEX IF NOT EXISTS idx_sessions_started ON sessions (started_at);
+CREATE INDEX IF NOT EXISTS idx_sessions_active ON sessions (ended_at) WHERE ended_at IS NULL;
+CREATE TABLE IF NOT EXISTS tokens (
+    id        INTEGER PRIMARY KEY AUTOINCREMENT,
+    identity  TEXT NOT NULL,
+    room_name TEXT NOT NULL,
+    issued_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tokens_room ON tokens (room_name);
+CREATE INDEX IF NOT EXISTS idx_tokens_issued ON tokens (issued_at);
+CREATE TABLE IF NOT EXISTS segments (
+    id        INTEGER PRIMARY KEY AUTOINCREMENT,
+    room_name TEXT NOT NULL,
+    speaker   TEXT,
+    text      TEXT NOT NULL,
+    ts        REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_segments_room_ts ON segments (room_name, ts);
+-- Per-room scans page through segments in id order (exports, index loading)
+CREATE INDEX IF NOT EXISTS idx_segments_room_id ON segments (room_name, id);
+"""
+
+_UPSERT_ROOM = """
+INSERT INTO rooms (name, max_participants, empty_timeout, metadata, created_at, deleted_at)
+VALUES (?, ?, ?, ?, ?, NULL)
+ON CONFLICT(name) DO UPDATE SET
+    max_participants = excluded.max_participants,
+    empty_timeout = excluded.empty_timeout,
+    metadata = excluded.metadata,
+    created_at = excluded.created_at,
+    deleted_at = NULL
+"""
+_DELETE_ROOM = "UPDATE rooms SET deleted_at = ? WHERE name = ? AND deleted_at IS NULL"
+_START_SESSION = "INSERT INTO sessions (room_name, worker, started_at) VALUES (?, ?, ?)"
+_STOP_SESSION = "UPDATE sessions SET ended_at = ? WHERE room_name = ? AND ended_at IS NULL"
+_CHECKPOINT_SESSION = ("UPDATE sessions SET ended_at = ?, checkpointed_at = ? "
+                       "WHERE room_name = ? AND ended_at IS NULL")
+_INSERT_TOKEN = "INSERT INTO tokens (identity, room_name, issued_at) VALUES (?, ?, ?)"
+_INSERT_SEGMENT = "INSERT INTO segments (room_name, speaker, text, ts) VALUES (?, ?, ?, ?)"
+
+_SELECT_ROOM = "SELECT * FROM rooms WHERE name = ?"
+_SELECT_ACTIVE_SESSIONS = "SELECT * FROM sessions WHERE ended_at IS NULL ORDER BY started_at"
+
+
+def _database_path(uri: str) -> str:
+    prefix = 'sqlite:///'
+    if uri and uri.startswith(prefix):
+        return uri[len(prefix):]
+    logger.warning(f"Unsupported DATABASE_URL '{uri}', falling back to local app.db")
+    return os.path.join(basedir, 'app.db')
+
+
+class Store:
+    """SQLite-backed store with a group-committing writer thread."""
+
+    _STOP = object()
+
+    def __init__(self, path: str, batch_size: int = 256, flush_interval: float = 0.05,
+                 read_pool_size: int = 8, read_timeout: float = 5.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.read_pool_size = read_pool_size
+        self.read_timeout = read_timeout
+        self._queue: "queue.Queue" = queue.Queue()
+        # Idle read connections (most recently used last); at most read_pool_size are ever opened
+        self._readers: List[sqlite3.Connection] = []
+        # Threads waiting for a connection, served first come first served
+        self._reader_waiters: "deque[queue.Queue]" = deque()
+        self._readers_opened = 0
+        self._readers_lock = threading.Lock()
+
+        conn = self._connect()
+        conn.executescript(_SCHEMA)
+        self._migrate(conn)
+        conn.close()
+
+        self._writer = threading.Thread(target=self._write_loop, name='store-writer', daemon=True)
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False, cached_statements=128)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA busy_timeout=5000')
+        return conn
+
+    @staticmethod
+    def _migrate(conn: sqlite3.Connection):
+        """Add columns introduced after a database file was first created."""
+        columns = {row['name'] for row in conn.execute("PRAGMA table_info(sessions)")}
+        for column in ('checkpointed_at', 'resumed_at'):
+            if column not in columns:
+                conn.execute(f"ALTER TABLE sessions ADD COLUMN {column} REAL")
+        conn.commit()
+
+    @contextmanager
+    def _reader(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a read connection from the pool, opening one if the pool is not full yet."""
+        conn = None
+        waiter: Optional[queue.Queue] = None
+        with self._readers_lock:
+            if self._readers:
+                conn = self._readers.pop()
+            elif self._readers_opened < self.read_pool_size:
+                self._readers_opened += 1
+            else:
+                waiter = queue.Queue(maxsize=1)
+                self._reader_waiters.append(waiter)
+        if waiter is not None:
+            try:
+                conn = waiter.get(timeout=self.read_timeout)
+            except queue.Empty:
+                with self._readers_lock:
+                    try:
+                        self._reader_waiters.remove(waiter)
+                    except ValueError:
+                        pass  # a connection was handed over just as we timed out
+                if waiter.empty():
+                    raise sqlite3.OperationalError("timed out waiting for a read connection") from None
+                conn = waiter.get_nowait()
+        elif conn is None:
+            try:
+                conn = self._connect()
+            except Exception:
+                with self._readers_lock:
+                    self._readers_opened -= 1
+                raise
+        try:
+            yield conn
+        finally:
+            self._release_reader(conn)
+
+    def _release_reader(self, conn: sqlite3.Connection):
+        # Hand the connection straight to the longest waiter so a thread that keeps
+        # reading cannot take it back ahead of threads already queued for one
+        with self._readers_lock:
+            if self._reader_waiters:
+                self._reader_waiters.popleft().put_nowait(conn)
+            else:
+                self._readers.append(conn)
+
+    # Writer
+
+    def _write_loop(self):
+        conn = self._connect()
+        running = True
+        while running:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            waiters = [op for op in batch if isinstance(op, threading.Event)]
+            writes = [op for op in batch if isinstance(op, tuple)]
+            running = self._STOP not in batch
+            stored = []
+            try:
+                with conn:
+                    for sql, params, on_stored in writes:
+                        row_id = conn.execute(sql, params).lastrowid
+                        if on_stored is not None:
+                            stored.append((on_stored, row_id))
+            except sqlite3.Error as e:
+                # One bad write should not drop the rest of the batch; retry individually
+                logger.error(f"Store batch of {len(writes)} writes failed, retrying one by one: {e}")
+                stored = []
+                for sql, params, on_stored in writes:
+                    try:
+                        with conn:
+                            row_id = conn.execute(sql, params).lastrowid
+                        if on_stored is not None:
+                            stored.append((on_stored, row_id))
+                    except sqlite3.Error as op_error:
+                        logger.error(f"Store write failed: {op_error}")
+            finally:
+                for event in waiters:
+                    event.set()
+
+            # Post-commit callbacks run on the writer thread, so they must be cheap
+            for on_stored, row_id in stored:
+                try:
+                    on_stored(row_id)
+                except Exception as e:
+                    logger.error(f"Store callback failed: {e}")
+        conn.close()
+
+    def _write(self, sql: str, params: tuple, on_stored: Callable[[int], None] = None):
+        """Queue a write; ``on_stored(rowid)`` is called once it has been committed."""
+        self._queue.put((sql, params, on_stored))
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Block until every write queued before this call has been committed."""
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self):
+        if self._writer.is_alive():
+            self._queue.put(self._STOP)
+            self._writer.join(timeout=5)
+        with self._readers_lock:
+            readers, self._readers = self._readers, []
+        for conn in readers:
+            conn.close()
+
+    # Rooms
+
+    def room_created(self, name: str, max_participants: int = None, empty_timeout: int = None, metadata: str = None):
+        self._write(_UPSERT_ROOM, (name, max_participants, empty_timeout, metadata, time.time()))
+
+    def room_deleted(self, name: str):
+        self._write(_DELETE_ROOM, (time.time(), name))
+
+    def get_room(self, name: str) -> Optional[dict]:
+        with self._reader() as conn:
+            row = conn.execute(_SELECT_ROOM, (name,)).fetchone()
+        return dict(row) if row else None
+
+    def list_rooms(self, include_deleted: bool = False) -> List[dict]:
+        sql = "SELECT * FROM rooms" + ("" if include_deleted else " WHERE deleted_at IS NULL")
+        with self._reader() as conn:
+            return [dict(r) for r in conn.execute(sql + " ORDER BY created_at")]
+
+    # Transcription sessions
+
+    def session_started(self, room_name: str, worker: str, started_at: float):
+        self._write(_START_SESSION, (room_name, worker, started_at))
+
+    def session_stopped(self, room_name: str):
+        self._write(_STOP_SESSION, (time.time(), room_name))
+
+    def session_checkpointed(self, room_name: str):
+        """End a session because its node is draining, marking it for another node to resume."""
+        now = time.time()
+        self._write(_CHECKPOINT_SESSION, (now, now, room_name))
+
+    def claim_checkpointed_sessions(self, max_age: float) -> List[str]:
+        """
+        Atomically claim sessions checkpointed within the last ``max_age`` seconds and
+        return their room names. Runs synchronously outside the writer thread because
+        the claim must be decided before the caller acts on it; SQLite's own locking
+        keeps concurrent claimers from taking the same session.
+        """
+        claimed = []
+        with self._reader() as conn:
+            candidates = conn.execute(
+                "SELECT id, room_name FROM sessions WHERE checkpointed_at >= ? AND resumed_at IS NULL",
+                (time.time() - max_age,)
+            ).fetchall()
+            for row in candidates:
+                with conn:
+                    updated = conn.execute(
+                        "UPDATE sessions SET resumed_at = ? WHERE id = ? AND resumed_at IS NULL",
+                        (time.time(), row['id'])
+                    ).rowcount
+                if updated:
+                    claimed.append(row['room_name'])
+        return claimed
+
+    def active_sessions(self) -> List[dict]:
+        with self._reader() as conn:
+            return [dict(r) for r in conn.execute(_SELECT_ACTIVE_SESSIONS)]
+
+    def session_history(self, room_name: str = None, since: float = None, limit: int = 100) -> List[dict]:
+        clauses, params = [], []
+        if room_name:
+            clauses.append("room_name = ?")
+            params.append(room_name)
+        if since is not None:
+            clauses.append("started_at >= ?")
+            params.append(since)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        sql = f"SELECT * FROM sessions{where} ORDER BY started_at DESC LIMIT ?"
+        with self._reader() as conn:
+            return [dict(r) for r in conn.execute(sql, (*params, limit))]
+
+    # Tokens
+
+    def token_issued(self, identity: str, room_name: str):
+        self._write(_INSERT_TOKEN, (identity, room_name, time.time()))
+
+    # Transcript segments
+
+    def segment_added(self, room_name: str, speaker: Optional[str], text: str, ts: float,
+                      on_stored: Callable[[int], None] = None):
+        self._write(_INSERT_SEGMENT, (room_name, speaker, text, ts), on_stored)
+
+    def get_segments(self, ids: List[int]) -> List[dict]:
+        """Fetch segments by id, returned in the order the ids were given."""
+        if not ids:
+            return []
+        rows = {}
+        with self._reader() as conn:
+            # Stay well below SQLite's bound-parameter limit
+            for i in range(0, len(ids), 500):
+                chunk = ids[i:i + 500]
+                sql = f"SELECT * FROM segments WHERE id IN ({','.join('?' * len(chunk))})"
+                rows.update((r['id'], dict(r)) for r in conn.execute(sql, chunk))
+        return [rows[i] for i in ids if i in rows]
+
+    def iter_segments(self, room_name: str = None, after_id: int = 0, up_to_id: int = None,
+                      batch_size: int = 1000) -> Iterator[dict]:
+        """
+        Stream segments in id order (optionally for one room) without loading them all.
+        A connection is only borrowed per batch, so slow consumers do not hold one.
+        """
+        last_id = up_to_id if up_to_id is not None else 2 ** 63 - 1
+        while True:
+            with self._reader() as conn:
+                if room_name is None:
+                    rows = conn.execute("SELECT * FROM segments WHERE id > ? AND id <= ? ORDER BY id LIMIT ?",
+                                        (after_id, last_id, batch_size)).fetchall()
+                else:
+                    rows = conn.execute("SELECT * FROM segments WHERE room_name = ? AND id > ? AND id <= ? "
+                                        "ORDER BY id LIMIT ?", (room_name, after_id, last_id, batch_size)).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield dict(row)
+            after_id = rows[-1]['id']
+
+    def segment_stats(self, room_name: str) -> dict:
+        """Count, id range and first timestamp of a room's stored segments."""
+        with self._reader() as conn:
+            row = conn.execute(
+                "SELECT COUNT(*) AS count, MIN(id) AS first_id, MAX(id) AS last_id, MIN(ts) AS first_ts "
+                "FROM segments WHERE room_name = ?", (room_name,)
+            ).fetchone()
+        return dict(row)
+
+
+@lru_cache(maxsize=1)
+def get_store() -> Store:
+    """Return the process-wide store, opening the database on first use."""
+    store = Store(
+        _database_path(Config.SQLALCHEMY_DATABASE_URI),
+        batch_size=Config.STORE_BATCH_SIZE,
+        flush_interval=Config.STORE_FLUSH_INTERVAL,
+        read_pool_size=Config.STORE_READ_POOL_SIZE,
+    )
+    atexit.register(store.close)
+    return store
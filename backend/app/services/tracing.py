@@ -0,0 +1,120 @@
+"""
+Lightweight span tracing for hot paths (LiveKit RPCs, token minting, transcript emits).
+
+When tracing is disabled a span costs one attribute check. When enabled, each span
+updates per-name aggregates (count, total, max) and is appended to a bounded ring
+of recent spans for inspection from the admin endpoints.
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+from typing import Dict
+
+from ..config import Config
+
+# Shared no-op context returned by span() while tracing is disabled
+_NO_SPAN = nullcontext()
+
+
+class Tracer:
+    def __init__(self, enabled: bool = False, recent: int = 512):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._stats: Dict[str, list] = {}  # name -> [count, total_s, max_s, errors]
+        self._recent: deque = deque(maxlen=recent)
+
+    def record(self, name: str, started: float, duration: float, error: bool = False):
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = [0, 0.0, 0.0, 0]
+            stats[0] += 1
+            stats[1] += duration
+            if duration > stats[2]:
+                stats[2] = duration
+            if error:
+                stats[3] += 1
+            self._recent.append((name, started, duration, error))
+
+    def span(self, name: str):
+        if not self.enabled:
+            return _NO_SPAN
+        return self._span(name)
+
+    @contextmanager
+    def _span(self, name: str):
+        started = time.time()
+        t0 = time.perf_counter()
+        error = False
+        try:
+            yield
+        except BaseException:
+            error = True
+            raise
+        finally:
+            self.record(name, started, time.perf_counter() - t0, error)
+
+    def traced(self, name: str):
+        """Decorator form of span(); works for both sync and async functions."""
+        def decorator(f):
+            if asyncio.iscoroutinefunction(f):
+                @wraps(f)
+                async def async_wrapper(*args, **kwargs):
+                    if not self.enabled:
+                        return await f(*args, **kwargs)
+                    started, t0, error = time.time(), time.perf_counter(), True
+                    try:
+                        result = await f(*args, **kwargs)
+                        error = False
+                        return result
+                    finally:
+                        self.record(name, started, time.perf_counter() - t0, error)
+                return async_wrapper
+
+            # Timing is inlined rather than going through span() to keep the enabled path cheap
+            @wraps(f)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return f(*args, **kwargs)
+                started, t0, error = time.time(), time.perf_counter(), True
+                try:
+                    result = f(*args, **kwargs)
+                    error = False
+                    return result
+                finally:
+                    self.record(name, started, time.perf_counter() - t0, error)
+            return wrapper
+        return decorator
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'spans': {
+                    name: {
+                        'count': count,
+                        'errors': errors,
+                        'avg_ms': round(total / count * 1000, 3) if count else 0.0,
+                        'max_ms': round(peak * 1000, 3),
+                    }
+                    for name, (count, total, peak, errors) in self._stats.items()
+                },
+                'recent': [
+                    {'name': name, 'started_at': started, 'duration_ms': round(duration * 1000, 3), 'error': error}
+                    for name, started, duration, error in self._recent
+                ],
+            }
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self._recent.clear()
+
+
+# Shared tracer; toggled at runtime through the admin endpoints
+tracer = Tracer(enabled=Config.TRACING_ENABLED)
+span = tracer.span
+traced = tracer.traced
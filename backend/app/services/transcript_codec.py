@@ -0,0 +1,87 @@
+"""
+Compact binary encoding for transcript frames sent over Socket.IO.
+
+Frame layout (network byte order, 12-byte header followed by UTF-8 text):
+
+    version   uint8   FRAME_VERSION
+    flags     uint8   FLAG_FINAL | FLAG_SPEAKER_DEF
+    sequence  uint32  room-local, increments per frame
+    ts_delta  uint32  milliseconds since the stream's base timestamp
+    speaker   uint16  index into the stream's speaker table (NO_SPEAKER if unknown)
+    text      bytes   UTF-8 transcript text, or the speaker identity for FLAG_SPEAKER_DEF
+
+A speaker identity is sent once as a FLAG_SPEAKER_DEF frame the first time it is
+seen; later frames only carry its index. JSON stays the default for clients that
+do not ask for the binary encoding.
+"""
+import struct
+import threading
+import time
+from typing import Dict, List, Optional
+
+FRAME_VERSION = 1
+FLAG_FINAL = 0x01
+FLAG_SPEAKER_DEF = 0x02
+NO_SPEAKER = 0xFFFF
+
+_HEADER = struct.Struct('!BBIIH')
+HEADER_SIZE = _HEADER.size
+
+
+class TranscriptEncoder:
+    """Per-room binary frame encoder holding the sequence counter and speaker table."""
+
+    def __init__(self, base_ts: Optional[float] = None):
+        self.base_ts = time.time() if base_ts is None else base_ts
+        self._seq = 0
+        self._speakers: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def speakers(self) -> List[str]:
+        """Speaker identities ordered by index, for clients joining mid-stream."""
+        with self._lock:
+            return sorted(self._speakers, key=self._speakers.get)
+
+    def _frame(self, flags: int, ts: float, speaker: int, payload: bytes) -> bytes:
+        self._seq = (self._seq + 1) & 0xFFFFFFFF
+        delta_ms = max(0, int((ts - self.base_ts) * 1000)) & 0xFFFFFFFF
+        return _HEADER.pack(FRAME_VERSION, flags, self._seq, delta_ms, speaker) + payload
+
+    def encode(self, text: str, speaker: Optional[str] = None, final: bool = True,
+               ts: Optional[float] = None) -> List[bytes]:
+        """
+        Encode one transcript segment. Returns the frames to send in order: a speaker
+        definition frame first when ``speaker`` is new, then the text frame.
+        """
+        ts = time.time() if ts is None else ts
+        frames = []
+        with self._lock:
+            index = NO_SPEAKER
+            if speaker is not None:
+                index = self._speakers.get(speaker)
+                if index is None:
+                    index = len(self._speakers)
+                    if index >= NO_SPEAKER:
+                        raise ValueError("speaker table is full")
+                    self._speakers[speaker] = index
+                    frames.append(self._frame(FLAG_SPEAKER_DEF, ts, index, speaker.encode('utf-8')))
+            frames.append(self._frame(FLAG_FINAL if final else 0, ts, index, text.encode('utf-8')))
+        return frames
+
+
+def decode_frame(frame: bytes) -> dict:
+    """Decode a single frame back into a dict (mainly for tests and tooling)."""
+    if len(frame) < HEADER_SIZE:
+        raise ValueError("frame shorter than header")
+    version, flags, seq, ts_delta, speaker = _HEADER.unpack_from(frame)
+    if version != FRAME_VERSION:
+        raise ValueError(f"unsupported frame version {version}")
+    return {
+        'seq': seq,
+        'ts_delta_ms': ts_delta,
+        'final': bool(flags & FLAG_FINAL),
+        'speaker_def': bool(flags & FLAG_SPEAKER_DEF),
+        'speaker': None if speaker == NO_SPEAKER else speaker,
+        'text': frame[HEADER_SIZE:].decode('utf-8'),
+    }
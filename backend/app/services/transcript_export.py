@@ -0,0 +1,147 @@
+"""
+Streaming transcript export as WebVTT, SRT or NDJSON.
+
+Everything here is a generator over stored segments, so memory use stays constant
+no matter how long the session is. Helpers cover gzip on the fly and cutting a
+byte range out of a stream for resumed downloads.
+"""
+import json
+import re
+import zlib
+from typing import Iterable, Iterator, Optional
+
+FORMATS = {
+    'vtt': 'text/vtt; charset=utf-8',
+    'srt': 'application/x-subrip; charset=utf-8',
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+}
+
+# Cue length when the next segment does not bound it
+DEFAULT_CUE_SECONDS = 3.0
+CHUNK_SIZE = 64 * 1024
+_RANGE_RE = re.compile(r'bytes=\s*(\d*)-(\d*)\s*')
+
+
+def _timestamp(seconds: float, separator: str) -> str:
+    ms = max(0, int(round(seconds * 1000)))
+    hours, ms = divmod(ms, 3600000)
+    minutes, ms = divmod(ms, 60000)
+    secs, ms = divmod(ms, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{separator}{ms:03d}"
+
+
+def _with_end_times(segments: Iterable[dict]) -> Iterator[tuple]:
+    """Yield (segment, end_ts), bounding each cue by the next segment's start."""
+    previous = None
+    for segment in segments:
+        if previous is not None:
+            yield previous, min(segment['ts'], previous['ts'] + DEFAULT_CUE_SECONDS)
+        previous = segment
+    if previous is not None:
+        yield previous, previous['ts'] + DEFAULT_CUE_SECONDS
+
+
+def _vtt(segments: Iterable[dict], origin: float) -> Iterator[str]:
+    yield "WEBVTT\n\n"
+    for segment, end in _with_end_times(segments):
+        start = _timestamp(segment['ts'] - origin, '.')
+        stop = _timestamp(end - origin, '.')
+        text = segment['text'].replace('-->', '->')
+        voice = f"<v {segment['speaker']}>" if segment.get('speaker') else ''
+        yield f"{start} --> {stop}\n{voice}{text}\n\n"
+
+
+def _srt(segments: Iterable[dict], origin: float) -> Iterator[str]:
+    for number, (segment, end) in enumerate(_with_end_times(segments), 1):
+        start = _timestamp(segment['ts'] - origin, ',')
+        stop = _timestamp(end - origin, ',')
+        speaker = f"{segment['speaker']}: " if segment.get('speaker') else ''
+        yield f"{number}\n{start} --> {stop}\n{speaker}{segment['text']}\n\n"
+
+
+def _ndjson(segments: Iterable[dict], origin: float) -> Iterator[str]:
+    for segment in segments:
+        yield json.dumps({
+            'id': segment['id'],
+            'speaker': segment.get('speaker'),
+            'text': segment['text'],
+            'ts': segment['ts'],
+            'offset': round(segment['ts'] - origin, 3),
+        }, ensure_ascii=False) + "\n"
+
+
+_RENDERERS = {'vtt': _vtt, 'srt': _srt, 'ndjson': _ndjson}
+
+
+def render(segments: Iterable[dict], fmt: str, origin: float) -> Iterator[bytes]:
+    """Encode segments in ``fmt``, yielding UTF-8 chunks of roughly CHUNK_SIZE bytes."""
+    buffer = []
+    size = 0
+    for piece in _RENDERERS[fmt](segments, origin):
+        data = piece.encode('utf-8')
+        buffer.append(data)
+        size += len(data)
+        if size >= CHUNK_SIZE:
+            yield b''.join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield b''.join(buffer)
+
+
+def gzip_stream(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def byte_range(chunks: Iterable[bytes], start: int, end: Optional[int] = None) -> Iterator[bytes]:
+    """Yield only bytes ``start`` through ``end`` (inclusive) of the stream."""
+    offset = 0
+    for chunk in chunks:
+        chunk_end = offset + len(chunk)
+        if chunk_end > start:
+            lo = max(0, start - offset)
+            hi = len(chunk) if end is None else min(len(chunk), end + 1 - offset)
+            if hi > lo:
+                yield chunk[lo:hi]
+        offset = chunk_end
+        if end is not None and offset > end:
+            return
+
+
+def stream_length(chunks: Iterable[bytes]) -> int:
+    return sum(len(chunk) for chunk in chunks)
+
+
+def parse_range(header: Optional[str], length: int) -> Optional[tuple]:
+    """
+    Parse a single 'bytes=start-end' range against ``length``.
+    Returns (start, end) inclusive, or None when the header is absent, malformed or asks
+    for several ranges (the full body is served then, as RFC 9110 allows); raises
+    ValueError if a well-formed range is unsatisfiable.
+    """
+    if not header:
+        return None
+    match = _RANGE_RE.fullmatch(header.strip())
+    if match is None:
+        return None
+    first, last = match.groups()
+    if first == '':
+        if last == '':
+            return None
+        # Suffix range: the last N bytes
+        count = int(last)
+        if count == 0:
+            raise ValueError("empty suffix range")
+        start, end = max(0, length - count), length - 1
+    else:
+        start = int(first)
+        if last and int(last) < start:
+            return None
+        end = min(int(last), length - 1) if last else length - 1
+    if start >= length:
+        raise ValueError("range not satisfiable")
+    return start, end
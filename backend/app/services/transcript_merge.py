@@ -0,0 +1,76 @@
+"""
+Timestamp-ordered fan-in of per-participant transcript streams.
+
+Each participant's STT stream pushes segments with an absolute timestamp and
+advances its own watermark. Segments are held in a min-heap and released once
+every active stream has moved past them, or once they have waited longer than
+``max_delay`` seconds, so reordering never adds more than that much latency.
+"""
+import heapq
+import itertools
+import threading
+import time
+from typing import Callable, Dict, List
+
+
+class TranscriptMerger:
+    """Heap-based k-way merge of transcript segments keyed by ``segment['ts']``."""
+
+    def __init__(self, emit: Callable[[dict], None], max_delay: float = 1.0):
+        self.emit = emit
+        self.max_delay = max_delay
+        self._heap: List[tuple] = []
+        self._watermarks: Dict[str, float] = {}
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        # Serializes pop+emit so concurrent flushes cannot interleave batches
+        self._emit_lock = threading.Lock()
+
+    def add_stream(self, stream_id: str, watermark: float = 0.0):
+        with self._lock:
+            self._watermarks.setdefault(stream_id, watermark)
+
+    def remove_stream(self, stream_id: str):
+        """Stop waiting on a stream; its pending segments are still emitted in order."""
+        with self._lock:
+            self._watermarks.pop(stream_id, None)
+        self.flush()
+
+    def advance(self, stream_id: str, watermark: float):
+        """Declare that ``stream_id`` will not produce segments earlier than ``watermark``."""
+        with self._lock:
+            if watermark > self._watermarks.get(stream_id, 0.0):
+                self._watermarks[stream_id] = watermark
+        self.flush()
+
+    def push(self, stream_id: str, segment: dict):
+        now = time.monotonic()
+        with self._lock:
+            heapq.heappush(self._heap, (segment['ts'], next(self._counter), now, segment))
+            if segment['ts'] > self._watermarks.get(stream_id, 0.0):
+                self._watermarks[stream_id] = segment['ts']
+        self.flush()
+
+    def _pop_ready(self, now: float, force: bool) -> List[dict]:
+        with self._lock:
+            if not self._heap:
+                return []
+            low = min(self._watermarks.values()) if self._watermarks else float('inf')
+            # Anything that has waited too long forces out everything up to its timestamp
+            deadline = now - self.max_delay
+            expired = [ts for ts, _, arrived, _ in self._heap if arrived <= deadline]
+            limit = max(low, max(expired)) if expired else low
+            ready = []
+            while self._heap and (force or self._heap[0][0] <= limit):
+                ready.append(heapq.heappop(self._heap)[3])
+            return ready
+
+    def flush(self, force: bool = False):
+        """Emit every segment that is safe to release (all of them when ``force`` is set)."""
+        with self._emit_lock:
+            for segment in self._pop_ready(time.monotonic(), force):
+                self.emit(segment)
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._heap)
@@ -1,88 +1,226 @@
-from livekit.agents import AgentSession
+from livekit import rtc
+from livekit.agents import stt as agents_stt
 from livekit.plugins import assemblyai
 import os
 import asyncio
-from typing import Callable, Optional
+import threading
+import time
+from typing import Callable, Dict, Optional
 import nest_asyncio
+from .transcript_merge import TranscriptMerger
+from ..livekit.server_sdk import generate_transcriber_token, get_room_host_async, load_livekit_config
 
 # Enable nested event loops for Flask
 nest_asyncio.apply()
 
+class _SpeakerStream:
+    """One participant's STT stream. Only exists while that participant is talking."""
+
+    def __init__(self, identity: str, track: rtc.RemoteAudioTrack, stt: assemblyai.STT,
+                 merger: TranscriptMerger, on_interim: Callable[[dict], None]):
+        self.identity = identity
+        self.last_active = time.monotonic()
+        self._merger = merger
+        self._on_interim = on_interim
+        self._stream = stt.stream()
+        self._started_at = time.time()
+        merger.add_stream(identity, self._started_at)
+        self._audio_task = asyncio.create_task(self._pump_audio(track))
+        self._events_task = asyncio.create_task(self._read_events())
+
+    async def _pump_audio(self, track: rtc.RemoteAudioTrack):
+        audio = rtc.AudioStream(track)
+        try:
+            async for event in audio:
+                self._stream.push_frame(event.frame)
+        finally:
+            await audio.aclose()
+
+    async def _read_events(self):
+        async for event in self._stream:
+            if event.type not in (agents_stt.SpeechEventType.FINAL_TRANSCRIPT,
+                                  agents_stt.SpeechEventType.INTERIM_TRANSCRIPT):
+                continue
+            if not event.alternatives or not event.alternatives[0].text:
+                continue
+
+            alt = event.alternatives[0]
+            ts = self._started_at + alt.start_time if alt.start_time else time.time()
+            segment = {
+                'text': alt.text,
+                'speaker': self.identity,
+                'final': event.type == agents_stt.SpeechEventType.FINAL_TRANSCRIPT,
+                'ts': ts,
+            }
+            if segment['final']:
+                self._merger.push(self.identity, segment)
+            else:
+                # Interim results are superseded by the final one, so they skip reordering
+                self._on_interim(segment)
+                self._merger.advance(self.identity, ts)
+
+    async def aclose(self):
+        self._audio_task.cancel()
+        self._stream.end_input()
+        try:
+            await asyncio.wait_for(self._events_task, timeout=5)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            self._events_task.cancel()
+        await self._stream.aclose()
+        self._merger.remove_stream(self.identity)
+
 class TranscriptionService:
     def __init__(self):
         self.api_key = os.getenv('ASSEMBLYAI_API_KEY')
         if not self.api_key:
             raise ValueError("ASSEMBLYAI_API_KEY environment variable is not set")
-        
-        self.livekit_host = os.getenv('LIVEKIT_HOST')
-        self.livekit_api_key = os.getenv('LIVEKIT_API_KEY')
-        self.livekit_api_secret = os.getenv('LIVEKIT_API_SECRET')
-        
-        if not all([self.livekit_host, self.livekit_api_key, self.livekit_api_secret]):
-            raise ValueError("LiveKit configuration is missing. Please set LIVEKIT_HOST, LIVEKIT_API_KEY, and LIVEKIT_API_SECRET")
-        
-        self.session = None
-        self.on_transcript: Optional[Callable[[str], None]] = None
+
+        # LIVEKIT_HOSTS alone is a valid setup; the host is resolved per room when connecting
+        livekit_config = load_livekit_config()
+        self.livekit_host = livekit_config['LIVEKIT_HOST']
+        self.livekit_api_key = livekit_config['LIVEKIT_API_KEY']
+        self.livekit_api_secret = livekit_config['LIVEKIT_API_SECRET']
+
+        if not all(livekit_config.values()):
+            raise ValueError("LiveKit configuration is missing. Please set LIVEKIT_HOST (or LIVEKIT_HOSTS), LIVEKIT_API_KEY, and LIVEKIT_API_SECRET")
+
+        # Seconds of silence before a speaker's STT stream is closed
+        self.idle_timeout = float(os.getenv('STT_IDLE_TIMEOUT', '10'))
+        # Upper bound on the latency added by timestamp reordering
+        self.max_reorder_delay = float(os.getenv('STT_MAX_REORDER_DELAY', '1.0'))
+
+        self.room: Optional[rtc.Room] = None
+        self.room_name: Optional[str] = None
+        self.on_transcript: Optional[Callable[[dict], None]] = None
+        self._stt = None
+        self._merger: Optional[TranscriptMerger] = None
+        self._tracks: Dict[str, rtc.RemoteAudioTrack] = {}
+        self._streams: Dict[str, _SpeakerStream] = {}
         self._loop = None
+        self._thread = None
+        self._reaper = None
 
-    def start_transcription(self, room_name: str, on_transcript: Callable[[str], None]) -> bool:
-        """Start transcription using LiveKit Agents with AssemblyAI"""
+    def start_transcription(self, room_name: str, on_transcript: Callable[[dict], None]) -> bool:
+        """
+        Join the room and transcribe each active speaker separately.
+        on_transcript receives {'text', 'speaker', 'final', 'ts'} segments in timestamp order.
+        """
         try:
             print('Starting transcription for room:', room_name)
             print('ASSEMBLYAI_API_KEY:', 'set' if self.api_key else 'NOT SET')
-            print('LIVEKIT_HOST:', self.livekit_host)
             print('LIVEKIT_API_KEY:', 'set' if self.livekit_api_key else 'NOT SET')
             print('LIVEKIT_API_SECRET:', 'set' if self.livekit_api_secret else 'NOT SET')
 
-            # Create event loop if it doesn't exist
-            try:
-                self._loop = asyncio.get_event_loop()
-            except RuntimeError:
-                self._loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(self._loop)
-
-            print('Creating AgentSession...')
-            self.session = AgentSession(
-                stt=assemblyai.STT(
-                    api_key=self.api_key,
-                    end_of_turn_confidence_threshold=0.7,
-                    min_end_of_turn_silence_when_confident=160,
-                    max_turn_silence=2400,
-                ),
-                turn_detection="stt"
+            self.room_name = room_name
+            self.on_transcript = on_transcript
+            self._stt = assemblyai.STT(
+                api_key=self.api_key,
+                end_of_turn_confidence_threshold=0.7,
+                min_end_of_turn_silence_when_confident=160,
+                max_turn_silence=2400,
             )
-            print('AgentSession created.')
+            self._merger = TranscriptMerger(self._handle_transcript, max_delay=self.max_reorder_delay)
 
-            self.on_transcript = on_transcript
+            # Run the room connection and STT streams on a dedicated event loop
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self._loop.run_forever,
+                                            name=f'transcription-{room_name}', daemon=True)
+            self._thread.start()
 
-            print('Setting up transcript event handler...')
-            self.session.on("transcript", self._handle_transcript)
-            print('Transcript event handler set.')
+            print('Connecting transcriber to room...')
+            asyncio.run_coroutine_threadsafe(self._connect(room_name), self._loop).result(timeout=15)
+            print('Transcriber connected.')
 
             return True
         except Exception as e:
             print(f"Error starting transcription: {e}")
             import traceback; traceback.print_exc()
-            if self.session:
-                try:
-                    self._loop.run_until_complete(self.session.leave())
-                except:
-                    pass
-                self.session = None
+            self.stop_transcription()
             return False
 
-    def _handle_transcript(self, transcript: str):
+    async def _connect(self, room_name: str):
+        self.room = rtc.Room(loop=self._loop)
+        self.room.on('track_subscribed', self._on_track_subscribed)
+        self.room.on('track_unsubscribed', self._on_track_unsubscribed)
+        self.room.on('participant_disconnected', self._on_participant_disconnected)
+        self.room.on('active_speakers_changed', self._on_active_speakers_changed)
+
+        token = generate_transcriber_token(room_name)
+        # Join on the host that owns the room, which differs per room when sharded
+        await self.room.connect(await get_room_host_async(room_name) or self.livekit_host, token)
+        self._reaper = asyncio.create_task(self._reap_idle_streams())
+
+    def _on_track_subscribed(self, track, publication, participant):
+        if track.kind == rtc.TrackKind.KIND_AUDIO:
+            self._tracks[participant.identity] = track
+
+    def _on_track_unsubscribed(self, track, publication, participant):
+        if self._tracks.get(participant.identity) is track:
+            del self._tracks[participant.identity]
+            self._close_stream(participant.identity)
+
+    def _on_participant_disconnected(self, participant):
+        self._tracks.pop(participant.identity, None)
+        self._close_stream(participant.identity)
+
+    def _on_active_speakers_changed(self, speakers):
+        now = time.monotonic()
+        for participant in speakers:
+            identity = participant.identity
+            stream = self._streams.get(identity)
+            if stream is not None:
+                stream.last_active = now
+            elif identity in self._tracks:
+                print(f'Opening STT stream for speaker: {identity}')
+                self._streams[identity] = _SpeakerStream(
+                    identity, self._tracks[identity], self._stt, self._merger, self._handle_transcript
+                )
+
+    def _close_stream(self, identity: str):
+        stream = self._streams.pop(identity, None)
+        if stream is not None:
+            print(f'Closing STT stream for speaker: {identity}')
+            asyncio.ensure_future(stream.aclose())
+
+    async def _reap_idle_streams(self):
+        """Close streams of participants who stopped talking and release stale merge output."""
+        while True:
+            await asyncio.sleep(min(1.0, self.max_reorder_delay))
+            cutoff = time.monotonic() - self.idle_timeout
+            for identity in [i for i, s in self._streams.items() if s.last_active < cutoff]:
+                self._close_stream(identity)
+            self._merger.flush()
+
+    def _handle_transcript(self, segment: dict):
         """Handle incoming transcription events"""
         if self.on_transcript:
-            self.on_transcript(transcript)
+            self.on_transcript(segment)
+
+    async def _shutdown(self):
+        if self._reaper:
+            self._reaper.cancel()
+        streams = list(self._streams.values())
+        self._streams.clear()
+        await asyncio.gather(*(s.aclose() for s in streams), return_exceptions=True)
+        if self._merger:
+            self._merger.flush(force=True)
+        if self.room:
+            await self.room.disconnect()
 
     def stop_transcription(self):
         """Stop the transcription service"""
-        if self.session:
-            try:
-                print("Stopping AgentSession (no leave method available).")
-                # No leave/close method in AgentSession; just clear the session
-            except Exception as e:
-                print(f"Error stopping transcription: {e}")
-            finally:
-                self.session = None 
\ No newline at end of file
+        if self._loop is None:
+            return
+        try:
+            print("Stopping transcription streams.")
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result(timeout=10)
+        except Exception as e:
+            print(f"Error stopping transcription: {e}")
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            if self._thread:
+                self._thread.join(timeout=5)
+            self._loop = None
+            self._thread = None
+            self.room = None
+            self._tracks.clear()
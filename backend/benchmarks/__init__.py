@@ -0,0 +1,28 @@
+"""
+Benchmark suite for the backend's hot paths.
+
+Each module is a standalone script; run it from backend/, e.g.
+
+    python -m benchmarks.bench_roster --events 200000
+
+Sizes default to something that finishes in seconds and can be raised via flags.
+"""
+import time
+
+
+def report(title: str, results: dict):
+    print(f"== {title}")
+    width = max(len(key) for key in results)
+    for key, value in results.items():
+        if isinstance(value, float):
+            value = f"{value:,.2f}"
+        elif isinstance(value, int):
+            value = f"{value:,}"
+        print(f"  {key:<{width}}  {value}")
+
+
+def timed(fn, *args, **kwargs):
+    """Run fn once and return (result, seconds)."""
+    t0 = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - t0
@@ -0,0 +1,70 @@
+"""
+Binary transcript frames vs the JSON 'transcription' payload: encode cost, bytes
+on the wire and decode cost for a caption-heavy stream.
+
+Byte counts are payload sizes. Socket.IO adds its own framing to both (the event
+name and, for binary, an attachment placeholder packet).
+"""
+import argparse
+import json
+import random
+
+from app.services.transcript_codec import TranscriptEncoder, decode_frame
+from . import report, timed
+
+WORDS = ('so the derivative of x squared is two x and we can check that with the limit '
+         'definition now let us try a harder one with the chain rule').split()
+
+
+def make_segments(count: int, speakers: int, seed: int = 1):
+    rng = random.Random(seed)
+    return [
+        {
+            'text': ' '.join(rng.choice(WORDS) for _ in range(rng.randint(3, 14))),
+            'speaker': f'participant-{rng.randrange(speakers)}',
+            'final': rng.random() < 0.3,
+            'ts': 1_700_000_000 + i * 0.25,
+        }
+        for i in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--segments', type=int, default=200000)
+    parser.add_argument('--speakers', type=int, default=2)
+    args = parser.parse_args()
+    segments = make_segments(args.segments, args.speakers)
+
+    def encode_json():
+        return [json.dumps({'text': s['text'], 'speaker': s['speaker'], 'final': s['final']}) for s in segments]
+
+    def encode_binary():
+        encoder = TranscriptEncoder(base_ts=segments[0]['ts'])
+        frames = []
+        for s in segments:
+            frames.extend(encoder.encode(s['text'], speaker=s['speaker'], final=s['final'], ts=s['ts']))
+        return frames
+
+    json_payloads, json_encode = timed(encode_json)
+    frames, binary_encode = timed(encode_binary)
+    _, json_decode = timed(lambda: [json.loads(p) for p in json_payloads])
+    _, binary_decode = timed(lambda: [decode_frame(f) for f in frames])
+
+    json_bytes = sum(len(p.encode('utf-8')) for p in json_payloads)
+    binary_bytes = sum(len(f) for f in frames)
+    n = args.segments
+    report('transcript payloads', {
+        'segments': n,
+        'json_encode_us': json_encode / n * 1e6,
+        'binary_encode_us': binary_encode / n * 1e6,
+        'json_decode_us': json_decode / n * 1e6,
+        'binary_decode_us': binary_decode / n * 1e6,
+        'json_bytes_per_segment': json_bytes / n,
+        'binary_bytes_per_segment': binary_bytes / n,
+        'binary_size_ratio': binary_bytes / json_bytes,
+    })
+
+
+if __name__ == '__main__':
+    main()
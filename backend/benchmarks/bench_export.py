@@ -0,0 +1,88 @@
+"""
+Transcript export over a long synthetic session (6 hours by default): throughput per
+format, with and without gzip, and peak memory of the streaming export next to a
+fully buffered one.
+"""
+import argparse
+import os
+import random
+import resource
+import tempfile
+import time
+import tracemalloc
+
+from app.services.store import Store
+from app.services.transcript_export import FORMATS, gzip_stream, render
+from . import report, timed
+
+WORDS = ('so the next thing we look at is how the model handles longer context windows and '
+         'whether the results hold up when we change the dataset').split()
+
+
+def populate(store: Store, room: str, hours: float, interval: float, speakers: int, seed: int = 1) -> int:
+    rng = random.Random(seed)
+    start = time.time() - hours * 3600
+    count = int(hours * 3600 / interval)
+    for i in range(count):
+        text = ' '.join(rng.choices(WORDS, k=rng.randint(6, 30)))
+        store.segment_added(room, f'speaker-{i % speakers}', text, start + i * interval + rng.random())
+    store.flush(timeout=120)
+    return count
+
+
+def export(store: Store, room: str, fmt: str, gzip: bool = False):
+    stats = store.segment_stats(room)
+    chunks = render(store.iter_segments(room, up_to_id=stats['last_id']), fmt, stats['first_ts'])
+    if gzip:
+        chunks = gzip_stream(chunks)
+    size = 0
+    for chunk in chunks:
+        size += len(chunk)
+    return size
+
+
+def peak_kib(fn) -> float:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--hours', type=float, default=6.0)
+    parser.add_argument('--interval', type=float, default=2.0, help='seconds between segments')
+    parser.add_argument('--speakers', type=int, default=4)
+    args = parser.parse_args()
+
+    store = Store(os.path.join(tempfile.mkdtemp(), 'bench.db'))
+    room = 'long-session'
+    segments = populate(store, room, args.hours, args.interval, args.speakers)
+    results = {'segments': segments}
+
+    for fmt in FORMATS:
+        size, seconds = timed(export, store, room, fmt)
+        gz_size, gz_seconds = timed(export, store, room, fmt, gzip=True)
+        results[f'{fmt}_mib'] = size / 2 ** 20
+        results[f'{fmt}_segments_per_s'] = segments / seconds
+        results[f'{fmt}_mib_per_s'] = size / 2 ** 20 / seconds
+        results[f'{fmt}_gzip_ratio'] = gz_size / size
+        results[f'{fmt}_gzip_mib_per_s'] = size / 2 ** 20 / gz_seconds
+
+    # Peak Python allocations while streaming vs. building the whole body in memory
+    results['vtt_streaming_peak_kib'] = peak_kib(lambda: export(store, room, 'vtt'))
+    stats = store.segment_stats(room)
+    results['vtt_buffered_peak_kib'] = peak_kib(
+        lambda: b''.join(render(list(store.iter_segments(room)), 'vtt', stats['first_ts']))
+    )
+    # ru_maxrss is in KiB on Linux
+    results['process_peak_rss_mib'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    store.close()
+
+    report('transcript export', results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+Health endpoint cost: per-request latency of /health, /health/ready and
+/api/livekit/health while LiveKit takes seconds to answer (they only read the
+prober's published state), next to the cost of the state reads themselves.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+# The app reads this at import time
+os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}")
+
+from app import create_app  # noqa: E402
+from app.services.health import HealthProber, get_health_prober  # noqa: E402
+from . import report, timed  # noqa: E402
+
+
+class SlowRoomService:
+    """LiveKit that takes ``delay`` seconds to list rooms."""
+
+    host = 'slow'
+
+    def __init__(self, delay: float):
+        self.delay = delay
+
+    async def list_room_details_async(self):
+        await asyncio.sleep(self.delay)
+        return []
+
+
+def per_request_us(client, path: str, requests: int) -> float:
+    def loop():
+        for _ in range(requests):
+            client.get(path)
+    _, seconds = timed(loop)
+    return seconds / requests * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--upstream-delay', type=float, default=2.0)
+    args = parser.parse_args()
+
+    app = create_app()
+    client = app.test_client()
+    slow = SlowRoomService(args.upstream_delay)
+    get_health_prober().room_service = slow
+
+    results = {'upstream_delay_s': args.upstream_delay}
+    for path in ('/health', '/health/ready', '/api/livekit/health'):
+        results[f'{path}_us'] = per_request_us(client, path, args.requests)
+
+    prober = HealthProber(slow)
+    loop = asyncio.new_event_loop()
+    prober.probe_once(loop)
+    loop.close()
+    calls = 100000
+    t0 = time.perf_counter()
+    for _ in range(calls):
+        prober.state()
+        prober.is_live()
+    results['state_read_us'] = (time.perf_counter() - t0) / calls * 1e6
+
+    report('health endpoints', results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""
+Roster update throughput: simulated participant join/leave events applied to the
+cache with a change-feed listener attached, plus delta reads by polling clients.
+"""
+import argparse
+import random
+
+from app.services.roster import RosterCache
+from . import report, timed
+
+
+def simulate(roster: RosterCache, rooms: int, events: int, seed: int = 1):
+    rng = random.Random(seed)
+    present = [set() for _ in range(rooms)]
+    for i in range(events):
+        r = rng.randrange(rooms)
+        room = f'room-{r}'
+        if present[r] and rng.random() < 0.5:
+            identity = present[r].pop()
+            roster.participant_left(room, identity)
+        else:
+            identity = f'user-{i}'
+            present[r].add(identity)
+            roster.participant_joined(room, identity, identity, i)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rooms', type=int, default=1000)
+    parser.add_argument('--events', type=int, default=200000)
+    args = parser.parse_args()
+
+    roster = RosterCache()
+    pushed = []
+    roster.add_listener(lambda room, delta: pushed.append(delta['version']))
+    _, seconds = timed(simulate, roster, args.rooms, args.events)
+
+    rooms = [f'room-{r}' for r in range(args.rooms)]
+    reads = args.events // 4
+    _, read_seconds = timed(lambda: [roster.changes_since(rooms[i % len(rooms)], 0) for i in range(reads)])
+
+    report('roster updates', {
+        'rooms': args.rooms,
+        'events': args.events,
+        'events_per_second': args.events / seconds,
+        'us_per_event': seconds / args.events * 1e6,
+        'deltas_pushed': len(pushed),
+        'delta_reads_per_second': reads / read_seconds,
+    })
+
+
+if __name__ == '__main__':
+    main()
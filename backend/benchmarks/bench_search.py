@@ -0,0 +1,96 @@
+"""
+Transcript search latency on a large synthetic corpus with a Zipf-like vocabulary:
+p50/p99 per query shape, globally and scoped to one room, and how long the indexer
+is held up by queries running next to it.
+
+The corpus is sized in session-hours: at roughly 150 spoken words a minute, a final
+segment of 4-20 words covers about five seconds of a session. The default, 10,000
+session-hours, is some 7.2M segments and needs a few GB of memory and minutes to build.
+"""
+import argparse
+import itertools
+import random
+import threading
+import time
+
+from app.services.search_index import TranscriptIndex
+from . import report, timed
+
+QUERIES = {
+    'common_and_rare': 'w0 w{rare}',
+    'two_common': 'w0 w1',
+    'phrase': '"w0 w1"',
+    'prefix': 'w1* w2',
+}
+
+
+def build_corpus(segments: int, vocab: int, rooms: int, seed: int = 1, first: int = 1):
+    """Yield (doc, room, text) rows; a generator, so the corpus is never held in memory."""
+    rng = random.Random(seed)
+    words = [f'w{i}' for i in range(vocab)]
+    cum_weights = list(itertools.accumulate(1 / (i + 1) for i in range(vocab)))
+    for doc in range(first, first + segments):
+        yield (doc, f'room-{rng.randrange(rooms)}',
+               ' '.join(rng.choices(words, cum_weights=cum_weights, k=rng.randint(4, 20))))
+
+
+def latencies(index: TranscriptIndex, query: str, room_name, runs: int):
+    samples = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        index.search_ids(query, room_name)
+        samples.append(time.perf_counter() - t0)
+    samples.sort()
+    return samples[len(samples) // 2] * 1000, samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--session-hours', type=float, default=10000)
+    parser.add_argument('--segment-seconds', type=float, default=5.0)
+    parser.add_argument('--vocab', type=int, default=20000)
+    parser.add_argument('--rooms', type=int, default=500)
+    parser.add_argument('--runs', type=int, default=20)
+    args = parser.parse_args()
+
+    segments = int(args.session_hours * 3600 / args.segment_seconds)
+    index = TranscriptIndex(store=None)
+
+    def build():
+        for row in build_corpus(segments, args.vocab, args.rooms):
+            index._add(*row)
+
+    _, build_seconds = timed(build)
+
+    results = {'session_hours': f'{segments * args.segment_seconds / 3600:,.0f}',
+               'segments': segments, 'index_build_s': build_seconds}
+    rare = args.vocab // 2
+    for name, query in QUERIES.items():
+        query = query.format(rare=rare)
+        p50, p99 = latencies(index, query, None, args.runs)
+        results[f'{name}_p50_ms'], results[f'{name}_p99_ms'] = p50, p99
+        p50, p99 = latencies(index, query, 'room-7', args.runs)
+        results[f'{name}_room_p50_ms'], results[f'{name}_room_p99_ms'] = p50, p99
+
+    # Indexing next to a steady stream of broad queries
+    extra = list(build_corpus(20000, args.vocab, args.rooms, seed=2, first=segments + 1))
+    stop = threading.Event()
+
+    def query_loop():
+        while not stop.is_set():
+            index.search_ids('"w0 w1"')
+
+    searchers = [threading.Thread(target=query_loop) for _ in range(4)]
+    for t in searchers:
+        t.start()
+    _, add_seconds = timed(lambda: [index._add(*row) for row in extra])
+    stop.set()
+    for t in searchers:
+        t.join()
+    results['index_under_query_load_per_s'] = len(extra) / add_seconds
+
+    report('transcript search', results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Embedded store: sustained write throughput through the group-committing writer,
+and read latency from the connection pool while writers and readers run
+concurrently (as they do under API load).
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+
+from app.services.store import Store
+from . import report
+
+
+def percentile(samples, p):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(p * len(samples)))] if samples else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--writers', type=int, default=8)
+    parser.add_argument('--writes', type=int, default=100000, help='total writes across all writers')
+    parser.add_argument('--readers', type=int, default=16)
+    parser.add_argument('--rooms', type=int, default=200)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    store = Store(path)
+    rooms = [f'room-{i}' for i in range(args.rooms)]
+    for room in rooms:
+        store.room_created(room, 2)
+        store.session_started(room, 'bench', time.time())
+    store.flush()
+
+    stop = threading.Event()
+    latencies = []
+    latency_lock = threading.Lock()
+
+    def reader(seed):
+        rng = random.Random(seed)
+        local = []
+        while not stop.is_set():
+            room = rng.choice(rooms)
+            t0 = time.perf_counter()
+            op = rng.random()
+            if op < 0.4:
+                store.get_room(room)
+            elif op < 0.7:
+                store.session_history(room_name=room, limit=20)
+            else:
+                list(store.iter_segments(room, batch_size=200))
+            local.append(time.perf_counter() - t0)
+        with latency_lock:
+            latencies.extend(local)
+
+    def writer(seed, count):
+        rng = random.Random(seed)
+        for i in range(count):
+            store.segment_added(rng.choice(rooms), 'speaker', f'segment {seed}-{i} of the lesson', time.time())
+
+    readers = [threading.Thread(target=reader, args=(i,)) for i in range(args.readers)]
+    for t in readers:
+        t.start()
+
+    per_writer = args.writes // args.writers
+    writers = [threading.Thread(target=writer, args=(i, per_writer)) for i in range(args.writers)]
+    t0 = time.perf_counter()
+    for t in writers:
+        t.start()
+    for t in writers:
+        t.join()
+    store.flush(timeout=120)
+    write_seconds = time.perf_counter() - t0
+
+    stop.set()
+    for t in readers:
+        t.join()
+    store.close()
+
+    written = per_writer * args.writers
+    report('store', {
+        'writes': written,
+        'writes_per_second': written / write_seconds,
+        'reader_threads': args.readers,
+        'read_pool_size': store.read_pool_size,
+        'reads': len(latencies),
+        'read_p50_ms': percentile(latencies, 0.5) * 1000,
+        'read_p99_ms': percentile(latencies, 0.99) * 1000,
+    })
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""
+Tracing and profiling overhead: cost per call of a traced function and of a span()
+block with tracing disabled and enabled (against an untraced baseline), the enabled
+cost under thread contention, and how much a CPU-bound thread slows down while the
+sampling profiler runs next to it.
+"""
+import argparse
+import asyncio
+import threading
+import time
+
+from app.services.profiler import SamplingProfiler
+from app.services.tracing import Tracer
+from . import report, timed
+
+
+def work(x):
+    return x + 1
+
+
+def per_call_ns(fn, calls: int) -> float:
+    def loop():
+        for i in range(calls):
+            fn(i)
+    _, seconds = timed(loop)
+    return seconds / calls * 1e9
+
+
+def contended_ns(fn, calls: int, threads: int) -> float:
+    def loop():
+        for i in range(calls):
+            fn(i)
+    workers = [threading.Thread(target=loop) for _ in range(threads)]
+    t0 = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    return (time.perf_counter() - t0) / (calls * threads) * 1e9
+
+
+def cpu_rate(seconds: float) -> float:
+    """Loop iterations per second of a busy thread over ``seconds``."""
+    count = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        for _ in range(1000):
+            count += 1
+    return count / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--calls', type=int, default=500000)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--profile-seconds', type=float, default=2.0)
+    args = parser.parse_args()
+
+    tracer = Tracer(enabled=False)
+    traced_work = tracer.traced('bench.work')(work)
+
+    @tracer.traced('bench.async_work')
+    async def async_work(x):
+        return x + 1
+
+    def span_work(x):
+        with tracer.span('bench.span'):
+            return x + 1
+
+    def run_async(calls):
+        async def loop():
+            for i in range(calls):
+                await async_work(i)
+        _, seconds = timed(asyncio.run, loop())
+        return seconds / calls * 1e9
+
+    per_call_ns(work, args.calls)  # warm up
+    results = {'baseline_ns': per_call_ns(work, args.calls)}
+    for state in ('disabled', 'enabled'):
+        tracer.enabled = state == 'enabled'
+        results[f'traced_{state}_ns'] = per_call_ns(traced_work, args.calls)
+        results[f'span_{state}_ns'] = per_call_ns(span_work, args.calls)
+        results[f'async_traced_{state}_ns'] = run_async(args.calls // 5)
+    results[f'traced_enabled_{args.threads}_threads_ns'] = contended_ns(traced_work, args.calls // args.threads,
+                                                                         args.threads)
+    tracer.enabled = False
+
+    # Sampling profiler: slowdown of a busy thread while a profile runs
+    def busy_rate(profiled: bool):
+        rates = []
+        busy = threading.Thread(target=lambda: rates.append(cpu_rate(args.profile_seconds)))
+        busy.start()
+        profile = SamplingProfiler().profile(args.profile_seconds, interval=0.01) if profiled else None
+        busy.join()
+        return rates[0], profile
+
+    # Unprofiled runs on both sides to even out clock and cache effects
+    before, _ = busy_rate(False)
+    profiled_rate, profile = busy_rate(True)
+    after, _ = busy_rate(False)
+    idle_rate = (before + after) / 2
+    results['profiler_samples'] = profile['samples']
+    results['profiler_busy_thread_slowdown_pct'] = (1 - profiled_rate / idle_rate) * 100
+
+    report('tracing overhead', results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,28 @@
+import os
+import tempfile
+
+import pytest
+
+# Keep the embedded store out of the source tree; must be set before the app is imported
+os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'test.db')}")
+# Tests claim checkpointed sessions themselves rather than racing the app's poller
+os.environ.setdefault('DRAIN_RESUME_INTERVAL', '3600')
+
+
+@pytest.fixture(scope='session')
+def app():
+    from app import create_app
+    return create_app()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture(autouse=True)
+def reset_rate_limits():
+    # Every test client shares one address, so start each test with fresh buckets
+    from app.services.rate_limiter import client_limiter, ip_limiter
+    ip_limiter._buckets.clear()
+    client_limiter._buckets.clear()
@@ -0,0 +1,82 @@
+import math
+import time
+
+import pytest
+
+from app.routes import transcription as transcription_routes
+from app.routes.transcription import hand_off_sessions, resume_checkpointed_sessions, socketio
+from app.services.drain import DrainController, drain_controller
+from app.services.session_registry import session_registry
+from app.services.store import get_store
+
+
+class _Service:
+    def __init__(self):
+        self.stopped = False
+
+    def stop_transcription(self):
+        self.stopped = True
+
+
+@pytest.mark.parametrize('timeout', ['abc', '', -1, 0, '0', True, math.nan, math.inf, [30], {}])
+def test_bad_timeout_leaves_node_serving(timeout):
+    controller = DrainController(on_exit=lambda: None)
+    with pytest.raises(ValueError):
+        controller.start(timeout=timeout)
+    assert not controller.draining and controller.deadline is None
+
+
+def test_admin_drain_rejects_bad_timeout(app, client, monkeypatch):
+    monkeypatch.setitem(app.config, 'ADMIN_TOKEN', 'secret')
+    response = client.post('/api/admin/drain', json={'timeout': 'soon'},
+                           headers={'Authorization': 'Bearer secret'})
+    assert response.status_code == 400
+    assert not drain_controller.draining
+
+
+def test_polls_run_until_idle_then_final_steps():
+    exited = []
+    remaining = [3]
+    controller = DrainController(on_exit=lambda: exited.append(True))
+
+    def poll():
+        remaining[0] -= 1
+        return 1
+
+    controller.add_poll('handed_off', poll)
+    controller.add_final_step('checkpointed', lambda: remaining[0])
+    controller.add_idle_check(lambda: remaining[0] == 0)
+    assert controller.start(timeout='5')
+
+    deadline = time.time() + 5
+    while not exited and time.time() < deadline:
+        time.sleep(0.05)
+    assert exited
+    assert controller.stats['handed_off'] == 3
+    assert controller.stats['checkpointed'] == 0
+    assert controller.stats['idle'] is True
+
+
+def test_session_is_handed_off_once_its_clients_leave(app, monkeypatch):
+    service = _Service()
+    entry, _ = session_registry.start('handoff-room', lambda: service)
+    get_store().session_started('handoff-room', entry.worker, entry.started_at)
+    socket = socketio.test_client(app)
+    socket.emit('join_room', {'room_name': 'handoff-room'})
+    try:
+        assert hand_off_sessions() == 0
+        assert not service.stopped
+    finally:
+        socket.disconnect()
+
+    assert hand_off_sessions() == 1
+    assert service.stopped and 'handoff-room' not in session_registry
+
+    resumed = []
+    monkeypatch.setattr(transcription_routes, 'start_room_transcription',
+                        lambda room: (resumed.append(room) or object(), True))
+    assert resume_checkpointed_sessions() == 1
+    assert resumed == ['handoff-room']
+    # A checkpoint is claimed once
+    assert resume_checkpointed_sessions() == 0
+    assert not get_store().claim_checkpointed_sessions(60)
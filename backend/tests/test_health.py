@@ -0,0 +1,147 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.services.health import HealthProber, get_health_prober
+
+
+class _RoomService:
+    """Stand-in LiveKit room API whose listing can fail or stall, recording the calling threads."""
+
+    host = 'lk-1'
+
+    def __init__(self, error=None, delay=0.0):
+        self.error = error
+        self.delay = delay
+        self.callers = []
+
+    async def list_room_details_async(self):
+        self.callers.append(threading.current_thread())
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return [{'name': 'room-1', 'num_participants': 1, 'creation_time': 0}]
+
+
+@pytest.fixture(autouse=True)
+def no_stt(monkeypatch):
+    # Without a key the prober skips STT rather than opening a socket
+    monkeypatch.delenv('ASSEMBLYAI_API_KEY', raising=False)
+
+
+def _probe(prober, times=1):
+    loop = asyncio.new_event_loop()
+    try:
+        for _ in range(times):
+            prober.probe_once(loop)
+    finally:
+        loop.close()
+    return prober.state()
+
+
+def test_ready_after_a_successful_probe():
+    state = _probe(HealthProber(_RoomService()))
+    assert state['ready'] and state['rooms_count'] == 1
+    assert state['livekit']['lk-1']['ok']
+
+
+def test_failed_probe_flips_readiness():
+    service = _RoomService()
+    prober = HealthProber(service)
+    assert _probe(prober)['ready']
+    service.error = RuntimeError('connection refused')
+    state = _probe(prober)
+    assert not state['ready']
+    assert state['not_ready_reasons'] == ['livekit lk-1 unreachable']
+    assert state['livekit']['lk-1']['last_error'] == 'connection refused'
+
+
+def test_probe_timeout_flips_readiness():
+    service = _RoomService(delay=1.0)
+    t0 = time.perf_counter()
+    state = _probe(HealthProber(service, timeout=0.05))
+    assert time.perf_counter() - t0 < 0.5
+    assert not state['ready']
+    assert state['livekit']['lk-1']['last_error'] == 'timeout'
+
+
+def test_error_rate_above_limit_flips_readiness():
+    service = _RoomService(error=RuntimeError('connection refused'))
+    prober = HealthProber(service, window=4, max_error_rate=0.5)
+    _probe(prober, times=2)
+    service.error = None
+    state = _probe(prober)
+    # The latest probe succeeded, but two of the last three failed
+    assert state['livekit']['lk-1']['ok']
+    assert state['livekit']['lk-1']['error_rate'] == pytest.approx(0.667)
+    assert not state['ready'] and state['not_ready_reasons'] == ['livekit lk-1 error rate 0.667']
+    state = _probe(prober, times=3)
+    assert state['ready']
+
+
+def test_failed_readiness_check_flips_readiness():
+    prober = HealthProber(_RoomService())
+    draining = False
+    prober.add_readiness_check('draining', lambda: not draining)
+    assert _probe(prober)['ready']
+    draining = True
+    assert _probe(prober)['not_ready_reasons'] == ['draining']
+
+
+def test_stale_heartbeat_is_not_live():
+    stalled = threading.Event()
+    release = threading.Event()
+
+    def check():
+        if stalled.is_set():
+            release.wait()
+        return True
+
+    prober = HealthProber(_RoomService(), interval=0.01, timeout=0.01)
+    prober.add_readiness_check('stall', check)
+    assert not prober.is_live()  # the thread is not running yet
+    prober.start()
+    time.sleep(0.1)
+    assert prober.is_live()
+
+    stalled.set()
+    time.sleep(0.2)
+    assert not prober.is_live()
+
+    # Let the thread finish its cycle and then sleep out the rest of the session
+    prober.interval = 3600
+    release.set()
+
+
+@pytest.fixture
+def unhealthy(app, monkeypatch):
+    """Point the app's prober at a LiveKit that never answers and publish a not-ready state."""
+    prober = get_health_prober()
+    service = _RoomService(delay=10.0)
+    monkeypatch.setattr(prober, 'room_service', service)
+    state = _probe(HealthProber(_RoomService(error=RuntimeError('connection refused'))))
+    monkeypatch.setattr(prober, 'state', lambda: state)
+    return service
+
+
+@pytest.mark.parametrize('path', ['/api/livekit/health', '/health/ready'])
+def test_endpoints_answer_from_state_alone(client, unhealthy, path):
+    t0 = time.perf_counter()
+    response = client.get(path)
+    elapsed = time.perf_counter() - t0
+    assert response.status_code == 503
+    assert threading.current_thread() not in unhealthy.callers
+    assert elapsed < 0.5
+
+
+def test_state_reads_take_microseconds():
+    prober = HealthProber(_RoomService())
+    _probe(prober)
+    calls = 10000
+    t0 = time.perf_counter()
+    for _ in range(calls):
+        prober.state()
+        prober.is_live()
+    assert (time.perf_counter() - t0) / calls < 100e-6
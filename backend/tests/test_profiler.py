@@ -0,0 +1,51 @@
+import threading
+import time
+
+import pytest
+
+from app.services.profiler import ProfilerBusy, SamplingProfiler
+
+
+def _spin(stop):
+    while not stop.is_set():
+        sum(range(100))
+
+
+def _idle(stop):
+    stop.wait()
+
+
+@pytest.fixture
+def threads():
+    stop = threading.Event()
+    workers = [threading.Thread(target=_spin, args=(stop,)), threading.Thread(target=_idle, args=(stop,))]
+    for t in workers:
+        t.start()
+    yield
+    stop.set()
+    for t in workers:
+        t.join()
+
+
+def test_busy_thread_shows_up_and_idle_one_does_not(threads):
+    result = SamplingProfiler().profile(0.2, interval=0.005)
+    assert result['samples'] > 0
+    assert '_spin (' in result['collapsed']
+    assert '_idle (' not in result['collapsed']
+
+
+def test_include_idle_keeps_blocked_threads(threads):
+    result = SamplingProfiler().profile(0.1, interval=0.005, include_idle=True)
+    assert '_idle (' in result['collapsed']
+
+
+def test_concurrent_profile_is_refused():
+    profiler = SamplingProfiler()
+    first = threading.Thread(target=profiler.profile, args=(0.3,))
+    first.start()
+    while not profiler.running:
+        time.sleep(0.001)
+    with pytest.raises(ProfilerBusy):
+        profiler.profile(0.1)
+    first.join()
+    assert not profiler.running
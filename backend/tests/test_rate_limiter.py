@@ -0,0 +1,23 @@
+from app.services.rate_limiter import TokenBucketLimiter
+
+
+def test_bucket_allows_burst_then_reports_wait():
+    limiter = TokenBucketLimiter(rate=1, burst=3)
+    assert [limiter.acquire('k')[0] for _ in range(3)] == [True, True, True]
+    allowed, wait = limiter.acquire('k')
+    assert not allowed and 0 < wait <= 1
+
+
+def test_bucket_evicts_least_recently_used_keys():
+    limiter = TokenBucketLimiter(rate=1, burst=1, max_keys=2)
+    for key in ('a', 'b', 'c'):
+        limiter.acquire(key)
+    assert len(limiter) == 2
+
+
+def test_spoofed_forwarded_for_does_not_get_a_fresh_bucket(client):
+    codes = [
+        client.get('/api/livekit/generate-room-name', headers={'X-Forwarded-For': f'10.0.0.{i}'}).status_code
+        for i in range(50)
+    ]
+    assert 429 in codes
@@ -0,0 +1,126 @@
+import asyncio
+
+import pytest
+
+from app.livekit.sharding import ShardedRoomService
+from app.services.reaper import ORPHAN_CONFIRMATIONS, Reaper
+
+
+class _RoomService:
+    """Stand-in LiveKit room API that records deletions and how many ran at once."""
+
+    def __init__(self, rooms=None, list_error=None, list_delay=0.0, delete_delay=0.0):
+        self.rooms = dict(rooms or {})  # name -> participants
+        self.list_error = list_error
+        self.list_delay = list_delay
+        self.delete_delay = delete_delay
+        self.deleted = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def list_room_details_async(self):
+        await asyncio.sleep(self.list_delay)
+        if self.list_error:
+            raise self.list_error
+        return [{'name': name, 'num_participants': n, 'creation_time': 0} for name, n in self.rooms.items()]
+
+    async def delete_room_async(self, name):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delete_delay)
+            self.rooms.pop(name, None)
+            self.deleted.append(name)
+            return {'name': name, 'status': 'deleted'}
+        finally:
+            self.in_flight -= 1
+
+
+def _reaper(service, sessions=(), **kwargs):
+    reaper = Reaper(service, idle_timeout=0, **kwargs)
+    live = set(sessions)
+    stopped = []
+
+    def stop(room_name):
+        live.discard(room_name)
+        stopped.append(room_name)
+        return True
+
+    reaper.track_sessions(lambda: set(live), stop)
+    return reaper, stopped
+
+
+def test_deletes_idle_rooms_only():
+    service = _RoomService({'empty': 0, 'busy': 2})
+    reaper, _ = _reaper(service)
+    result = reaper.run_once()
+    assert service.deleted == ['empty']
+    assert result['rooms_deleted'] == 1 and result['rooms_listed'] == 2
+
+
+def test_idle_timeout_starts_when_room_is_first_seen_empty():
+    service = _RoomService({'empty': 0})
+    reaper, _ = _reaper(service)
+    reaper.idle_timeout = 3600
+    reaper.run_once()
+    assert service.deleted == []
+    assert reaper.stats()['tracking_empty'] == 1
+
+
+def test_deletions_are_bounded():
+    service = _RoomService({f'room-{i}': 0 for i in range(20)}, delete_delay=0.01)
+    reaper, _ = _reaper(service, concurrency=3)
+    assert reaper.run_once()['rooms_deleted'] == 20
+    assert service.max_in_flight == 3
+
+
+@pytest.mark.parametrize('service, error', [
+    (_RoomService({'empty': 0}, list_error=RuntimeError('unreachable')), 'unreachable'),
+    (_RoomService({'empty': 0}, list_delay=1.0), 'timeout'),
+])
+def test_failed_listing_reaps_nothing(service, error):
+    reaper, stopped = _reaper(service, sessions=['orphan'], list_timeout=0.05)
+    for _ in range(ORPHAN_CONFIRMATIONS + 1):
+        assert reaper.run_once()['error'] == error
+    assert service.deleted == [] and stopped == []
+    assert reaper.totals['failures'] == ORPHAN_CONFIRMATIONS + 1
+
+
+def test_orphaned_session_needs_consecutive_confirmations():
+    service = _RoomService({'busy': 1})
+    reaper, stopped = _reaper(service, sessions=['busy', 'gone'])
+
+    reaper.run_once()
+    assert stopped == []
+    # Seen again in between: the count starts over
+    service.rooms['gone'] = 1
+    reaper.run_once()
+    del service.rooms['gone']
+    reaper.run_once()
+    assert stopped == []
+
+    assert reaper.run_once()['sessions_stopped'] == 1
+    assert stopped == ['gone']
+
+
+def test_session_of_a_deleted_room_stops_in_the_same_pass():
+    service = _RoomService({'empty': 0})
+    reaper, stopped = _reaper(service, sessions=['empty'])
+    reaper.run_once()
+    assert stopped == ['empty']
+
+
+def test_sharded_listing_with_a_failed_host_reaps_nothing():
+    hosts = {'wss://a': _RoomService({'idle-a': 0}), 'wss://b': _RoomService({'lesson': 0})}
+    service = ShardedRoomService({host: 1 for host in hosts}, 'key', 'secret')
+    service.services = hosts
+    asyncio.run(service.refresh_load_async(force=True))
+
+    # Students join 'lesson', then host b stops answering listings
+    hosts['wss://b'].rooms['lesson'] = 2
+    hosts['wss://b'].list_error = RuntimeError('connection refused')
+    reaper, stopped = _reaper(service, sessions=['lesson'])
+    for _ in range(ORPHAN_CONFIRMATIONS + 1):
+        assert 'wss://b' in reaper.run_once()['error']
+    assert hosts['wss://a'].deleted == [] and hosts['wss://b'].deleted == []
+    assert stopped == []
@@ -0,0 +1,90 @@
+import asyncio
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.livekit import server_sdk
+from app.services.room_names import RoomNameAllocator, room_names
+
+THREADS = 64
+
+
+def test_concurrent_claims_of_one_name_have_one_winner():
+    allocator = RoomNameAllocator()
+    for round_ in range(20):
+        name = f'room-{round_}'
+        start = threading.Barrier(THREADS)
+
+        def claim():
+            start.wait()
+            return allocator.claim(name)
+
+        with ThreadPoolExecutor(THREADS) as pool:
+            results = list(pool.map(lambda _: claim(), range(THREADS)))
+        assert results.count(True) == 1
+    stats = allocator.stats()
+    assert stats['claims'] == 20 and stats['claims_lost'] == 20 * (THREADS - 1)
+
+
+def test_allocate_skips_live_and_reserved_names():
+    # Two letters and three characters leave only eight possible names
+    allocator = RoomNameAllocator(length=3, batch_size=16, alphabet='ab')
+    every_name = {''.join(chars) for chars in itertools.product('ab', repeat=3)}
+    live = sorted(every_name)[:4]
+    for name in live:
+        allocator.mark_live(name)
+
+    allocated = [allocator.allocate() for _ in range(3)]
+    assert len(set(allocated)) == 3
+    assert not set(allocated) & set(live)
+    assert allocator.stats()['collisions'] > 0
+
+    # The last free name is taken too: nothing is left to hand out
+    allocator.claim((every_name - set(live) - set(allocated)).pop())
+    with pytest.raises(RuntimeError):
+        allocator.allocate()
+
+
+def test_reservations_expire():
+    allocator = RoomNameAllocator(length=3, batch_size=16, alphabet='ab', reservation_ttl=0.05)
+    first = [allocator.allocate() for _ in range(8)]
+    assert len(set(first)) == 8 and allocator.stats()['reserved'] == 8
+    time.sleep(0.1)
+    # Every name is free again once the reservations have lapsed
+    assert allocator.allocate() in first
+    assert allocator.stats()['reserved'] == 1
+
+
+def test_sync_keeps_names_marked_live_after_the_listing():
+    allocator = RoomNameAllocator()
+    allocator.mark_live('closed')
+    time.sleep(0.001)
+    listed_at = time.monotonic()
+    time.sleep(0.001)
+    allocator.mark_live('just-created')
+    assert allocator.sync(['listed'], listed_at) == 1
+    assert not allocator.is_live('closed')
+    assert allocator.is_live('just-created') and allocator.is_live('listed')
+
+
+@pytest.mark.parametrize('create', ['raises', 'returns_error'])
+def test_failed_create_releases_the_claim(monkeypatch, create):
+    async def create_room_async(name, **kwargs):
+        if create == 'raises':
+            raise RuntimeError('livekit unreachable')
+        return {'status': 'error', 'error': 'livekit unreachable'}
+
+    monkeypatch.setattr(server_sdk, 'create_room_async', create_room_async)
+    name = f'failed-create-{create}'
+    if create == 'raises':
+        with pytest.raises(RuntimeError):
+            asyncio.run(server_sdk.start_session('alice', name))
+    else:
+        assert asyncio.run(server_sdk.start_session('alice', name))['status'] == 'error'
+    assert not room_names.is_live(name)
+    # The next caller gets to create the room rather than joining one that does not exist
+    assert room_names.claim(name)
+    room_names.release(name)
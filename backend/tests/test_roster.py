@@ -0,0 +1,67 @@
+import pytest
+
+from app.routes import livekit as livekit_routes
+from app.services.roster import RosterCache
+
+
+def test_deltas_carry_increasing_versions():
+    roster = RosterCache()
+    first = roster.participant_joined('r', 'a')
+    second = roster.participant_joined('r', 'b')
+    roster.participant_left('r', 'a')
+    assert first['version'] < second['version']
+    assert [d['op'] for d in roster.changes_since('r', first['version'])] == ['joined', 'left']
+    assert [p['identity'] for p in roster.snapshot('r')['participants']] == ['b']
+
+
+def test_reopened_room_never_reuses_versions():
+    roster = RosterCache()
+    old = roster.participant_joined('r', 'a')['version']
+    roster.room_finished('r')
+    assert roster.participant_joined('r', 'b')['version'] > old
+
+
+def test_change_log_overflow_forces_snapshot():
+    roster = RosterCache(max_changes=2)
+    v = roster.participant_joined('r', 'a')['version']
+    for identity in 'bcd':
+        roster.participant_joined('r', identity)
+    assert roster.changes_since('r', v - 1) is None
+
+
+class _ListingStub:
+    def __init__(self, result):
+        self.result = result
+        self.calls = 0
+
+    async def list_participants_async(self, room_name):
+        self.calls += 1
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+
+@pytest.fixture
+def listing(monkeypatch):
+    def install(result):
+        stub = _ListingStub(result)
+        monkeypatch.setattr(livekit_routes, 'room_service', stub)
+        monkeypatch.setattr(livekit_routes, 'roster', RosterCache())
+        return stub
+    return install
+
+
+def test_empty_room_is_listed_once(client, listing):
+    stub = listing([])
+    for _ in range(3):
+        response = client.get('/api/livekit/rooms/empty-room/participants')
+        assert response.status_code == 200
+        assert response.get_json()['participants'] == []
+    assert stub.calls == 1
+
+
+def test_listing_failure_is_reported_and_not_cached(client, listing):
+    stub = listing(RuntimeError('connection refused'))
+    assert client.get('/api/livekit/rooms/r1/participants').status_code == 500
+    assert client.get('/api/livekit/rooms/r1/participants').status_code == 500
+    assert stub.calls == 2
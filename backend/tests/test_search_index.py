@@ -0,0 +1,108 @@
+import random
+import threading
+
+from app.services.search_index import _QUERY_RE, SKIP_INTERVAL, TranscriptIndex, _TermView, tokenize
+
+VOCAB = ['alpha', 'beta', 'gamma', 'delta', 'alps', 'alpine', 'bet', 'omega', 'rare']
+ROOMS = ['room-a', 'room-b', 'room-c']
+
+
+def _corpus(n, seed=3):
+    rng = random.Random(seed)
+    docs = {}
+    doc = 0
+    for _ in range(n):
+        doc += rng.randint(1, 3)
+        words = rng.choices(VOCAB[:-1], k=rng.randint(1, 12))
+        if rng.random() < 0.01:
+            words.append('rare')
+        docs[doc] = (rng.choice(ROOMS), ' '.join(words))
+    return docs
+
+
+def _index(docs):
+    index = TranscriptIndex(store=None)
+    for doc, (room, text) in docs.items():
+        index._add(doc, room, text)
+    return index
+
+
+def _brute_force(docs, query, room_name):
+    def clause_matches(clause, tokens):
+        if clause.endswith('*'):
+            return any(t.startswith(clause[:-1]) for t in tokens)
+        words = tokenize(clause)
+        return any(tokens[i:i + len(words)] == words for i in range(len(tokens)))
+
+    clauses = [phrase or word for phrase, word in _QUERY_RE.findall(query)]
+    hits = [doc for doc, (room, text) in docs.items()
+            if (room_name is None or room == room_name)
+            and all(clause_matches(c, tokenize(text)) for c in clauses)]
+    return sorted(hits, reverse=True)
+
+
+QUERIES = ['alpha', 'rare', 'alpha beta', 'rare gamma', 'al*', 'alp* omega', '"alpha beta"',
+           '"beta gamma delta" omega', '"alpha alpha"', 'missing', 'rare al*', 'bet* "gamma delta"']
+
+
+def test_matches_brute_force():
+    docs = _corpus(20 * SKIP_INTERVAL)
+    index = _index(docs)
+    for query in QUERIES:
+        for room in [None] + ROOMS:
+            assert index.search_ids(query, room, limit=10 ** 6) == _brute_force(docs, query, room), (query, room)
+
+
+def test_limit_returns_the_newest_matches():
+    docs = _corpus(20 * SKIP_INTERVAL)
+    index = _index(docs)
+    for query in QUERIES:
+        for room in [None] + ROOMS:
+            expected = _brute_force(docs, query, room)
+            for limit in (1, 5, 20):
+                assert index.search_ids(query, room, limit=limit) == expected[:limit], (query, room, limit)
+
+
+def test_limit_stops_early(monkeypatch):
+    docs = _corpus(200 * SKIP_INTERVAL)
+    index = _index(docs)
+    walked = []
+    entries = _TermView.entries
+
+    def counting_entries(view, lo=0, hi=None):
+        for entry in entries(view, lo, hi):
+            walked.append(entry)
+            yield entry
+
+    monkeypatch.setattr(_TermView, 'entries', counting_entries)
+    assert index.search_ids('alpha', limit=5) == _brute_force(docs, 'alpha', None)[:5]
+    assert len(walked) < len(docs) // 10
+
+
+def test_unknown_room_and_empty_query():
+    index = _index(_corpus(50))
+    assert index.search_ids('alpha', 'nowhere') == []
+    assert index.search_ids('') == []
+    assert index.search_ids('!!!') == []
+
+
+def test_search_while_indexing():
+    docs = _corpus(5000, seed=9)
+    index = _index({})
+    errors = []
+
+    def search():
+        try:
+            for _ in range(200):
+                ids = index.search_ids('"alpha beta"', 'room-a', limit=50)
+                assert ids == sorted(ids, reverse=True)
+        except Exception as e:
+            errors.append(e)
+
+    searcher = threading.Thread(target=search)
+    searcher.start()
+    for doc, (room, text) in docs.items():
+        index._add(doc, room, text)
+    searcher.join()
+    assert not errors
+    assert index.search_ids('"alpha beta"', 'room-a', limit=10 ** 6) == _brute_force(docs, '"alpha beta"', 'room-a')
@@ -0,0 +1,115 @@
+import random
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from app.services.session_registry import SessionRegistry
+
+THREADS = 64
+REQUESTS = 4000
+
+
+class _Service:
+    """Stand-in transcription service that records whether it was torn down."""
+
+    def __init__(self, room_name):
+        self.room_name = room_name
+        self.stopped = 0
+
+    def stop_transcription(self):
+        self.stopped += 1
+
+
+class _Factory:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = Counter()
+        self.services = []
+        self._lock = threading.Lock()
+
+    def __call__(self, room_name):
+        def build():
+            with self._lock:
+                self.calls[room_name] += 1
+            time.sleep(self.delay)  # widen the window for racing starts
+            service = _Service(room_name)
+            with self._lock:
+                self.services.append(service)
+            return service
+        return build
+
+
+def _assert_consistent(registry):
+    rooms = set(registry.rooms())
+    assert len(registry) == len(rooms)
+    assert {e.room_name for e in registry.started_between()} == rooms
+    assert {e.room_name for e in registry.by_worker(registry.worker)} == rooms
+    assert registry.workers() == ({registry.worker: len(rooms)} if rooms else {})
+    starts = [e.started_at for e in registry.started_between()]
+    assert starts == sorted(starts)
+
+
+def _storm(requests):
+    with ThreadPoolExecutor(max_workers=THREADS) as pool:
+        return list(pool.map(lambda request: request(), requests))
+
+
+def test_concurrent_starts_on_one_room_build_one_session():
+    registry = SessionRegistry()
+    factory = _Factory(delay=0.01)
+    results = _storm([lambda: registry.start('room', factory('room'))] * REQUESTS)
+
+    assert factory.calls['room'] == 1
+    assert sum(created for _, created in results) == 1
+    assert len({id(entry) for entry, _ in results}) == 1
+    _assert_consistent(registry)
+
+
+def test_start_stop_storm_leaks_nothing():
+    registry = SessionRegistry()
+    factory = _Factory()
+    rng = random.Random(7)
+    rooms = [f'room-{i}' for i in range(20)]
+
+    def start(room):
+        return lambda: registry.start(room, factory(room))
+
+    def stop(room):
+        return lambda: registry.stop(room, lambda e: e.service.stop_transcription())
+
+    requests = [(start if rng.random() < 0.5 else stop)(rng.choice(rooms)) for _ in range(REQUESTS)]
+    _storm(requests)
+    _assert_consistent(registry)
+
+    # Every service is either still registered or was torn down exactly once
+    live = {id(registry.get(room).service) for room in registry.rooms()}
+    for service in factory.services:
+        assert service.stopped == (0 if id(service) in live else 1)
+    # A room never had two sessions at once, so builds = stops + still running
+    assert len(factory.services) == sum(s.stopped for s in factory.services) + len(live)
+
+    _storm([stop(room) for room in rooms])
+    assert len(registry) == 0
+    _assert_consistent(registry)
+    assert all(s.stopped == 1 for s in factory.services)
+    assert registry._room_locks == {}
+
+
+def test_different_rooms_do_not_wait_on_each_other():
+    registry = SessionRegistry()
+    factory = _Factory(delay=0.05)
+    t0 = time.perf_counter()
+    _storm([lambda room=f'room-{i}': registry.start(room, factory(room)) for i in range(THREADS)])
+    # Serialized builds would take THREADS * delay (3.2s)
+    assert time.perf_counter() - t0 < 1.0
+    assert len(registry) == THREADS
+    _assert_consistent(registry)
+
+
+def test_failed_factory_registers_nothing():
+    registry = SessionRegistry()
+    entry, created = registry.start('room', lambda: None)
+    assert entry is None and not created
+    assert 'room' not in registry
+    _assert_consistent(registry)
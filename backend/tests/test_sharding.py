@@ -0,0 +1,114 @@
+import asyncio
+
+from app.livekit.sharding import PLACEMENT_LEAST_LOADED, ShardedRoomService
+
+HOSTS = {'wss://a': 1, 'wss://b': 1}
+
+
+class _Host:
+    """Stand-in for one LiveKit server's room API."""
+
+    def __init__(self):
+        self.rooms = {}
+        self.fail_create = False
+
+    async def list_room_details_async(self):
+        return [{'name': n, 'num_participants': p, 'max_participants': 4, 'metadata': ''}
+                for n, p in self.rooms.items()]
+
+    async def create_room_async(self, name, max_participants=None, empty_timeout=None, metadata=None):
+        if self.fail_create:
+            return {'name': name, 'status': 'error', 'error': 'unavailable'}
+        self.rooms.setdefault(name, 0)
+        return {'name': name, 'status': 'created'}
+
+    async def delete_room_async(self, name):
+        self.rooms.pop(name, None)
+        return {'name': name, 'status': 'deleted'}
+
+
+def _service(**kwargs):
+    service = ShardedRoomService(HOSTS, 'key', 'secret', strategy=PLACEMENT_LEAST_LOADED, **kwargs)
+    service.services = {host: _Host() for host in HOSTS}
+    return service
+
+
+def _service_with(hosts):
+    """Another process's view of the same LiveKit hosts."""
+    service = _service()
+    service.services = hosts
+    return service
+
+
+def _refresh(service):
+    asyncio.run(service.refresh_load_async(force=True))
+
+
+def test_lookups_do_not_record_placements():
+    service = _service()
+    for i in range(1000):
+        service.host_for(f'probe-{i}')
+    assert service._placements == {}
+
+
+def test_unused_assignments_expire():
+    service = _service(pending_ttl=0)
+    host = service.assign('room')
+    assert service.assign('room') == host
+    _refresh(service)
+    assert 'room' not in service._placements and service._pending == {}
+
+
+def test_assignment_is_kept_once_the_room_exists():
+    service = _service(pending_ttl=0)
+    host = service.assign('room')
+    service.services[host].rooms['room'] = 1  # a client joined and LiveKit created the room
+    _refresh(service)
+    assert service.host_for('room') == host
+    assert service._pending == {}
+
+
+def test_drain_moves_empty_rooms_and_refresh_keeps_them_moved():
+    service = _service()
+    a, b = service.services['wss://a'], service.services['wss://b']
+    a.rooms.update({'empty': 0, 'busy': 2})
+    _refresh(service)
+
+    moved = service.drain('wss://a')
+    assert moved == ['empty']
+    assert a.rooms == {'busy': 2} and b.rooms == {'empty': 0}
+
+    _refresh(service)
+    assert service.host_for('empty') == 'wss://b'
+    assert service.host_for('busy') == 'wss://a'
+    assert service.host_for('new-room') == 'wss://b'
+
+
+def test_failed_recreate_is_not_reported_as_moved():
+    service = _service()
+    service.services['wss://a'].rooms['empty'] = 0
+    service.services['wss://b'].fail_create = True
+    _refresh(service)
+    assert service.drain('wss://a') == []
+    assert 'empty' not in service._placements
+
+
+def test_processes_agree_on_rooms_the_other_one_placed():
+    hosts = {host: _Host() for host in HOSTS}
+    first, second = _service_with(hosts), _service_with(hosts)
+    hosts['wss://a'].rooms['busy'] = 5  # makes least-loaded placement pick b
+
+    result = asyncio.run(first.create_room_async('lesson'))
+    assert result['host'] == 'wss://b'
+
+    # A fresh process (restart or another worker) has no placement for the room yet
+    assert asyncio.run(second.assign_async('lesson')) == 'wss://b'
+    assert asyncio.run(second.service_for_async('lesson')) is hosts['wss://b']
+    assert asyncio.run(_service_with(hosts).delete_room_async('lesson'))['status'] == 'deleted'
+    assert 'lesson' not in hosts['wss://b'].rooms
+
+
+def test_deleting_a_room_no_host_lists_is_not_found():
+    service = _service()
+    result = asyncio.run(service.delete_room_async('nowhere'))
+    assert result['status'] == 'error' and 'not_found' in result['error']
@@ -0,0 +1,87 @@
+import sqlite3
+import threading
+import time
+from collections import deque
+
+import pytest
+
+from app.services.store import Store
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = Store(str(tmp_path / 'store.db'), read_pool_size=2, read_timeout=5)
+    yield store
+    store.close()
+
+
+def test_writes_are_visible_after_flush(store):
+    stored = []
+    store.room_created('r1', 2)
+    store.segment_added('r1', 'alice', 'hello', 1.0, on_stored=stored.append)
+    assert store.flush()
+    assert store.get_room('r1')['max_participants'] == 2
+    assert [s['text'] for s in store.get_segments(stored)] == ['hello']
+
+
+def test_concurrent_readers_share_a_bounded_pool(store):
+    store.room_created('r1')
+    store.flush()
+    errors = []
+
+    def read():
+        try:
+            for _ in range(50):
+                store.get_room('r1')
+                store.list_rooms()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=read) for _ in range(16)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+    assert store._readers_opened == 2
+
+
+def test_room_scan_pages_in_id_order_without_sorting(store):
+    for i in range(25):
+        store.segment_added('r1' if i % 2 else 'r2', None, f'text {i}', 100.0 - i)
+    store.flush()
+    ids = [s['id'] for s in store.iter_segments('r1', batch_size=4)]
+    assert ids == sorted(ids) and len(ids) == 12
+
+    with store._reader() as conn:
+        plan = ' '.join(row[3] for row in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM segments WHERE room_name = ? AND id > ? AND id <= ? "
+            "ORDER BY id LIMIT ?", ('r1', 0, 100, 10)))
+    assert 'idx_segments_room_id' in plan
+    assert 'TEMP B-TREE' not in plan
+
+
+def test_checkpointed_session_is_claimed_once(store):
+    store.session_started('r1', 'old-node', time.time())
+    store.session_checkpointed('r1')
+    store.flush()
+    claims = []
+    threads = [threading.Thread(target=lambda: claims.extend(store.claim_checkpointed_sessions(60)))
+               for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert claims == ['r1']
+
+
+def test_exhausted_pool_times_out_then_recovers(tmp_path):
+    store = Store(str(tmp_path / 'store.db'), read_pool_size=1, read_timeout=0.05)
+    try:
+        with store._reader():
+            with pytest.raises(sqlite3.OperationalError):
+                store.get_room('r1')
+        assert store.get_room('r1') is None
+        assert store._reader_waiters == deque()
+    finally:
+        store.close()
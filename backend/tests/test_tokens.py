@@ -0,0 +1,21 @@
+import base64
+import json
+
+from app.livekit.server_sdk import generate_transcriber_token, is_transcriber_identity
+
+
+def _claims(token):
+    payload = token.split('.')[1]
+    return json.loads(base64.urlsafe_b64decode(payload + '=' * (-len(payload) % 4)))
+
+
+def test_transcriber_joins_as_hidden_subscribe_only_agent(monkeypatch):
+    monkeypatch.setenv('LIVEKIT_HOST', 'ws://localhost:7880')
+    monkeypatch.setenv('LIVEKIT_API_KEY', 'key')
+    monkeypatch.setenv('LIVEKIT_API_SECRET', 'secret' * 8)
+
+    claims = _claims(generate_transcriber_token('room-1'))
+    assert is_transcriber_identity(claims['sub'])
+    assert claims['kind'] == 'agent'
+    assert claims['video'] == {'roomJoin': True, 'room': 'room-1', 'hidden': True, 'agent': True,
+                               'canPublish': False, 'canPublishData': False, 'canSubscribe': True}
@@ -0,0 +1,38 @@
+import asyncio
+
+import pytest
+
+from app.services.tracing import Tracer
+
+
+def test_disabled_tracer_records_nothing():
+    tracer = Tracer(enabled=False)
+    with tracer.span('a'):
+        pass
+    assert tracer.traced('b')(lambda: 1)() == 1
+    assert tracer.snapshot()['spans'] == {}
+
+
+def test_spans_count_calls_and_errors():
+    tracer = Tracer(enabled=True)
+
+    @tracer.traced('sync')
+    def ok():
+        return 'ok'
+
+    @tracer.traced('async')
+    async def fail():
+        raise RuntimeError('boom')
+
+    assert ok() == 'ok'
+    with pytest.raises(RuntimeError):
+        asyncio.run(fail())
+    with pytest.raises(ValueError):
+        with tracer.span('block'):
+            raise ValueError
+
+    spans = tracer.snapshot()['spans']
+    assert spans['sync']['count'] == 1 and spans['sync']['errors'] == 0
+    assert spans['async']['errors'] == 1
+    assert spans['block']['errors'] == 1
+    assert len(tracer.snapshot()['recent']) == 3
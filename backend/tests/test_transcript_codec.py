@@ -0,0 +1,48 @@
+import pytest
+
+from app.routes import transcription as transcription_routes
+from app.routes.transcription import socketio, emit_transcript, stop_room_transcription
+from app.services.transcript_codec import TranscriptEncoder, decode_frame, HEADER_SIZE
+
+
+def test_round_trip_defines_speaker_once():
+    encoder = TranscriptEncoder(base_ts=100.0)
+    first = encoder.encode('hello', speaker='alice', final=False, ts=100.5)
+    second = encoder.encode('world', speaker='alice', ts=101.0)
+    assert len(first) == 2 and len(second) == 1
+
+    definition, interim = (decode_frame(f) for f in first)
+    assert definition['speaker_def'] and definition['text'] == 'alice'
+    assert interim == {'seq': 2, 'ts_delta_ms': 500, 'final': False, 'speaker_def': False,
+                       'speaker': 0, 'text': 'hello'}
+    assert decode_frame(second[0])['seq'] == 3
+    assert len(second[0]) == HEADER_SIZE + len('world')
+
+
+def test_rejects_truncated_frames():
+    with pytest.raises(ValueError):
+        decode_frame(b'\x01\x00')
+
+
+def _formats(client):
+    return [e['args'][0] for e in client.get_received() if e['name'] == 'transcription_format']
+
+
+def test_encoder_survives_restart_while_binary_clients_listen(app):
+    client = socketio.test_client(app)
+    client.emit('join_room', {'room_name': 'bin-room', 'encoding': 'binary'})
+    assert _formats(client)[0]['encoding'] == 'binary'
+
+    emit_transcript('bin-room', {'text': 'one', 'speaker': 'alice', 'final': True, 'ts': None})
+    encoder = transcription_routes.room_encoders['bin-room']
+    stop_room_transcription('bin-room')
+    assert transcription_routes.room_encoders['bin-room'] is encoder
+
+    # If the encoder is replaced anyway, listening clients are told to reset
+    del transcription_routes.room_encoders['bin-room']
+    emit_transcript('bin-room', {'text': 'two', 'speaker': 'alice', 'final': True, 'ts': None})
+    assert _formats(client)[0]['speakers'] == []
+
+    client.disconnect()
+    assert 'bin-room' not in transcription_routes.binary_clients
+    assert 'bin-room' not in transcription_routes.room_encoders
@@ -0,0 +1,33 @@
+import pytest
+
+from app.services.transcript_export import parse_range
+
+
+@pytest.mark.parametrize('header, expected', [
+    ('bytes=0-9', (0, 9)),
+    ('bytes=10-', (10, 99)),
+    ('bytes=90-200', (90, 99)),
+    ('bytes=-10', (90, 99)),
+    ('bytes=-500', (0, 99)),
+])
+def test_satisfiable_ranges(header, expected):
+    assert parse_range(header, 100) == expected
+
+
+@pytest.mark.parametrize('header', [
+    None, '', 'bytes=abc', 'bytes=-', 'bytes=5', 'bytes=9-3', 'bytes=1-2x', 'items=0-9',
+    'bytes=0-9,20-29',
+])
+def test_malformed_or_unsupported_ranges_are_ignored(header):
+    assert parse_range(header, 100) is None
+
+
+@pytest.mark.parametrize('header, length', [
+    ('bytes=100-', 100),
+    ('bytes=150-200', 100),
+    ('bytes=-0', 100),
+    ('bytes=-10', 0),
+])
+def test_unsatisfiable_ranges_raise(header, length):
+    with pytest.raises(ValueError):
+        parse_range(header, length)
@@ -1,7 +1,7 @@
 import { Button } from '@/components/ui/Button';
 
 interface ChatAreaProps {
-  messages: Array<{ sender: string; message: string }>;
+  messages: Array<{ sender: string; message: string; interim?: boolean }>;
   newMessage: string;
   onNewMessageChange: (message: string) => void;
   onSendMessage: () => void;
@@ -28,7 +28,7 @@ export function ChatArea({ messages, newMessage, onNewMessageChange, onSendMessa
                 `}
               >
                 <span className="block font-medium mb-1">{msg.sender}</span>
-                <span>{msg.message}</span>
+                <span className={msg.interim ? 'italic text-gray-500' : undefined}>{msg.message}</span>
               </div>
             </div>
           ))}
@@ -26,7 +26,7 @@ export default function RoomPage({ params }: { params: Promise<{ roomId: string
   const [remoteParticipants, setRemoteParticipants] = useState<RemoteParticipant[]>([]);
   const [isAudioEnabled, setIsAudioEnabled] = useState(true);
   const [isVideoEnabled, setIsVideoEnabled] = useState(true);
-  const [messages, setMessages] = useState<Array<{ sender: string; message: string }>>([]);
+  const [messages, setMessages] = useState<Array<{ sender: string; message: string; interim?: boolean }>>([]);
   const [newMessage, setNewMessage] = useState('');
   const [isPreJoin, setIsPreJoin] = useState(true);
   const [maxParticipants, setMaxParticipants] = useState(2);
@@ -224,10 +224,29 @@ export default function RoomPage({ params }: { params: Promise<{ roomId: string
       console.log('Disconnected from transcription server');
     });
 
-    socket.on('transcription', (data: { text: string }) => {
+    // Interim results rewrite the speaker's pending line in place; the final result settles it
+    socket.on('transcription', (data: { text: string; speaker?: string | null; final?: boolean }) => {
       console.log('Received transcription event:', JSON.stringify(data));
-      console.log('Received transcription:', data.text);
-      setMessages(prev => [...prev, { sender: 'AI', message: data.text }]);
+      const sender = data.speaker ? `${data.speaker} (transcript)` : 'AI';
+      const entry = { sender, message: data.text, interim: data.final === false };
+      setMessages(prev => {
+        const pending = prev.findIndex(m => m.interim && m.sender === sender);
+        if (pending === -1) {
+          return [...prev, entry];
+        }
+        const next = [...prev];
+        next[pending] = entry;
+        return next;
+      });
+    });
+
+    // Server is shutting down: reconnect after the staggered delay it assigned us
+    socket.on('server_draining', (data: { reconnect_after_ms: number }) => {
+      console.log(`Server draining, reconnecting in ${data.reconnect_after_ms}ms`);
+      setTimeout(() => {
+        socket.disconnect();
+        socket.connect();
+      }, data.reconnect_after_ms);
     });
 
     return () => {
@@ -235,10 +254,15 @@ export default function RoomPage({ params }: { params: Promise<{ roomId: string
     };
   }, []);
 
-  // Join room when connected
+  // Join room when connected, and again after any reconnect
   useEffect(() => {
     if (socket && room) {
-      socket.emit('join_room', { room_name: room.name });
+      const joinRoom = () => socket.emit('join_room', { room_name: room.name });
+      joinRoom();
+      socket.on('connect', joinRoom);
+      return () => {
+        socket.off('connect', joinRoom);
+      };
     }
   }, [socket, room]);
 
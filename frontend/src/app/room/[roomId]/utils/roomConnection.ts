@@ -155,8 +155,10 @@ export async function connectToRoom(
         },
       };
 
-      console.log('Connecting to room...');
-      await room.connect(process.env.NEXT_PUBLIC_LIVEKIT_URL!, data.token, connectOptions);
+      // The backend names the LiveKit host that owns this room when rooms are sharded
+      const livekitUrl = data.livekit_url || process.env.NEXT_PUBLIC_LIVEKIT_URL!;
+      console.log('Connecting to room on', livekitUrl);
+      await room.connect(livekitUrl, data.token, connectOptions);
       console.log('Connected to room successfully');
 
       // Initialize camera and microphone